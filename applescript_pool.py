@@ -0,0 +1,158 @@
+# applescript_pool.py
+# Pool of warm AppleScript worker processes, so running a script does not start a new interpreter.
+
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+
+from constants import *
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "applescript_worker.py")
+
+class ScriptResult:
+    """Result of a script run by the pool. Same fields as `applescript._result.Result`.
+    """
+    def __init__(self, code: int, out: str, err: str):
+        self.code = code
+        self.out = out
+        self.err = err
+
+    def __repr__(self):
+        return f"ScriptResult(code={self.code}, out={self.out!r}, err={self.err!r})"
+
+class ScriptWorker:
+    """A single long-lived worker process, talking JSON lines over its stdin/stdout pipes.
+    """
+    def __init__(self, argv: list):
+        """Initialize ScriptWorker class.
+
+        Args:
+            argv (list): Command line used to start the worker process.
+        """
+        self._argv = argv
+        self._ids = itertools.count()
+        self._proc = None
+        self._responses = None
+        self.restarts = -1 # First start is not a restart
+        self.template_calls = 0
+        self.template_compiles = 0
+
+    def start(self) -> None:
+        """Start (or restart) the worker process.
+        """
+        self.stop()
+        self._proc = subprocess.Popen(self._argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_responses, args=(self._proc, self._responses), daemon=True).start()
+        self.restarts += 1
+
+    def stop(self) -> None:
+        """Kill the worker process, if running.
+        """
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    @staticmethod
+    def _read_responses(proc: subprocess.Popen, responses: queue.Queue) -> None:
+        for line in proc.stdout:
+            responses.put(json.loads(line))
+        responses.put(None) # EOF: worker exited
+
+    def run_template(self, name: str, args: list, timeout: float) -> ScriptResult:
+        """Run a script template of script_registry.py on this worker, compiled once per worker.
+
+        Args:
+            name (str): Template name.
+            args (list): Arguments of the template.
+            timeout (float): Seconds to wait for the result.
+
+        Returns:
+            ScriptResult: Result of the script. `code` is -1 if the worker crashed or timed out.
+        """
+        self.template_calls += 1
+        return self._request({"template": name, "args": list(args)}, timeout)
+
+    def _request(self, request: dict, timeout: float) -> ScriptResult:
+        if not self.alive:
+            self.start()
+
+        request_id = next(self._ids)
+        try:
+            self._proc.stdin.write(json.dumps(dict(request, id=request_id)) + "\n")
+            self._proc.stdin.flush()
+            response = self._responses.get(timeout=timeout)
+        except BrokenPipeError:
+            response = None
+        except queue.Empty:
+            self.stop()
+            return ScriptResult(-1, '', f"AppleScript worker timed out after {timeout}s")
+
+        if response is None:
+            self.stop()
+            return ScriptResult(-1, '', "AppleScript worker crashed")
+        if response.get("compiled"):
+            self.template_compiles += 1
+        return ScriptResult(response["code"], response["out"], response["err"])
+
+class ScriptPool:
+    """Pool of warm AppleScript workers. Requests are run in parallel on idle workers.
+    """
+    def __init__(self, size: int = APPLESCRIPT_POOL_SIZE, executor: str = APPLESCRIPT_EXECUTOR, worker_argv: list = None):
+        """Initialize ScriptPool class.
+
+        Args:
+            size (int, optional): Number of worker processes. Defaults to APPLESCRIPT_POOL_SIZE.
+            executor (str, optional): Executor used by applescript_worker.py: "nsapplescript", "osascript" or "echo". Defaults to APPLESCRIPT_EXECUTOR.
+            worker_argv (list, optional): Command line of a custom worker process, overriding `executor`. Defaults to None.
+        """
+        if worker_argv is None:
+            worker_argv = [sys.executable, WORKER_PATH, "--executor", executor]
+        self._workers = [ScriptWorker(worker_argv) for i in range(0, size)]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            worker.start() # Warm up
+            self._idle.put(worker)
+
+    def run_template(self, name: str, args: list, timeout: float = APPLESCRIPT_TIMEOUT) -> ScriptResult:
+        """Run a script template on the next idle worker, blocking until one is available. See script_registry.py.
+
+        Args:
+            name (str): Template name.
+            args (list): Arguments of the template.
+            timeout (float, optional): Seconds to wait for the result. Defaults to APPLESCRIPT_TIMEOUT.
+
+        Returns:
+            ScriptResult: Result of the script.
+        """
+        worker = self._idle.get()
+        try:
+            return worker.run_template(name, args, timeout)
+        finally:
+            self._idle.put(worker)
+
+    @property
+    def restarts(self) -> int:
+        return sum(worker.restarts for worker in self._workers)
+
+    def template_stats(self) -> dict:
+        """Template runs and compiles over all workers (each worker compiles a template once, until restarted or evicted).
+        """
+        calls = sum(worker.template_calls for worker in self._workers)
+        compiles = sum(worker.template_compiles for worker in self._workers)
+        return {"calls": calls, "compiles": compiles, "hit_rate": round(1 - compiles / calls, 3) if calls else 0}
+
+    def close(self) -> None:
+        """Stop all worker processes.
+        """
+        for worker in self._workers:
+            worker.stop()
@@ -0,0 +1,55 @@
+# applescript_worker.py
+# Long-lived AppleScript worker process used by applescript_pool.py.
+# Reads one JSON request per line on stdin and writes one JSON response per line on stdout:
+#   request:  {"id": 1, "template": "<name>", "args": [...]} (see script_registry.py)
+#   response: {"id": 1, "code": 0, "out": "...", "err": ""}, and "compiled": true if a template was compiled for the request
+
+import argparse
+import json
+import sys
+import time
+
+from script_registry import TEMPLATES, FakeCompiler, ScriptRegistry, make_compiler
+
+# Extra templates of the "echo" executor, to test the pool off macOS
+ECHO_TEMPLATES = {
+    "sleep": "sleep", # seconds: sleeps, then echoes
+    "crash": "crash", # exits the worker
+}
+
+class EchoCompiler(FakeCompiler):
+    """Stand-in compiler of the "echo" executor: echoes the arguments, and runs the ECHO_TEMPLATES.
+    """
+    def execute(self, handle, args: list) -> tuple:
+        if handle == "crash":
+            sys.exit(1)
+        if handle == "sleep":
+            time.sleep(float(args[0]))
+        return super().execute(handle, args)
+
+def main():
+    parser = argparse.ArgumentParser(description="AppleScript worker process.")
+    parser.add_argument("--executor", default="nsapplescript", choices=["nsapplescript", "osascript", "echo"])
+    args = parser.parse_args()
+
+    # Templates compiled once per worker
+    if args.executor == "echo":
+        registry = ScriptRegistry(EchoCompiler(), dict(TEMPLATES, **ECHO_TEMPLATES))
+    else:
+        registry = ScriptRegistry(make_compiler(args.executor))
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        compiles = registry.compiles
+        try:
+            code, out, err = registry.run(request["template"], request["args"])
+        except Exception as e:
+            code, out, err = 1, '', str(e)
+        response = {"id": request["id"], "code": code, "out": out, "err": err}
+        if registry.compiles != compiles:
+            response["compiled"] = True
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
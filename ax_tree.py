@@ -0,0 +1,373 @@
+# ax_tree.py
+# Query layer over the accessibility tree of the Photos window, with pluggable sources: the Photos app
+# (through AppleScript), or an in-process simulated Photos window, to measure lookups off a Mac.
+
+import random
+
+from constants import *
+from utils import run_template
+
+# Adjustment sliders of the Photos edit pane, by group, by accessibility description.
+# Descriptions are only unique within a group (e.g. "Intensity").
+PHOTOS_ADJUSTMENTS = {
+    "Light": ["Brilliance", "Exposure", "Highlights", "Shadows", "Brightness", "Contrast", "Black Point"],
+    "Color": ["Saturation", "Vibrance", "Cast"],
+    "Black & White": ["Intensity", "Neutrals", "Tone", "Grain"],
+    "Noise Reduction": ["Amount"],
+    "Sharpen": ["Intensity", "Edges", "Falloff"],
+    "Definition": ["Intensity"],
+    "Vignette": ["Strength", "Radius", "Softness"],
+}
+
+def element_path_text(path: tuple) -> str:
+    """Get the text form of an element path, the argument of the element script templates (see script_registry.py).
+
+    Args:
+        path (tuple): 1-based child indices from window 1, e.g. (3, 1) for UI element 1 of UI element 3 of window 1.
+
+    Returns:
+        str: Indices joined with ".", e.g. "3.1".
+    """
+    return ".".join(str(i) for i in path)
+
+class Element:
+    """Element of a simulated accessibility tree.
+    """
+    __slots__ = ("role", "name", "description", "value", "position", "size", "children")
+
+    def __init__(self, role: str, name: str = "", description: str = "", value: float = None, position: tuple = (0, 0), size: tuple = (0, 0)):
+        self.role = role
+        self.name = name
+        self.description = description
+        self.value = value
+        self.position = position
+        self.size = size
+        self.children = []
+
+class AccessibilitySource:
+    """Accessibility tree of the Photos window. Elements are addressed by path: 1-based child indices from window 1.
+    """
+    def walk(self):
+        """Iterate over all elements in document order, like `entire contents of window 1`. O(n).
+
+        Returns:
+            iterator: (path, role, name, description) per element.
+        """
+        raise NotImplementedError
+
+    def read(self, path: tuple) -> dict:
+        """Read an element by path. O(depth).
+
+        Returns:
+            dict: {"position": (x, y), "size": (w, h), "value": float}, or None if there is no such element.
+        """
+        raise NotImplementedError
+
+    def read_many(self, paths: list) -> list:
+        """Read elements by path, in one round trip where the source supports it.
+
+        Returns:
+            list: Element per path, as `read` (None if there is no such element).
+        """
+        return [self.read(path) for path in paths]
+
+    def click(self, path: tuple) -> bool:
+        """Click an element by path. Returns False if there is no such element.
+        """
+        raise NotImplementedError
+
+    def set_value(self, path: tuple, value: float) -> bool:
+        """Set the value of an element by path. Returns False if there is no such element.
+        """
+        raise NotImplementedError
+
+class SimulatedPhotosSource(AccessibilitySource):
+    """In-process simulated Photos window: filler elements (groups, buttons, texts, images) around the
+    Edit button and the adjustment groups, with configurable size, nesting depth and placement.
+    `visited` counts the elements touched, the unit of cost of AppleScript queries.
+    """
+    def __init__(self, size: int = 2000, depth: int = 6, placement: str = "end", groups: dict = PHOTOS_ADJUSTMENTS, seed: int = 0):
+        """Initialize SimulatedPhotosSource class.
+
+        Args:
+            size (int, optional): Approximate number of elements in the window. Defaults to 2000.
+            depth (int, optional): Nesting depth of filler elements. Defaults to 6.
+            placement (str, optional): Where the adjustments are in document order: "start", "middle" or "end". Defaults to "end".
+            groups (dict, optional): Slider descriptions by group. Defaults to PHOTOS_ADJUSTMENTS.
+            seed (int, optional): Seed of the random slider values. Defaults to 0.
+        """
+        self.visited = 0
+        self.clicks = []
+        rng = random.Random(seed)
+
+        # Adjustments, at the path of the Light group in Photos (LIGHT_GROUP_PATH): splitter group 1 > group 1 > group 1 > scroll area 1 > group "<name>" > group 1 > sliders
+        scroll_area = Element("scroll area")
+        y = 200
+        for name, descriptions in groups.items():
+            group = Element("group", name=name)
+            sliders = Element("group")
+            for description in descriptions:
+                sliders.children.append(Element("slider", description=description, value=round(rng.uniform(-1, 1), 2), position=(1000, y), size=(180, 20)))
+                y += 40
+            group.children.append(sliders)
+            scroll_area.children.append(group)
+        inner = Element("group")
+        inner.children.append(scroll_area)
+        outer = Element("group")
+        outer.children.append(inner)
+        splitter = Element("splitter group")
+        splitter.children.append(outer)
+        toolbar = Element("toolbar")
+        toolbar.children.append(Element("button", description="Edit"))
+
+        fixed = 6 + len(groups) * 2 + sum(len(descriptions) for descriptions in groups.values())
+        filler = self._filler(max(size - fixed, 0), depth)
+
+        self.root = Element("window")
+        if placement == "start":
+            self.root.children = [toolbar, splitter] + filler
+        elif placement == "middle":
+            half = len(filler) // 2
+            self.root.children = filler[:half] + [toolbar, splitter] + filler[half:]
+        elif placement == "end":
+            self.root.children = filler + [toolbar, splitter]
+        else:
+            raise Exception(f"Unknown placement {placement}.")
+        self.size = sum(1 for element in self._iterate(self.root))
+
+    @staticmethod
+    def _filler(count: int, depth: int) -> list:
+        """Subtrees of `count` elements: chains of nested groups, with a few leaves at each level.
+        """
+        roles = ["button", "static text", "image", "checkbox"]
+        subtrees = []
+        while count > 0:
+            top = Element("group")
+            count -= 1
+            parent = top
+            for level in range(1, depth):
+                for i in range(0, min(3, count)):
+                    parent.children.append(Element(roles[(level + i) % len(roles)], description=f"item {count - i}"))
+                count -= min(3, count)
+                if count <= 0:
+                    break
+                child = Element("group")
+                parent.children.append(child)
+                parent = child
+                count -= 1
+            subtrees.append(top)
+        return subtrees
+
+    @staticmethod
+    def _iterate(element: Element):
+        for child in element.children:
+            yield child
+            yield from SimulatedPhotosSource._iterate(child)
+
+    def walk(self):
+        stack = [((), self.root)]
+        while stack:
+            path, element = stack.pop()
+            if path:
+                self.visited += 1
+                yield path, element.role, element.name, element.description
+            for i in range(len(element.children), 0, -1):
+                stack.append((path + (i,), element.children[i - 1]))
+
+    def _element(self, path: tuple) -> Element:
+        element = self.root
+        for i in path:
+            self.visited += 1
+            if not 1 <= i <= len(element.children):
+                return None
+            element = element.children[i - 1]
+        return element
+
+    def read(self, path: tuple) -> dict:
+        element = self._element(path)
+        if element is None:
+            return None
+        return {"position": element.position, "size": element.size, "value": element.value}
+
+    def click(self, path: tuple) -> bool:
+        element = self._element(path)
+        if element is None:
+            return False
+        self.clicks.append(element.description)
+        return True
+
+    def set_value(self, path: tuple, value: float) -> bool:
+        element = self._element(path)
+        if element is None:
+            return False
+        element.value = value
+        return True
+
+class AppleScriptSource(AccessibilitySource):
+    """Accessibility tree of the Photos app, through AppleScript. A walk is a single script (one round trip);
+    reads and clicks address the element by path, without walking the window.
+    """
+    def walk(self):
+        result = run_template("walk_window")
+        if result.err != '':
+            print(f"Error: walk: {result.err}")
+        for line in result.out.splitlines():
+            fields = line.split("\t")
+            if len(fields) != 4:
+                continue
+            path, role, name, description = fields
+            yield tuple(int(i) for i in path.strip(".").split(".")), role, name, description
+
+    def read(self, path: tuple) -> dict:
+        return self.read_many([path])[0]
+
+    def read_many(self, paths: list) -> list:
+        result = run_template("read_elements", *[element_path_text(path) for path in paths])
+        lines = result.out.split("\n") if result.code == 0 else []
+        return [parse_element(lines[i]) if i < len(lines) else None for i in range(0, len(paths))]
+
+    def click(self, path: tuple) -> bool:
+        return run_template("click_element", element_path_text(path)).code == 0
+
+    def set_value(self, path: tuple, value: float) -> bool:
+        return run_template("set_element_value", element_path_text(path), float(value)).code == 0
+
+def parse_element(out: str) -> dict:
+    """Parse a tab-separated element read: x, y, width, height, value.
+
+    Returns:
+        dict: {"position": (x, y), "size": (w, h), "value": float}, or None if the read failed.
+    """
+    fields = out.split("\t")
+    if len(fields) != 5:
+        return None
+    x, y, w, h, value = fields
+    return {"position": (int(float(x)), int(float(y))), "size": (int(float(w)), int(float(h))), "value": float(value)}
+
+class AccessibilityQuery:
+    """Element lookups in the Photos window, by role and description.
+
+    Without an index, every lookup scans the window in document order, like the AppleScript walks in utils.py: O(n).
+    `build_index` walks the window once, then lookups are dict hits and elements are read by path: O(depth).
+    If an indexed path no longer resolves (the layout changed), the index is rebuilt.
+    """
+    def __init__(self, source: AccessibilitySource):
+        """Initialize AccessibilityQuery class.
+
+        Args:
+            source (AccessibilitySource): Accessibility tree to query.
+        """
+        self.source = source
+        self.index = None # (role, description) -> path of the first such element
+        self.groups = None # group name -> {slider description: path}, in document order
+        self.rebuilds = 0
+
+    def build_index(self, required_group: str = None) -> bool:
+        """Walk the window once, and index elements by (role, description), and sliders by group.
+        The index is only installed if the walk found sliders (of `required_group`, if given): a failed or
+        partial walk (e.g. edit pane closed) keeps the previous index, or lookups by linear scan.
+
+        Args:
+            required_group (str, optional): Group of sliders the walk must find. Defaults to None.
+
+        Returns:
+            bool: Whether the index was installed.
+        """
+        index = {}
+        groups = {}
+        group_names = {} # path of a named group -> name
+        for path, role, name, description in self.source.walk():
+            if role == "group" and name:
+                group_names[path] = name
+            index.setdefault((role, description), path)
+            if role == "slider":
+                group = next((group_names[path[:i]] for i in range(len(path) - 1, 0, -1) if path[:i] in group_names), "")
+                groups.setdefault(group, {}).setdefault(description, path)
+        if not groups or (required_group is not None and required_group not in groups):
+            return False
+        self.groups = groups # Before the index: lookups by group check the index first
+        self.index = index
+        return True
+
+    def scan(self, role: str, descriptions: list) -> dict:
+        """Find elements by linear scan of the window, stopping once all are found.
+
+        Args:
+            role (str): Role of the elements, e.g. "slider".
+            descriptions (list): Descriptions of the elements.
+
+        Returns:
+            dict: description -> path, for every element found.
+        """
+        wanted = set(descriptions)
+        found = {}
+        for path, element_role, name, description in self.source.walk():
+            if element_role == role and description in wanted and description not in found:
+                found[description] = path
+                if len(found) == len(wanted):
+                    break
+        return found
+
+    def lookup(self, role: str, descriptions: list, group: str = None) -> dict:
+        """Find elements by description: from the index if built, by linear scan otherwise.
+
+        Args:
+            role (str): Role of the elements.
+            descriptions (list): Descriptions of the elements.
+            group (str, optional): Group of sliders, for descriptions that are only unique within a group. Defaults to None.
+
+        Returns:
+            dict: description -> path, for every element found.
+        """
+        if self.index is None:
+            return self.scan(role, descriptions)
+        if group is not None:
+            paths = self.groups.get(group, {})
+            return {description: paths[description] for description in descriptions if description in paths}
+        return {description: self.index[(role, description)] for description in descriptions if (role, description) in self.index}
+
+    def _read_all(self, paths: dict) -> dict:
+        elements = dict(zip(paths, self.source.read_many(list(paths.values()))))
+        return {description: element for description, element in elements.items() if element is not None}
+
+    def find_sliders(self, descriptions: list, group: str = None) -> dict:
+        """Get position, size and value of sliders.
+
+        Args:
+            descriptions (list): Slider descriptions.
+            group (str, optional): Group of the sliders. Defaults to None.
+
+        Returns:
+            dict: description -> {"position": (x, y), "size": (w, h), "value": float}, for every slider found.
+        """
+        paths = self.lookup("slider", descriptions, group)
+        sliders = self._read_all(paths)
+        if self.index is not None and len(sliders) < len(paths): # Stale index
+            self.build_index(group)
+            self.rebuilds += 1
+            sliders = self._read_all(self.lookup("slider", descriptions, group))
+        return sliders
+
+    def read_values(self, descriptions: list, group: str = None) -> dict:
+        """Get the values of sliders.
+
+        Returns:
+            dict: description -> value, for every slider found.
+        """
+        return {description: slider["value"] for description, slider in self.find_sliders(descriptions, group).items()}
+
+    def click(self, role: str, description: str) -> bool:
+        """Click an element by role and description.
+
+        Returns:
+            bool: Whether the element was found and clicked.
+        """
+        path = self.lookup(role, [description]).get(description)
+        if path is not None and self.source.click(path):
+            return True
+        if self.index is not None: # Stale index
+            self.build_index()
+            self.rebuilds += 1
+            path = self.index.get((role, description))
+            return path is not None and self.source.click(path)
+        return False
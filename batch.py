@@ -0,0 +1,208 @@
+# batch.py
+# Batch edits: capture the slider values of the current photo as an adjustment set, and apply it to the next N photos.
+# Usage: python3 batch.py <count> [--prev] [--dry-run [--action-delay SECONDS] [--load-delay SECONDS]]
+
+import argparse
+import contextlib
+import io
+import time
+
+from constants import *
+
+def capture_adjustments() -> dict:
+    """Capture the slider values of the photo open in the Photos app as an adjustment set.
+
+    Returns:
+        dict: Map of slider name -> SW value, for every slider in main.channel_names.
+    """
+    import main
+
+    sliders = main.query_sliders()
+    return {name: sliders[name]["value"] for name in main.channel_names}
+
+def wait_for_photo_id(ui, previous_photo_id: str, timeout: float = BATCH_READY_TIMEOUT, poll_period: float = BATCH_POLL_PERIOD) -> str:
+    """Poll the Photos UI until another photo is open: after a navigation keystroke, Photos shows the previous photo until the next one loads.
+
+    Args:
+        ui (ui_backend.UIBackend): UI backend of the Photos app.
+        previous_photo_id (str): Photo open before navigating.
+        timeout (float, optional): Max seconds to wait. Defaults to BATCH_READY_TIMEOUT.
+        poll_period (float, optional): Seconds between polls. Defaults to BATCH_POLL_PERIOD.
+
+    Raises:
+        Exception: If no other photo is open within `timeout` (e.g. last photo of the library).
+
+    Returns:
+        str: Identity of the new photo.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        photo_id = ui.photo_id()
+        if photo_id is not None and photo_id != previous_photo_id:
+            return photo_id
+        if time.monotonic() >= deadline:
+            raise Exception(f"Photo after {previous_photo_id} not ready after {timeout} s.")
+        time.sleep(poll_period)
+
+def wait_until_ready(previous_photo_id: str, timeout: float = BATCH_READY_TIMEOUT, poll_period: float = BATCH_POLL_PERIOD, ui=None, names: list = None) -> tuple:
+    """Poll the Photos UI until another photo is open and its sliders can be queried.
+
+    Args:
+        previous_photo_id (str): Photo open before navigating.
+        timeout (float, optional): Max seconds to wait. Defaults to BATCH_READY_TIMEOUT.
+        poll_period (float, optional): Seconds between polls. Defaults to BATCH_POLL_PERIOD.
+        ui (ui_backend.UIBackend, optional): UI backend of the Photos app. Defaults to None (main.ui).
+        names (list, optional): Slider descriptions to query. Defaults to None (main.channel_names).
+
+    Raises:
+        Exception: If the photo is not ready within `timeout` (e.g. last photo of the library).
+
+    Returns:
+        tuple: (photo id, sliders) of the new photo. See main.query_sliders.
+    """
+    if ui is None or names is None:
+        import main
+        ui = main.ui if ui is None else ui
+        names = main.channel_names if names is None else names
+
+    deadline = time.monotonic() + timeout
+    while True:
+        photo_id = wait_for_photo_id(ui, previous_photo_id, max(deadline - time.monotonic(), 0), poll_period)
+        sliders = ui.query_sliders(names)
+        if all(name in sliders for name in names):
+            return photo_id, sliders
+        if time.monotonic() >= deadline:
+            raise Exception(f"Sliders of photo {photo_id} not ready after {timeout} s.")
+        time.sleep(poll_period)
+
+def apply_adjustments(adjustments: dict, sliders: dict) -> int:
+    """Move the sliders of the open photo to an adjustment set. Sliders already at their value are skipped.
+    The mouse is released once all sliders are set.
+
+    Args:
+        adjustments (dict): Map of slider name -> SW value. See capture_adjustments.
+        sliders (dict): Current sliders of the photo. See main.query_sliders.
+
+    Returns:
+        int: Number of sliders moved.
+    """
+    import main
+
+    moved = 0
+    for channel, name in enumerate(main.channel_names):
+        sw_value = adjustments[name]
+        if abs(sliders[name]["value"] - sw_value) < 1 / SW_NUM_STEPS_SLIDER: # Within half a SW step
+            continue
+        hw_value = min(max(sw_value * (HW_SLIDER_RANGE + 1) / 2, HW_SLIDER_MIN), HW_SLIDER_MAX)
+        main.move_slider(channel, hw_value)
+        moved += 1
+    main.gesture.release() # Free the mouse before navigating to the next photo
+    return moved
+
+def run_batch(count: int, adjustments: dict = None, direction: int = 1, timeout: float = BATCH_READY_TIMEOUT, poll_period: float = BATCH_POLL_PERIOD) -> dict:
+    """Apply an adjustment set to the next `count` photos.
+
+    Args:
+        count (int): Number of photos to edit.
+        adjustments (dict, optional): Adjustment set. Defaults to the slider values of the open photo.
+        direction (int, optional): 1 for next photos, -1 for previous photos. Defaults to 1.
+        timeout (float, optional): Max seconds to wait for each photo to load. Defaults to BATCH_READY_TIMEOUT.
+        poll_period (float, optional): Seconds between readiness polls. Defaults to BATCH_POLL_PERIOD.
+
+    Raises:
+        Exception: If a navigation keystroke fails.
+
+    Returns:
+        dict: Batch report: photos, seconds, photos per minute, sliders moved and mean seconds waiting for photos to load.
+    """
+    import main
+
+    if adjustments is None:
+        adjustments = capture_adjustments()
+    keys = action_to_script["next_photo" if direction == 1 else "prev_photo"]
+
+    photos = 0
+    moved = 0
+    wait_time = 0
+    start_time = time.perf_counter()
+    for i in range(0, count):
+        previous_photo_id = main.current_photo_id
+        r = main.ui.send_keys(*keys)
+        if r.code != 0:
+            raise Exception(f"Applescript returned {r.code}: {r.err}")
+
+        wait_start_time = time.perf_counter()
+        photo_id, sliders = wait_until_ready(previous_photo_id, timeout, poll_period)
+        wait_time += time.perf_counter() - wait_start_time
+
+        main.land_on_photo(photo_id, direction)
+        main.apply_slider_values(sliders)
+        moved += apply_adjustments(adjustments, sliders)
+        photos += 1
+        if DIAGNOSTIC_MODE:
+            print(f"Batch: edited photo {photo_id} ({photos}/{count})")
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "photos": photos,
+        "seconds": round(elapsed, 3),
+        "photos_per_minute": round(photos * 60 / elapsed, 1) if elapsed > 0 else 0,
+        "sliders_moved": moved,
+        "mean_wait_seconds": round(wait_time / photos, 3) if photos else 0,
+    }
+
+def setup_live() -> None:
+    """Set up main.py against the Photos app and the controller, as on startup (without the event loop).
+    """
+    import main
+    from utils import start_script_pool
+
+    main.init_profile(DEVICE_PROFILE)
+    start_script_pool(APPLESCRIPT_POOL_SIZE, APPLESCRIPT_EXECUTOR)
+    main.init_ui_backend(UI_BACKEND)
+    main.init_io()
+    main.init_leds()
+    main.init_slider_layout()
+    main.current_photo_id = main.ui.photo_id()
+    main.set_init_slider_positions()
+
+def setup_dry_run(action_delay: float, load_delay: float) -> None:
+    """Set up main.py against a fake UI backend, with an adjustment set on the open photo.
+
+    Args:
+        action_delay (float): Seconds each fake UI action takes.
+        load_delay (float): Seconds each fake photo takes to load.
+    """
+    import main
+    import session
+
+    session.setup_fake_session(action_delay)
+    main.ui.load_delay = load_delay
+    for channel, name in enumerate(main.channel_names):
+        main.ui.sw_values[name] = round((channel + 1) * 0.1 - 0.4, 2) # Example adjustment set
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.set_init_slider_positions()
+    main.ui.actions.clear()
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the slider values of the open photo to the next photos.")
+    parser.add_argument("count", type=int, help="Number of photos to edit")
+    parser.add_argument("--prev", action="store_true", help="Edit the previous photos instead of the next ones")
+    parser.add_argument("--dry-run", action="store_true", help="Run against a fake UI backend, to measure throughput")
+    parser.add_argument("--action-delay", type=float, default=0.005, help="Dry run: seconds each fake UI action takes (default: 0.005)")
+    parser.add_argument("--load-delay", type=float, default=0.2, help="Dry run: seconds each fake photo takes to load (default: 0.2)")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        setup_dry_run(args.action_delay, args.load_delay)
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = run_batch(args.count, direction=-1 if args.prev else 1)
+    else:
+        setup_live()
+        report = run_batch(args.count, direction=-1 if args.prev else 1)
+
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
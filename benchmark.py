@@ -0,0 +1,306 @@
+# benchmark.py
+# Headless benchmarks of the MIDI-to-action pipeline: synthetic fader sweeps, jog bursts and button storms
+# are fed through the event queue and handlers against a fake UI backend.
+# Also benchmarks element lookups in a simulated Photos accessibility tree, by tree size (--tree),
+# and the compiled AppleScript template cache with a fake compiler (--scripts).
+# Usage: python3 benchmark.py [--save] [--fast] [--virtual] [--action-delay SECONDS] | --tree [--placement start|middle|end] | --scripts
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+import mido
+
+import ax_tree
+import metrics
+import session
+from applescript_pool import ScriptPool
+from constants import *
+from script_registry import FakeCompiler, ScriptRegistry
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+VIRTUAL_PORT_NAME = "midi-photos-benchmark"
+REGRESSION_THRESHOLD = 0.2 # Report changes of more than 20% against the baseline
+
+def fader_sweep(channels: list = [1, 2], sweeps: int = 4, step: int = 64, period: float = 0.001) -> list:
+    """Full-range fader sweeps, back and forth, on one or more sliders at once.
+
+    Args:
+        channels (list, optional): Slider channels moved together. Defaults to [1, 2].
+        sweeps (int, optional): Number of one-way sweeps. Defaults to 4.
+        step (int, optional): HW step between messages. Defaults to 64.
+        period (float, optional): Seconds between messages of a slider. Defaults to 0.001.
+
+    Returns:
+        list: (time, mido.Message) events.
+    """
+    events = []
+    t = 0
+    for sweep in range(0, sweeps):
+        pitches = range(HW_SLIDER_MIN, HW_SLIDER_MAX + 1, step) if sweep % 2 == 0 else range(HW_SLIDER_MAX, HW_SLIDER_MIN - 1, -step)
+        for pitch in pitches:
+            for channel in channels:
+                events.append((t, mido.Message("pitchwheel", channel=channel, pitch=pitch)))
+            t += period
+    return events
+
+def jog_burst(ticks: int = 400, period: float = 0.002) -> list:
+    """Fast jog wheel spins, alternating direction every 100 ticks, after grabbing a slider.
+
+    Args:
+        ticks (int, optional): Number of jog ticks. Defaults to 400.
+        period (float, optional): Seconds between ticks. Defaults to 0.002.
+
+    Returns:
+        list: (time, mido.Message) events.
+    """
+    events = [(0, mido.Message("pitchwheel", channel=0, pitch=0))]
+    for i in range(0, ticks):
+        value = 1 if (i // 100) % 2 == 0 else 65 # CW, CCW
+        events.append((0.1 + i * period, mido.Message("control_change", control=60, value=value)))
+    return events
+
+def button_storm(presses: int = 200, period: float = 0.005) -> list:
+    """Rapid presses of photo navigation and track select buttons.
+
+    Args:
+        presses (int, optional): Number of button presses. Defaults to 200.
+        period (float, optional): Seconds between presses. Defaults to 0.005.
+
+    Returns:
+        list: (time, mido.Message) events.
+    """
+    notes = [46, 47, 91, 92] + [note for note in range(8, 15)]
+    events = []
+    for i in range(0, presses):
+        note = notes[i % len(notes)]
+        events.append((i * period, mido.Message("note_on", note=note, velocity=127)))
+        events.append((i * period + period / 2, mido.Message("note_on", note=note, velocity=0)))
+    return events
+
+WORKLOADS = {
+    "fader_sweep": fader_sweep,
+    "jog_burst": jog_burst,
+    "button_storm": button_storm,
+}
+
+def replay_virtual(events: list, action_delay: float) -> dict:
+    """Replay events in real time through a virtual MIDI port (needs python-rtmidi), like a live controller.
+    Input is captured by the event runtime as configured by MIDI_CAPTURE_MODE.
+
+    Args:
+        events (list): (time, mido.Message) events.
+        action_delay (float): Seconds each fake UI action takes.
+
+    Returns:
+        dict: Replay report, same as `session.replay`.
+    """
+    import main
+
+    session.setup_fake_session(action_delay)
+    main.init_runtime()
+    runtime = main.runtime
+    with mido.open_output(VIRTUAL_PORT_NAME, virtual=True) as port:
+        def send_events():
+            time.sleep(0.1) # Let the runtime open the port
+            start_time = time.monotonic()
+            for t, message in events:
+                delay = start_time + t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                port.send(message)
+            time.sleep(0.1) # Let the runtime drain the port
+            runtime.close()
+
+        start_time = time.perf_counter()
+        threading.Thread(target=send_events, daemon=True).start()
+        try:
+            asyncio.run(runtime.run(VIRTUAL_PORT_NAME))
+        finally:
+            main.runtime = None
+        elapsed = time.perf_counter() - start_time
+    main.leds.flush()
+
+    report = {
+        "messages": len(events),
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(len(events) / elapsed, 1),
+        "ui_actions": len(main.ui.actions),
+        "ui_actions_per_message": round(len(main.ui.actions) / len(events), 3),
+        "led_messages": main.leds.sent,
+        "queue": runtime.queue.stats(),
+    }
+    if runtime.capture is not None:
+        report["capture"] = runtime.capture.stats()
+    return report
+
+def run_workload(name: str, speed: float, action_delay: float, virtual: bool) -> dict:
+    """Run one workload and measure it.
+
+    Args:
+        name (str): Workload name, see WORKLOADS.
+        speed (float): Replay speed: 1 for real time, 0 for as fast as possible.
+        action_delay (float): Seconds each fake UI action takes.
+        virtual (bool): Whether to send the events through a virtual MIDI port.
+
+    Returns:
+        dict: Messages per second, UI actions per message and worst-case handler latency.
+    """
+    events = WORKLOADS[name]()
+    metrics.reset()
+    metrics.set_enabled(True)
+    report = replay_virtual(events, action_delay) if virtual else session.replay(events, speed=speed, action_delay=action_delay)
+    metrics.set_enabled(False)
+
+    worst = {stage: max((histogram.max for (handler, hist_stage), histogram in metrics.snapshot().items() if hist_stage == stage and handler in ("pitch", "jog", "button")), default=0) for stage in ("handler", "total")}
+    return {
+        "messages_per_second": report["messages_per_second"],
+        "ui_actions_per_message": report["ui_actions_per_message"],
+        "worst_handler_latency_ms": round(worst["handler"] * 1000, 3),
+        "worst_total_latency_ms": round(worst["total"] * 1000, 3),
+        "coalesced": report["queue"]["coalesced"],
+        "dropped": report["queue"]["dropped"],
+    }
+
+TREE_SIZES = [100, 1000, 10000, 50000]
+
+def tree_scaling(sizes: list = TREE_SIZES, depth: int = 6, placement: str = "end", repeat: int = 10) -> dict:
+    """Measure slider lookup, click-by-description and value reads in simulated Photos windows of growing size,
+    by linear scan (like the AppleScript walks in utils.py) and through the element index.
+
+    Args:
+        sizes (list, optional): Numbers of elements in the window. Defaults to TREE_SIZES.
+        depth (int, optional): Nesting depth of filler elements. Defaults to 6.
+        placement (str, optional): Where the adjustments are in document order. Defaults to "end".
+        repeat (int, optional): Repetitions of each operation. Defaults to 10.
+
+    Returns:
+        dict: Per size: elements visited and microseconds per operation, for each operation and lookup path.
+    """
+    names = ax_tree.PHOTOS_ADJUSTMENTS["Light"]
+    operations = {
+        "find_sliders": lambda query: query.find_sliders(names),
+        "click": lambda query: query.click("button", "Edit"),
+        "read_values": lambda query: query.read_values(names[:1]),
+    }
+
+    results = {}
+    for size in sizes:
+        source = ax_tree.SimulatedPhotosSource(size=size, depth=depth, placement=placement)
+        query = ax_tree.AccessibilityQuery(source)
+        result = {}
+        for path in ("linear", "indexed"):
+            if path == "indexed":
+                source.visited = 0
+                start_time = time.perf_counter()
+                query.build_index()
+                result["build_index"] = {"visited": source.visited, "us": round((time.perf_counter() - start_time) * 1e6, 1)}
+            for name, operation in operations.items():
+                source.visited = 0
+                start_time = time.perf_counter()
+                for i in range(0, repeat):
+                    operation(query)
+                result[f"{name}_{path}"] = {"visited": source.visited // repeat, "us": round((time.perf_counter() - start_time) * 1e6 / repeat, 1)}
+        results[source.size] = result
+    return results
+
+def script_calls(calls: int = 10000) -> list:
+    """Template calls of a typical session: mostly slider values set by the accessibility backend,
+    with photo navigation, resyncs and photo identity queries in between.
+
+    Args:
+        calls (int, optional): Number of calls. Defaults to 10000.
+
+    Returns:
+        list: (template name, arguments) per call.
+    """
+    names = ax_tree.PHOTOS_ADJUSTMENTS["Light"]
+    mix = [("set_slider_value", (names[i % len(names)], round(i / 16 - 0.5, 3), "Light")) for i in range(0, 16)]
+    mix += [("key_code", (124,)), ("photo_id", ()), ("slider_attributes", tuple(names)), ("read_elements", ("3.1.1.1.5.1.2",))]
+    return [mix[i % len(mix)] for i in range(0, calls)]
+
+def script_cache(calls: int = 10000, capacity: int = SCRIPT_CACHE_SIZE) -> dict:
+    """Compiles and hit rate of the script template cache over a typical session, in process
+    and on a worker pool, with a fake compiler (runs off macOS).
+
+    Args:
+        calls (int, optional): Number of template calls. Defaults to 10000.
+        capacity (int, optional): Compiled templates kept per process. Defaults to SCRIPT_CACHE_SIZE.
+
+    Returns:
+        dict: Stats of the in-process registry and of the pool, and compiles without the cache (one per call).
+    """
+    workload = script_calls(calls)
+
+    registry = ScriptRegistry(FakeCompiler(), capacity=capacity)
+    start_time = time.perf_counter()
+    for name, args in workload:
+        registry.run(name, args)
+    in_process = dict(registry.stats(), us_per_call=round((time.perf_counter() - start_time) * 1e6 / calls, 2))
+
+    pool = ScriptPool(size=APPLESCRIPT_POOL_SIZE, executor="echo")
+    start_time = time.perf_counter()
+    for name, args in workload:
+        pool.run_template(name, args)
+    on_pool = dict(pool.template_stats(), us_per_call=round((time.perf_counter() - start_time) * 1e6 / calls, 2))
+    pool.close()
+
+    return {"compiles_without_cache": calls, "in_process": in_process, "pool": on_pool}
+
+def compare(results: dict, baseline: dict) -> None:
+    """Print changes of more than REGRESSION_THRESHOLD against the baseline.
+
+    Args:
+        results (dict): Results per workload.
+        baseline (dict): Baseline results per workload.
+    """
+    for name, result in results.items():
+        for key, value in result.items():
+            base = baseline.get(name, {}).get(key)
+            if not base:
+                continue
+            change = (value - base) / base
+            if abs(change) > REGRESSION_THRESHOLD:
+                print(f"{name}.{key}: {base} -> {value} ({change:+.0%})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MIDI-to-action pipeline headless.")
+    parser.add_argument("--save", action="store_true", help=f"Save results as the new baseline ({BASELINE_PATH})")
+    parser.add_argument("--fast", action="store_true", help="Feed events as fast as possible instead of in real time")
+    parser.add_argument("--virtual", action="store_true", help="Send events through a virtual MIDI port (needs python-rtmidi)")
+    parser.add_argument("--action-delay", type=float, default=0.005, help="Seconds each fake UI action takes (default: 0.005)")
+    parser.add_argument("--tree", action="store_true", help="Benchmark element lookups by size of a simulated Photos window instead")
+    parser.add_argument("--placement", default="end", choices=["start", "middle", "end"], help="--tree: where the sliders are in the window (default: end)")
+    parser.add_argument("--scripts", action="store_true", help="Benchmark the compiled AppleScript template cache with a fake compiler instead")
+    args = parser.parse_args()
+
+    if args.scripts:
+        for name, result in script_cache().items():
+            print(f"{name}: {result}")
+        return
+
+    if args.tree:
+        for size, result in tree_scaling(placement=args.placement).items():
+            print(f"{size} elements:")
+            for name, measure in result.items():
+                print(f"    {name}: {measure['visited']} elements visited, {measure['us']} us")
+        return
+
+    results = {}
+    for name in WORKLOADS:
+        results[name] = run_workload(name, speed=0 if args.fast else 1, action_delay=args.action_delay, virtual=args.virtual)
+        print(f"{name}: {results[name]}")
+
+    if args.save:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Saved baseline to {BASELINE_PATH}")
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
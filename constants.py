@@ -3,38 +3,105 @@
 # Ian Webster
 # Dec 2022
 
+import os
+
 DIAGNOSTIC_MODE = 0
 
-CONTROLLER_NAME = 'SAMSON Graphite MF8'
+# Device profile of the controller: profiles/<name>.json (see profiles.py)
+DEVICE_PROFILE = "mf8"
 
 # Define Samson Graphite MF8 Slider Ranges - TODO FUTURE: implement calibration/midi learn feature
 HW_SLIDER_MAX = 8191
 HW_SLIDER_MIN = -8192
 HW_SLIDER_RANGE = HW_SLIDER_MAX - HW_SLIDER_MIN
 
-SAMPLE_PERIOD = 16 # sample every 16th event for all midi events
+SAMPLE_PERIOD = 16 # coarsest sampling: 16 steps over the slider range
 QUANTIZE_MOD = HW_SLIDER_RANGE / SAMPLE_PERIOD * 2 
 SW_NUM_STEPS_SLIDER = (100 * 2) # TODO FUTURE: get steps programmatically using applescript to extract range of slider
 FINE_GRAIN_DELTA = (HW_SLIDER_RANGE + 1) / SW_NUM_STEPS_SLIDER
 
+# Adaptive slider sampling (see sampler.py)
+SAMPLER_MAX_RATE = 60 # Max UI updates per second per slider
+SAMPLER_FINE_STEP = FINE_GRAIN_DELTA # HW step when moving a fader slowly (1 SW step)
+SAMPLER_FAST_VELOCITY = HW_SLIDER_RANGE # HW units per second at which steps are QUANTIZE_MOD (full travel in 1s)
+SAMPLER_SETTLE_TIME = 0.05 # seconds without input before the final resting value is delivered
+
+# Fader gestures (see gesture.py)
+GESTURE_IDLE_TIMEOUT = 0.15 # seconds without fader moves before the mouse is released
+
+# Jog wheel (see jog.py)
+JOG_WINDOW = 0.03 # seconds jog ticks are accumulated into one slider move
+JOG_ACCELERATION = [(0, 1), (40, 2), (80, 4), (160, 8)] # (ticks per second, FINE_GRAIN_DELTA steps per tick)
+
 # SW
 Y_OFFSET_SLIDER = 2
+ADJUSTMENTS_PATH = 'scroll area 1 of group 1 of group 1 of splitter group 1 of window 1' # AppleScript path of the adjustment groups (Light, Color, ...) in Photos edit pane
+LIGHT_GROUP_PATH = f'group 1 of group "Light" of {ADJUSTMENTS_PATH}' # AppleScript path of Light sliders in Photos edit pane
+QUERY_SLIDERS_ATTEMPTS = 3 # slider queries (opening the Edit pane in between) before giving up
 
-# Loading LEDs
-NUM_LOADING_LEDS = 5
+# Slider layout cache for warm startup (None = always discover sliders)
+LAYOUT_CACHE_PATH = os.path.expanduser("~/.midi-photos-layout.json")
+
+# UI backend used by message handlers: "pyautogui" (simulated mouse drags), "accessibility" (set slider values directly) or "fake" (in-memory, headless)
+UI_BACKEND = "pyautogui"
+
+# LED output (see leds.py); loading LEDs are in the device profile
+LED_MAX_MESSAGES_PER_SECOND = 500
+LED_BATCH_SIZE = 16
 
 # Store last 2 values for slider buffer
 SLIDER_BUFFER_SIZE = 2 
 
-# Button mapping to applescript commands (run under System Events)
-midi_note_to_applescript = {
-    1: 'keystroke "e" using {command down}', # rec button on slider 2 -> Apply preset edits
-    2: 'keystroke "e" using {command down}', # rec button on slider 3 -> Apply preset edits (but no set_init_slider_positions after)
-    0: 'key code 36', # Rec button on slider 1 -> Open/close editor pane (key code 36 == enter)
-    46: 'key code 123', # Left button -> prev photo (key code 123 == left arrow)
-    91: 'key code 123', # RW button
-    47: 'key code 124', # Right button -> prev photo (key code 124 == right arrow)
-    92: 'key code 124', # FF button
-    # 93: 'keystroke "-" using {command down}', # Zoom in button
-    # 94: 'keystroke "=" using {command down}', # Zoom out button
+# Undo/redo of slider edits (see slider_state.py)
+SLIDER_UNDO_DEPTH = 16 # committed values kept per slider
+SLIDER_COMMIT_TIME = 0.5 # seconds a slider must be left alone before its value is committed to the undo history
+
+# Event queue between MIDI input and UI automation
+EVENT_QUEUE_MAX_PENDING = 256 # Max pending messages before dropping, other than notes (never dropped); pitch messages and jog ticks are coalesced
+EVENT_QUEUE_POLL_PERIOD = 0.05 # seconds the consumer waits for an event before doing idle work
+EVENT_STATS_PERIOD = 5 # seconds between queue counter reports in DIAGNOSTIC_MODE
+
+# MIDI capture: "callback" (mido callback thread in this process) or "process" (dedicated capture process
+# writing into a shared-memory ring buffer, see midi_capture.py)
+MIDI_CAPTURE_MODE = "callback"
+MIDI_CAPTURE_CAPACITY = 4096 # Records in the ring buffer; messages are dropped (and counted) when it is full
+MIDI_CAPTURE_BATCH = 256 # Max records read from the ring at once
+MIDI_CAPTURE_POLL_PERIOD = 0.001 # seconds the reader sleeps when the ring is empty
+
+# Latency instrumentation (see metrics.py). Toggle at runtime with SIGUSR1, dump with SIGUSR2.
+METRICS_ENABLED = 0
+METRICS_DUMP_PATH = os.path.expanduser("~/midi-photos-metrics.prom") # ".csv" for CSV, Prometheus text format otherwise
+
+# Path to record received MIDI messages to, for replay with session.py (None = don't record)
+RECORD_SESSION_PATH = None
+
+# AppleScript worker pool
+APPLESCRIPT_POOL_SIZE = 2 # Warm worker processes (0 = start a new osascript process per call)
+APPLESCRIPT_EXECUTOR = "nsapplescript" # "nsapplescript" (compiled in pool workers, needs PyObjC; osascript without the pool), "osascript" or "echo" (stand-in for testing)
+APPLESCRIPT_TIMEOUT = 10 # seconds before a worker is restarted
+SCRIPT_CACHE_SIZE = 32 # Compiled AppleScript templates kept per process (see script_registry.py)
+
+# Slider values of the last N photos visited (see photo_cache.py)
+PHOTO_CACHE_SIZE = 64
+
+# Batch edits (see batch.py)
+BATCH_READY_TIMEOUT = 10 # seconds to wait for the next photo to load before giving up
+BATCH_POLL_PERIOD = 0.05 # seconds between readiness polls of the Photos UI
+NAVIGATION_READY_TIMEOUT = 2 # seconds to wait for the photo navigated to with a button to load (no new photo: e.g. last photo of the library)
+
+# Photos actions of buttons -> (script template, arguments...) keystroke sent with System Events, see script_registry.py.
+# Buttons are mapped to actions in device profiles.
+action_to_script = {
+    "toggle_editor": ("key_code", 36), # Open/close editor pane (key code 36 == enter)
+    "apply_preset": ("command_keystroke", "e"), # Apply preset edits
+    "apply_preset_and_resync": ("command_keystroke", "e"), # Apply preset edits, then resync slider values
+    "prev_photo": ("key_code", 123), # prev photo (key code 123 == left arrow)
+    "next_photo": ("key_code", 124), # next photo (key code 124 == right arrow)
+    "zoom_out": ("command_keystroke", "-"), # not mapped on the MF8
+    "zoom_in": ("command_keystroke", "="), # not mapped on the MF8
 }
+
+# Actions followed by a resync of slider values from Photos
+RESYNC_ACTIONS = ["apply_preset_and_resync"]
+# Actions that navigate to another photo (cancel an in-flight resync) -> direction (-1 = prev photo, 1 = next photo)
+NAVIGATION_ACTIONS = {"prev_photo": -1, "next_photo": 1}
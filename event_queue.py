@@ -0,0 +1,169 @@
+# event_queue.py
+# Coalescing event queue between MIDI input and UI automation.
+
+import threading
+from collections import deque
+
+import mido
+
+from constants import *
+
+class JogDelta:
+    """Pending jog ticks of one control, coalesced by the EventQueue into a count per control value
+    (e.g. {1: 12, 65: 3}). Stands in for the control_change messages it replaces: it has their
+    `type`, `channel` and `control`, and the `time` of the latest one. `first_time` is the time of
+    the first one, so the rate of the ticks does not depend on when they are handled.
+    """
+    type = 'control_change'
+    __slots__ = ("channel", "control", "first_time", "time", "ticks")
+
+    def __init__(self, message: mido.Message):
+        self.channel = message.channel
+        self.control = message.control
+        self.first_time = message.time
+        self.time = message.time
+        self.ticks = {message.value: 1}
+
+    @property
+    def span(self) -> float:
+        """Seconds between the receive times of the first and the latest tick.
+        """
+        return max(self.time - self.first_time, 0)
+
+    def add(self, message: mido.Message) -> None:
+        self.ticks[message.value] = self.ticks.get(message.value, 0) + 1
+        self.time = message.time
+
+    def __repr__(self) -> str:
+        return f"jog_delta channel={self.channel} control={self.control} ticks={self.ticks}"
+
+class EventQueue:
+    """Thread-safe queue of MIDI messages between the MIDI producer and the UI consumer.
+
+    Pending pitch messages are coalesced per channel (latest value wins), so a fast fader
+    sweep never builds a backlog of stale slider targets. Pending ticks of the jog wheel are
+    coalesced into a JogDelta per control, counted by direction. All other messages are delivered
+    in arrival order: notes (buttons) are never dropped, other messages up to `max_pending` of them.
+    Notes are barriers: messages after a note (which may select another slider or bank) are never
+    coalesced into messages before it.
+    """
+    def __init__(self, max_pending: int = EVENT_QUEUE_MAX_PENDING, jog_control: int = None):
+        """Initialize EventQueue class.
+
+        Args:
+            max_pending (int, optional): Max number of pending messages other than notes. Defaults to EVENT_QUEUE_MAX_PENDING.
+            jog_control (int, optional): Control number of the jog wheel, see profiles.DeviceProfile. Defaults to None (no jog wheel).
+        """
+        self._cond = threading.Condition()
+        self._order = deque() # Pitch slots ([latest message]), JogDeltas or other messages, in arrival order
+        self._pitch = {} # Pitch slot per channel, since the last note
+        self._jog = {} # Pending JogDelta per (channel, control), since the last note
+        self._max_pending = max_pending
+        self._jog_control = jog_control
+        self._closed = False
+
+        # Counters
+        self.received = 0
+        self.delivered = 0
+        self.coalesced = 0 # Pitch messages replaced by a newer one for the same channel, and jog ticks added to a pending JogDelta
+        self.dropped = 0 # Messages other than notes dropped because the queue was full
+
+    def _put(self, message: mido.Message) -> None:
+        self.received += 1
+        if message.type == 'pitchwheel':
+            if message.channel in self._pitch:
+                # Latest value wins: keep the position in line, replace the stale target.
+                self._pitch[message.channel][0] = message
+                self.coalesced += 1
+                return
+            self._pitch[message.channel] = [message]
+            self._order.append(self._pitch[message.channel])
+        elif message.type == 'control_change' and message.control == self._jog_control:
+            key = (message.channel, message.control)
+            if key in self._jog:
+                self._jog[key].add(message)
+                self.coalesced += 1
+                return
+            self._jog[key] = JogDelta(message)
+            self._order.append(self._jog[key])
+        elif message.type in ('note_on', 'note_off'):
+            # Barrier: later pitch values and jog ticks (e.g. of another slider or bank) are not merged into slots before the note
+            self._order.append(message)
+            self._pitch.clear()
+            self._jog.clear()
+        elif len(self._order) < self._max_pending:
+            self._order.append(message)
+        else:
+            self.dropped += 1
+
+    def put(self, message: mido.Message) -> None:
+        """Add a message to the queue.
+
+        Args:
+            message (mido.Message): Message from controller.
+        """
+        with self._cond:
+            self._put(message)
+            self._cond.notify()
+
+    def put_many(self, messages: list) -> None:
+        """Add a batch of messages to the queue, in order, waking the consumer once.
+
+        Args:
+            messages (list): Messages from controller (mido.Message).
+        """
+        with self._cond:
+            for message in messages:
+                self._put(message)
+            self._cond.notify()
+
+    def get(self, timeout: float = None) -> mido.Message:
+        """Get the next message, blocking until one is available.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a message. Defaults to None (wait forever).
+
+        Returns:
+            mido.Message: Next message (or JogDelta), or None on timeout or if the queue is closed and empty.
+        """
+        with self._cond:
+            if not self._order and not self._closed:
+                self._cond.wait(timeout)
+            if not self._order:
+                return None
+            item = self._order.popleft()
+            if isinstance(item, list): # Pitch slot
+                slot, item = item, item[0]
+                if self._pitch.get(item.channel) is slot:
+                    del self._pitch[item.channel]
+            elif isinstance(item, JogDelta):
+                if self._jog.get((item.channel, item.control)) is item:
+                    del self._jog[(item.channel, item.control)]
+            self.delivered += 1
+            return item
+
+    def close(self) -> None:
+        """Close the queue. Pending messages can still be drained with `get`.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed and not self._order
+
+    def stats(self) -> dict:
+        """Get a snapshot of the queue counters.
+
+        Returns:
+            dict: Counters for received, delivered, coalesced, dropped and pending messages.
+        """
+        with self._cond:
+            return {
+                "received": self.received,
+                "delivered": self.delivered,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "pending": len(self._order),
+            }
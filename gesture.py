@@ -0,0 +1,62 @@
+# gesture.py
+# Gesture-level mouse sessions: the mouse is pressed once per fader gesture, and released when the fader goes idle.
+
+from constants import *
+
+class GestureEngine:
+    """Turns the slider moves of a fader gesture into one press, plain moves while held, and one release.
+    Photos only re-renders the edit on release, instead of on every sample.
+
+    A gesture ends after `idle_timeout` seconds without moves (see `idle`), when another slider is touched,
+    or when another UI action needs the mouse (see `release`).
+    """
+    def __init__(self, ui, idle_timeout: float = GESTURE_IDLE_TIMEOUT):
+        """Initialize GestureEngine class.
+
+        Args:
+            ui (ui_backend.UIBackend): UI backend.
+            idle_timeout (float, optional): Seconds without moves before the mouse is released. Defaults to GESTURE_IDLE_TIMEOUT.
+        """
+        self._ui = ui
+        self.idle_timeout = idle_timeout
+        self.channel = None # Slider held, or None
+        self._last_move_time = None
+        self.gestures = 0
+
+    @property
+    def active(self) -> bool:
+        return self.channel is not None
+
+    def move(self, channel: int, hw_value: float, now: float) -> None:
+        """Move a slider within a gesture: press on the first move, move while held.
+
+        Args:
+            channel (int): Slider channel.
+            hw_value (float): HW slider value.
+            now (float): Current time in seconds (time.monotonic()).
+        """
+        if self.channel is not None and self.channel != channel: # Touched another slider
+            self.release()
+        if self.channel is None:
+            self._ui.press_slider(channel, hw_value)
+            self.channel = channel
+            self.gestures += 1
+        else:
+            self._ui.move_pressed_slider(channel, hw_value)
+        self._last_move_time = now
+
+    def idle(self, now: float) -> None:
+        """End the gesture if the slider was not moved for `idle_timeout` seconds.
+
+        Args:
+            now (float): Current time in seconds (time.monotonic()).
+        """
+        if self.channel is not None and now - self._last_move_time >= self.idle_timeout:
+            self.release()
+
+    def release(self) -> None:
+        """End the gesture now, if any.
+        """
+        if self.channel is not None:
+            self._ui.release_slider(self.channel)
+            self.channel = None
@@ -0,0 +1,82 @@
+# jog.py
+# Accumulation of jog wheel ticks over a short time window, turned into one relative slider move with acceleration.
+
+from constants import *
+
+class JogAccumulator:
+    """Accumulates jog ticks of the active slider over `window` seconds, then delivers them as a number of
+    fine grain steps (FINE_GRAIN_DELTA each): the net ticks times the multiplier of the acceleration `curve`
+    at the tick rate of the window. A single tick is always exactly one step.
+    """
+    def __init__(self, window: float = JOG_WINDOW, curve: list = JOG_ACCELERATION):
+        """Initialize JogAccumulator class.
+
+        Args:
+            window (float, optional): Seconds ticks are accumulated before they are delivered. Defaults to JOG_WINDOW.
+            curve (list, optional): (ticks per second, steps per tick) points, by increasing rate. Defaults to JOG_ACCELERATION.
+        """
+        self.window = window
+        self.curve = sorted(curve)
+        self._channel = None
+        self._start_time = None
+        self._last_time = None
+        self._ticks = 0 # All ticks in the window
+        self._net = 0 # Ticks in the window, signed by direction
+
+    @property
+    def pending(self) -> bool:
+        return self._ticks > 0
+
+    def multiplier(self, rate: float) -> int:
+        """Get the steps per tick of the acceleration curve at a tick rate.
+        """
+        steps = 1
+        for curve_rate, curve_steps in self.curve:
+            if rate < curve_rate:
+                break
+            steps = curve_steps
+        return steps
+
+    def tick(self, channel: int, direction: int, now: float, count: int = 1, span: float = 0) -> list:
+        """Accumulate jog ticks.
+
+        Args:
+            channel (int): Slider channel the jog wheel adjusts.
+            direction (int): 1 for right (CW), -1 for left (CCW).
+            now (float): Current time in seconds (time.monotonic()).
+            count (int, optional): Ticks in this direction, e.g. coalesced by the event queue. Defaults to 1.
+            span (float, optional): Seconds over which the `count` ticks were received, up to `now`. Defaults to 0.
+
+        Returns:
+            list: (channel, steps) moves to apply now: ticks of another slider, or of a window that ended.
+        """
+        moves = []
+        if self.pending and channel != self._channel: # Slider changed: deliver ticks of the previous one
+            moves += self.flush(float('inf'))
+        if not self.pending:
+            self._channel = channel
+            self._start_time = now - span
+        self._last_time = now
+        self._ticks += count
+        self._net += direction * count
+        return moves + self.flush(now)
+
+    def flush(self, now: float) -> list:
+        """Deliver accumulated ticks if their window ended.
+
+        Args:
+            now (float): Current time in seconds (time.monotonic()), or inf to deliver now.
+
+        Returns:
+            list: (channel, steps) moves to apply, empty if nothing to deliver.
+        """
+        if not self.pending or now - self._start_time < self.window:
+            return []
+        if self._ticks == 1:
+            steps = self._net # Fine adjustment: exactly one step
+        else:
+            steps = self._net * self.multiplier(self._ticks / max(self._last_time - self._start_time, self.window))
+        moves = [(self._channel, steps)] if steps != 0 else []
+        self._ticks = 0
+        self._net = 0
+        return moves
@@ -0,0 +1,67 @@
+# layout_cache.py
+# On-disk cache of the Photos slider layout, for warm startup.
+
+import json
+import os
+
+def layout_key(probe: dict) -> dict:
+    """Get the cache key of a layout probe: Photos version, screen and window geometry.
+
+    Args:
+        probe (dict): Layout probe. See utils.get_applescript_layout_probe.
+
+    Returns:
+        dict: Cache key.
+    """
+    return {
+        "photos_version": probe["photos_version"],
+        "screen": list(probe["screen"]),
+        "window": list(probe["window"]),
+    }
+
+def load_layout(path: str, probe: dict) -> dict:
+    """Load the cached slider layout if it is still valid for the current Photos layout.
+    The cache is valid if the key matches and the probed slider is where the cache says it is.
+
+    Args:
+        path (str): Path of cache file.
+        probe (dict): Layout probe, or None if the probe failed.
+
+    Returns:
+        dict: Cached layout with "slider_coords" and "slider_size", or None on a cache miss.
+    """
+    if path is None or probe is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            layout = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if layout.get("key") != layout_key(probe):
+        return None
+    if list(layout["slider_coords"][0]) != list(probe["slider_position"]):
+        return None
+    return layout
+
+def save_layout(path: str, probe: dict, slider_coords: list, slider_size: tuple) -> None:
+    """Save the slider layout found by full discovery.
+
+    Args:
+        path (str): Path of cache file.
+        probe (dict): Layout probe, or None if the probe failed (nothing is saved).
+        slider_coords (list): Leftmost (x, y) UI coordinates of each slider.
+        slider_size (tuple): (width, height) of the sliders.
+    """
+    if path is None or probe is None:
+        return
+    layout = {
+        "key": layout_key(probe),
+        "slider_coords": [list(coords) for coords in slider_coords],
+        "slider_size": list(slider_size),
+    }
+    try:
+        with open(path, "w") as f:
+            json.dump(layout, f)
+    except OSError as e:
+        print(f"Could not save slider layout cache {path}: {e}")
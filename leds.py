@@ -0,0 +1,101 @@
+# leds.py
+# LED framebuffer of the controller, sent as diffs from a dedicated, rate-limited output thread.
+
+import threading
+import time
+
+import mido
+
+import metrics
+from constants import *
+
+class LedFramebuffer:
+    """Model of the controller's light state (note -> velocity).
+    Handlers only change the model; a dedicated output thread sends the notes whose state differs from what
+    the controller shows, in batches of up to `batch_size`, at most `max_rate` messages per second.
+    """
+    def __init__(self, port, max_rate: float = LED_MAX_MESSAGES_PER_SECOND, batch_size: int = LED_BATCH_SIZE):
+        """Initialize LedFramebuffer class.
+
+        Args:
+            port (mido.ports.BaseOutput): Controller output port.
+            max_rate (float, optional): Max LED messages per second. Defaults to LED_MAX_MESSAGES_PER_SECOND.
+            batch_size (int, optional): Max LED messages sent per batch. Defaults to LED_BATCH_SIZE.
+        """
+        self._port = port
+        self._max_rate = max_rate
+        self._batch_size = batch_size
+        self._cond = threading.Condition()
+        self._desired = {}
+        self._shown = {} # Unknown until sent: the first state of every LED is always sent
+        self._dirty = {} # Notes changed since last sent, in order of change (dict used as ordered set)
+        self._sending = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="led-output", daemon=True)
+        self.sent = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def set(self, note: int, velocity: int) -> None:
+        """Set the desired state of a LED.
+
+        Args:
+            note (int): MIDI note of the LED.
+            velocity (int): 127 for on, 0 for off.
+        """
+        with self._cond:
+            self._desired[note] = velocity
+            self._dirty[note] = None
+            self._cond.notify_all()
+
+    def get(self, note: int) -> int:
+        """Get the desired state of a LED.
+        """
+        return self._desired.get(note, 0)
+
+    def flush(self, timeout: float = 1) -> None:
+        """Wait until the controller shows the desired state.
+
+        Args:
+            timeout (float, optional): Max seconds to wait. Defaults to 1.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: not self._dirty and not self._sending, timeout)
+
+    def close(self) -> None:
+        """Send pending changes and stop the output thread.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or self._closed)
+                if not self._dirty:
+                    return
+                batch = []
+                for note in list(self._dirty)[:self._batch_size]:
+                    del self._dirty[note]
+                    if self._shown.get(note) != self._desired[note]:
+                        self._shown[note] = self._desired[note]
+                        batch.append(mido.Message("note_on", note=note, velocity=self._desired[note]))
+                self._sending = True
+
+            started = metrics.now() if metrics.enabled else 0
+            for message in batch:
+                self._port.send(message)
+            if metrics.enabled and started and batch:
+                metrics.observe("led", "send", (metrics.now() - started) / len(batch))
+            self.sent += len(batch)
+
+            with self._cond:
+                self._sending = False
+                self._cond.notify_all()
+
+            # Rate cap
+            if batch:
+                time.sleep(len(batch) / self._max_rate)
@@ -8,25 +8,40 @@ Dec 2022
 # Note: this is not an object-oriented approach, but rather a functional approach. 
 # It is assumed that only ONE controller is connected to the computer at a time, to ONE instance of Photos.
 
-import applescript
+import asyncio
+import time
+
 import mido
-import pyautogui
 
+import metrics
+from batch import wait_for_photo_id
 from constants import *
+from event_queue import JogDelta
+from gesture import GestureEngine
+from jog import JogAccumulator
+from layout_cache import load_layout, save_layout
+from applescript_pool import ScriptResult
+from leds import LedFramebuffer
+from photo_cache import PhotoCache
+from profiles import IGNORED, compile_profile, load_profile
+from runtime import AsyncRuntime
+from sampler import AdaptiveSampler
+from session import SessionRecorder
+from slider_map import update_slider_maps
+from slider_state import SliderState
+from startup import StartupTimer
+from ui_backend import make_backend
 from utils import *
 
 # Globals
-CONST_SCALE = None
-X_OFFSET_SLIDER_MIDDLE = None
-
 outport = None
-slider_channel = 0
-last_channel = None
-
-# Enumeration where RIGHT = 1, LEFT = -1
-class JogDirection:
-    RIGHT = 1
-    LEFT = -1
+leds = None # LED framebuffer, see leds.py
+ui = None # UI backend, see ui_backend.py
+gesture = None # Mouse press held across a fader gesture, see gesture.py
+runtime = None # Event runtime, live or replaying a session, see runtime.py
+profile = None # Device profile of the controller, see profiles.py
+dispatch = None # Dispatch table compiled from the device profile
+startup = None # Timing of startup stages, see startup.py
 
 # Summary of Basic light sliders in Photos app according to AppleScript descriptions:
 
@@ -38,16 +53,16 @@ class JogDirection:
 # Contrast: slider "Adjust the difference between light and dark tones" of group 1 of group "Light" of scroll area 1 of group 1 of group 1 of splitter group 1 of window 1 of application process "Photos" of application "System Events"
 # Black Point: slider "Adjust the darkest tonal area of the image " of group 1 of group "Light" of scroll area 1 of group 1 of group 1 of splitter group 1 of window 1 of application process "Photos" of application "System Events"
 
-# Accessibility descriptions of sliders referenced with AppleScript
-# slider_ids = [
-#     "Adjust the properties of Light locally across this image",
-#     "Adjust the overall lightness of the image",
-#     "Increase or decrease detail by darkening highlights",
-#     "Increase or decrease detail by lightening shadows",
-#     "Lighten or darken the mid tones",
-#     "Adjust the difference between light and dark tones",
-#     "Adjust the darkest tonal area of the image ",
-# ]
+# Accessibility descriptions of sliders referenced with AppleScript (used by the accessibility UI backend)
+slider_ids = [
+    "Adjust the properties of Light locally across this image",
+    "Adjust the overall lightness of the image",
+    "Increase or decrease detail by darkening highlights",
+    "Increase or decrease detail by lightening shadows",
+    "Lighten or darken the mid tones",
+    "Adjust the difference between light and dark tones",
+    "Adjust the darkest tonal area of the image ",
+]
 
 # Map slider name in photos to midi channel name.
 channel_names = [
@@ -60,203 +75,411 @@ channel_names = [
     "Black Point"
 ]
 
-# Slider buffers 
-hw_slider_buffer = [[0] for i in range(len(channel_names))] # Buffer 
+# Banks of sliders mapped to the faders: adjustment group of the Photos app -> slider descriptions (see init_banks).
+# The faders edit the sliders of `current_bank`: `channel_names` holds its sliders, and may be shorter than the faders.
+banks = None
+current_bank = "Light"
+
+# Slider state: active slider, recent HW values and undo history per slider
+slider_state = SliderState(len(channel_names))
 
 # UI coordinates of sliders in photos.
 slider_coords = [(None, None) for i in range(0, len(channel_names))]
 
+# Position, size and value of sliders in photos, from the last batched query.
+slider_info = {}
+
+# Precomputed HW slider value -> UI target lookup tables, per slider (None until resolved). Rebuilt when slider geometry changes.
+slider_maps = []
+
+# Startup state: faders of resolved sliders are accepted before slider values are synced; other controls wait for the sync.
+slider_resolved = [False for i in range(0, len(channel_names))]
+sliders_synced = False
+pending_faders = {} # channel -> last HW value of faders moved before their slider was resolved
+
+# Last UI target (pixel or slider value) sent to each slider.
+slider_targets = [None for i in range(0, len(channel_names))]
+
+# Adaptive sampling of slider values sent to the UI.
+sampler = AdaptiveSampler(len(channel_names))
+
+# Jog ticks accumulated into relative slider moves.
+jog = JogAccumulator()
+
+# Slider values per photo, and the photo open in the Photos app.
+photo_cache = PhotoCache()
+current_photo_id = None
+
 def main():
     """Main function to run program.
+    Startup runs in stages that overlap: MIDI I/O and LEDs are set up alongside discovery of the Photos app,
+    and faders are accepted as soon as their slider is resolved.
     """
-    global slider_channel
-    global last_channel
+    global startup
+
+    startup = StartupTimer()
+    metrics.install_signal_handlers(METRICS_DUMP_PATH)
+    with startup.stage("profile"):
+        init_profile(DEVICE_PROFILE)
+    init_runtime()
+
+    # Intialize Controller with Photos app data, while MIDI I/O starts
+    io_thread = startup.start_stage("midi_io", init_midi_io)
+    startup.start_stage("photos", discover_photos)
+    io_thread.join()
+    if startup.error is not None:
+        raise startup.error
+
+    # Start receiving MIDI events and translate to UI actions
+    event_handler_loop()
+    if startup.error is not None:
+        raise startup.error
+    return
 
-    # Intialize Controller with Photos app data
+def init_midi_io() -> None:
+    """Startup stage: open MIDI ports and initialize LEDs.
+    """
     init_io()
     init_leds()
-    get_init_slider_positions()
-    set_slider_constants()
-
-    slider_channel = 0
-    last_channel = None
-    set_init_slider_positions()
 
-    # Start receiving MIDI events and translate to pyautogui actions
-    event_handler_loop()
-    return
+def discover_photos() -> None:
+    """Startup stage: connect to the Photos app, resolve the sliders and sync their values.
+    Stops the runtime if the Photos app can't be found.
+    """
+    global current_photo_id
+
+    try:
+        with startup.stage("script_pool"):
+            start_script_pool(APPLESCRIPT_POOL_SIZE, APPLESCRIPT_EXECUTOR)
+        with startup.stage("ui_backend"):
+            init_ui_backend(UI_BACKEND)
+        with startup.stage("slider_layout"):
+            init_slider_layout()
+        with startup.stage("slider_values"):
+            current_photo_id = ui.photo_id()
+            sliders = slider_info if all("value" in slider_info.get(name, {}) for name in channel_names) else read_slider_values()
+            run_on_ui(apply_slider_values, sliders)
+        startup.mark("ready")
+        with startup.stage("bank_index"):
+            init_banks()
+    except Exception:
+        if runtime is not None:
+            runtime.close() # Stop the event loop
+        raise
+    finally:
+        print(startup.report())
 
 
 ### Main Event Handler Loop
 
+def init_runtime() -> None:
+    """Create the event runtime, so startup stages can run work on its UI thread before it runs.
+    """
+    global runtime
+
+    runtime = AsyncRuntime(
+        handle_message=handle_message,
+        handle_idle=handle_idle,
+        handle_close=handle_close,
+        run_script=run_button_script,
+        query_sliders=query_sliders,
+        apply_sliders=apply_slider_values,
+        wait_for_photo=wait_for_photo,
+        land_on_photo=land_on_photo,
+        bank_snapshot=bank_snapshot,
+        slider_rates=lambda: sampler.rates(time.monotonic()),
+        resync_notes=profile.resync_notes,
+        navigation_notes=profile.navigation_notes,
+        jog_control=profile.jog_control,
+    )
+
+def run_on_ui(func, *args):
+    """Run a function on the UI thread of the runtime (directly if there is no runtime), and wait for its result.
+    """
+    if runtime is None:
+        return func(*args)
+    return runtime.run_on_ui(func, *args).result()
+
 def event_handler_loop() -> None:
     """Main event handler loop to handle midi events from controller.
+    MIDI input is bridged into an asyncio runtime through a coalescing event queue, so that
+    slow UI automation never builds a backlog of stale slider targets, and slow AppleScript
+    calls run as cancellable tasks that never stall slider handling.
     """
-    global outport
-    global slider_channel
-
-    with mido.open_input(CONTROLLER_NAME) as port:
-        for message in port:
-            if DIAGNOSTIC_MODE:
-                print(message)
-
-            # Unused channel
-            if hasattr(message, 'note'):
-                if message.note == 7 or message.note == 15:
-                    continue
-            
-            # Store channel for sliders; ignore jog wheel and buttons.
-            if hasattr(message, 'channel'):
-                # Unused channel
-                if message.channel == 7 or slider_channel == 7:
-                    continue
-
-                if message.type != "control_change" and message.type != "note_on" and message.type != "note_off":
-                    slider_channel = message.channel
-
-            if hasattr(message, 'velocity'):
-                if message.velocity != 0: # Prevent turning off lights
-                    outport.send(message) # Light
-
-            # Slider
-            if hasattr(message, 'pitch'):
-                pitch_handler(message)
-            
-            # Jog wheel
-            if hasattr(message, 'control') and message.control == 60: 
-                jog_handler(message)
-
-            if not hasattr(message, 'note'):
-                continue
-            
-            # Buttons
-            if message.type == "note_on" and message.velocity == 127:
-                button_handler(message)
+    global runtime
+
+    if runtime is None:
+        init_runtime()
+    recorder = SessionRecorder(RECORD_SESSION_PATH) if RECORD_SESSION_PATH is not None else None
+    try:
+        asyncio.run(runtime.run(profile.port, recorder))
+    finally:
+        runtime = None
+        if gesture is not None:
+            gesture.release() # Don't leave the mouse pressed
+
+def handle_idle() -> None:
+    """Idle work between events: deliver final resting values of faders that settled,
+    and fader values received before their slider was resolved.
+    """
+    if gesture is None: # Starting up: the UI backend is not created yet (gesture is created last, see init_ui_backend)
+        return
+    if pending_faders:
+        for channel in [channel for channel in pending_faders if slider_resolved[channel]]:
+            move_slider(channel, pending_faders.pop(channel))
+    if jog.pending:
+        for channel, steps in jog.flush(time.monotonic()):
+            jog_handler_helper(channel, steps)
+    if gesture.active:
+        gesture.idle(time.monotonic())
+    slider_state.commit_settled(time.monotonic(), SLIDER_COMMIT_TIME)
+    if sampler.has_pending:
+        for channel, hw_value in sampler.flush(time.monotonic()):
+            move_slider(channel, hw_value)
+
+def handle_close() -> None:
+    """Input ended: deliver jog ticks and final resting values still pending, and release the mouse.
+    """
+    if gesture is None:
+        return
+    for channel, steps in jog.flush(float('inf')):
+        jog_handler_helper(channel, steps)
+    for channel, hw_value in sampler.flush(float('inf')):
+        move_slider(channel, hw_value)
+    gesture.release()
+
+def handle_message(message: mido.Message) -> None:
+    """Dispatch a single midi event from controller to its handler, through the dispatch table of the device profile.
+
+    Args:
+        message (mido.Message): Message from controller.
+    """
+    # Timestamps for latency metrics (message.time is the receive timestamp set by the producer)
+    dispatched = metrics.now() if metrics.enabled else 0
+
+    if DIAGNOSTIC_MODE:
+        print(message)
+
+    route = dispatch.lookup(message)
+    if route is IGNORED: # Unused control
+        return
+
+    if hasattr(message, 'velocity'):
+        if message.velocity != 0: # Prevent turning off lights
+            leds.set(message.note, message.velocity) # Light
+
+    if route is None:
+        return
+    name, handler = route
+    if name != "pitch":
+        if not sliders_synced: # Starting up: only faders are accepted
+            return
+        gesture.release() # Other controls need the mouse (or keyboard) free
+    started = metrics.now() if metrics.enabled else 0
+    handler(message)
+    if metrics.enabled and dispatched:
+        metrics.observe_event(name, message.time, dispatched, started, metrics.now())
 
 
 ### Message Handlers
 
+def fader_handler(channel: int, message: mido.Message) -> None:
+    """Handle pitch messages of a fader.
+
+    Args:
+        channel (int): Slider channel of the fader.
+        message (mido.Message): Message from controller.
+    """
+    if channel >= len(channel_names): # No slider in this bank
+        return
+    if not slider_resolved[channel]: # Starting up: apply once the slider is resolved
+        pending_faders[channel] = message.pitch
+        return
+    slider_state.channel = channel
+    pitch_handler(message)
+
 def pitch_handler(message: mido.Message) -> None:
     """Handle pitch messages from controller.
 
     Args:
         message (mido.Message): Message from controller.
     """
-    global slider_channel
-    global last_channel
-    global CONST_SCALE
-    global X_OFFSET_SLIDER_MIDDLE
+    # Jog ticks of this slider happened before the fader move
+    for channel, steps in jog.flush(float('inf')):
+        jog_handler_helper(channel, steps)
+
+    # Rate limited, velocity-adaptive sampling
+    channel = slider_state.channel
+    hw_value = sampler.offer(channel, message.pitch, time.monotonic())
+    if hw_value is None:
+        return
+    move_slider(channel, hw_value)
 
-    # Deal with negative slider values
-    neg = False
-    pitch = message.pitch
-    if pitch < 0:
-        pitch *= -1
-        neg = True
+def move_slider(channel: int, hw_value: float) -> None:
+    """Move a slider in the Photos app to a HW slider value.
+
+    Args:
+        channel (int): Slider channel.
+        hw_value (float): HW slider value.
+    """
+    slider_state.push(channel, hw_value, time.monotonic()) # Ring buffer of SLIDER_BUFFER_SIZE values
 
-    # TODO MAYBE: just check lowest log_2(step_size) bits to see if == 0 first. Won't help in the case that the majority of slider vals are non divisible by step_size though.
-    rem = (pitch % (QUANTIZE_MOD)) # Quantize to 2048-size steps
     if DIAGNOSTIC_MODE:
-        print("rem:", rem)
+        print(slider_state.last(channel)) # Diagnostic
 
-    if message.pitch == HW_SLIDER_MAX: # max
-        hw_slider_buffer[slider_channel].append(HW_SLIDER_MAX) # Since 8191 remainder for mod `any multiple of 8` is nonzero.
-    else: # Quantize
-        # hw_slider_buffer[slider_channel].append(message.pitch - rem if rem < 0 else message.pitch - rem)
-        hw_slider_buffer[slider_channel].append(pitch - rem if neg == False else 0 - (pitch - rem))
+    # Target of the UI action (from the precomputed lookup table of the slider): pixel on screen, or slider value if the backend does not use the mouse
+    slider_map = slider_maps[channel]
+    i = slider_map.index(hw_value)
+    target = slider_map.x[i] if ui.uses_pixels else slider_map.sw[i]
 
-    # Maintain buffer of size SLIDER_BUFFER_SIZE
-    if len(hw_slider_buffer[slider_channel]) > SLIDER_BUFFER_SIZE:
-        del hw_slider_buffer[slider_channel][0] # hw_slider_buffer[slider_channel] = hw_slider_buffer[slider_channel][1:4]
+    started = metrics.now() if metrics.enabled else 0
+    # First event, touched another slider, or the target pixel actually changed: press once per gesture, then move while held.
+    # The gesture engine releases the mouse when another slider is touched, or after the fader is idle.
+    if channel != slider_state.last_channel or target != slider_targets[channel]:
+        gesture.move(channel, hw_value, time.monotonic())
+        slider_targets[channel] = target
+    if metrics.enabled and started:
+        metrics.observe("ui", "slider", metrics.now() - started)
 
-    # hw_slider_buffer[slider_channel][-1] = message.pitch # No quantizing. (very slow due to pyautogui calls.)
+    photo_cache.update(current_photo_id, cached_name(channel_names[channel]), hw_value * 2 / (HW_SLIDER_RANGE + 1))
+    update_track_led(channel)
 
-    if DIAGNOSTIC_MODE:
-        print(hw_slider_buffer[slider_channel][-1]) # Diagnostic
+def forget_fader(channel: int) -> None:
+    """Forget the last fader value sent for a slider, after its value changed outside the fader path
+    (jog wheel, undo/redo, UI sync, bank switch): the next fader move must not be skipped.
 
-    if slider_channel != last_channel: # First event, or touched another slider: move instead of dragging (move and clicking) the mouse.
-        pyautogui.leftClick(slider_coords[slider_channel][0] + (CONST_SCALE * hw_slider_buffer[slider_channel][-1]) + X_OFFSET_SLIDER_MIDDLE, slider_coords[slider_channel][1] + Y_OFFSET_SLIDER) # was moveTo
-    
-    elif (hw_slider_buffer[slider_channel][-1] != hw_slider_buffer[slider_channel][-2]) or \
-        hw_slider_buffer[slider_channel][-1] == HW_SLIDER_MAX or \
-        hw_slider_buffer[slider_channel][-1] == HW_SLIDER_MIN: # If at sample freq, or at min/max of given slider
-        pyautogui.dragTo(slider_coords[slider_channel][0] + (CONST_SCALE * hw_slider_buffer[slider_channel][-1]) + X_OFFSET_SLIDER_MIDDLE, slider_coords[slider_channel][1] + Y_OFFSET_SLIDER, button='left')
+    Args:
+        channel (int): Slider channel.
+    """
+    sampler.reset(channel)
+    slider_targets[channel] = None
 
-    update_track_led(slider_channel)
+def jog_handler(directions: dict, message: mido.Message) -> None:
+    """Handle jog wheel messages from controller: ticks are accumulated, and applied when their window ends.
 
-def jog_handler(message: mido.Message) -> None:
-    """Handle jog wheel messages from controller.
+    Args:
+        directions (dict): Control value -> direction (1 = right, -1 = left), from the device profile.
+        message (mido.Message): Message from controller, or ticks coalesced by the event queue (event_queue.JogDelta).
+    """
+    ticks, span = (message.ticks, message.span) if isinstance(message, JogDelta) else ({message.value: 1}, 0)
+    for value, count in ticks.items():
+        direction = directions.get(value)
+        if direction is not None:
+            for channel, steps in jog.tick(slider_state.channel, direction, time.monotonic(), count, span):
+                jog_handler_helper(channel, steps)
+
+def jog_handler_helper(channel: int, steps: int) -> None:
+    """Helper to apply accumulated jog wheel ticks as one relative move of a slider.
 
     Args:
-        message (mido.Message): Message from controller.
+        channel (int): Slider channel.
+        steps (int): Fine grain steps (FINE_GRAIN_DELTA each) to move by: > 0 for right, < 0 for left.
     """
+    if DIAGNOSTIC_MODE:
+        print("ch:", channel)
+    # fine grain adjust, clamped to the HW slider range
+    hw_value = slider_state.last(channel)
+    target = min(max(hw_value + steps * FINE_GRAIN_DELTA, HW_SLIDER_MIN), HW_SLIDER_MAX)
+
+    if target != hw_value:
+        ui.nudge_slider(channel, target - hw_value, target)
+    slider_state.set_last(channel, target, time.monotonic())
+    forget_fader(channel)
+    photo_cache.update(current_photo_id, cached_name(channel_names[channel]), target * 2 / (HW_SLIDER_RANGE + 1))
+    if DIAGNOSTIC_MODE:
+        print(f'fine grain {steps} steps {slider_state.last(channel)}')
 
-    # Jog CW
-    if message.value == 1:
-        jog_handler_helper(JogDirection.RIGHT)
-    # Jog CCW
-    elif message.value == 65:
-        jog_handler_helper(JogDirection.LEFT)
 
-def jog_handler_helper(direction: JogDirection) -> None:
-    """Helper to handle jog wheel changes.
+def button_handler(message: mido.Message) -> None:
+    """Handle button messages from controller.
 
     Args:
-        direction (JogDirection): Indicates direction of jog wheel change. 
-
-    Raises:
-        Exception: If invalid JogDirection.
+        message (mido.Message): Message from controller.
     """
-    global slider_channel
+    runtime.schedule_script(message.note) # Run as a task: don't stall slider handling
 
-    pitch_delta = 0
+def bank_handler(groups: list, message: mido.Message) -> None:
+    """Handle bank buttons: map the faders to the sliders of another adjustment group.
+    Pressing the button of the current bank again selects the next group of the button, if any.
 
-    if DIAGNOSTIC_MODE:
-        print("ch:", slider_channel)
-    # fine grain adjust
-    if direction == JogDirection.RIGHT:
-        pitch_delta = FINE_GRAIN_DELTA if not hw_slider_buffer[slider_channel][-1] >= HW_SLIDER_MAX else 0
-    elif direction == JogDirection.LEFT:
-        pitch_delta = -FINE_GRAIN_DELTA if not hw_slider_buffer[slider_channel][-1] <= HW_SLIDER_MIN else 0
+    Args:
+        groups (list): Adjustment groups of the button, from the device profile.
+        message (mido.Message): Message from controller.
+    """
+    if current_bank in groups:
+        name = groups[(groups.index(current_bank) + 1) % len(groups)]
     else:
-        raise Exception("Incorrect direction call to jog_handler_helper().")
-    
-    if pitch_delta != 0:
-        pyautogui.dragRel(direction, 0, button='left')
-    hw_slider_buffer[slider_channel][-1] += pitch_delta
-    if DIAGNOSTIC_MODE:
-        print(f'fine grain CW {hw_slider_buffer[slider_channel][-1]}')
+        name = groups[0]
+    if name != current_bank:
+        select_bank(name)
 
+def track_select_handler(channel: int, message: mido.Message) -> None:
+    """Handle solo track select buttons: select a slider to edit again, and point the mouse at its last value.
 
-def button_handler(message: mido.Message) -> None:
-    """Handle button messages from controller.
+    Args:
+        channel (int): Slider channel of the track.
+        message (mido.Message): Message from controller.
+    """
+    if channel >= len(channel_names): # No slider in this bank
+        return
+    slider_state.channel = channel
+    ui.point_at_slider(channel, slider_state.last(channel))
+    if DIAGNOSTIC_MODE:
+        print(f"BUTTONS: last_channel: {slider_state.last_channel}, channel: {channel}")
+    update_track_led(channel)
+
+def history_handler(step: int, message: mido.Message) -> None:
+    """Handle undo/redo buttons: move the active slider to its previous/next committed value.
 
     Args:
+        step (int): -1 for undo, 1 for redo.
         message (mido.Message): Message from controller.
+    """
+    channel = slider_state.channel
+    hw_value = slider_state.undo(channel) if step < 0 else slider_state.redo(channel)
+    if hw_value is None:
+        return
+    move_slider(channel, hw_value)
+    gesture.release()
+    forget_fader(channel)
+    slider_state.mark_clean(channel) # Moved to a history value: not a new edit
+    if DIAGNOSTIC_MODE:
+        print(f"{'Undo' if step < 0 else 'Redo'} {channel_names[channel]}: {hw_value}")
 
-    Raises:
-        Exception: If applescript returns non-zero code.
+def run_button_script(note: int) -> ScriptResult:
+    """Run the AppleScript of a button.
+
+    Args:
+        note (int): Note of the button, in the device profile.
+
+    Returns:
+        ScriptResult: Result of the script.
     """
-    if message.note in midi_note_to_applescript:
-        r = applescript.tell.app('System Events', midi_note_to_applescript[message.note]) # prev photo (key code 124 == right arrow)
-        if r.code != 0:
-            raise Exception(f"Applescript returned {r.code}")
-        
-        if message.note == 1: # Rec button on slider 2
-            set_init_slider_positions() # Apply the auto effects
-    
-    elif message.note - 8 <= 15 and message.note - 8 >= 0: # Solo track selects (to select a slider to edit again. Should point mouse to last value)
-        slider_channel = message.note - 8
-        if slider_channel == 7: # Unused slider_channel
-            return
-        pyautogui.moveTo(slider_coords[slider_channel][0] + (CONST_SCALE * hw_slider_buffer[slider_channel][-1]) + X_OFFSET_SLIDER_MIDDLE, slider_coords[slider_channel][1] + Y_OFFSET_SLIDER)
-        if DIAGNOSTIC_MODE:
-            print(f"BUTTONS: last_channel: {last_channel}, channel: {slider_channel}")
-        update_track_led(slider_channel)
+    return ui.send_keys(*profile.button_scripts[note]) # e.g. prev photo ("key_code", 123 == left arrow)
 
 
 ### Initialization Functions
 
+def init_profile(name: str) -> None:
+    """Load the device profile of the controller, and compile its dispatch table.
+
+    Args:
+        name (str): Profile name, see profiles.load_profile.
+    """
+    global profile
+    global dispatch
+
+    profile = load_profile(name)
+    dispatch = compile_profile(profile, {
+        "fader": fader_handler,
+        "jog": jog_handler,
+        "track_select": track_select_handler,
+        "button": button_handler,
+        "bank": bank_handler,
+        "history": history_handler,
+    })
+    print(f"Loaded device profile {profile.name}: {len(dispatch)} routes")
+
 def init_io() -> None:
     """Initialize MIDI I/O.
     """
@@ -269,21 +492,58 @@ def init_io() -> None:
     print(mido.get_input_names())
 
     # Init output (for sending LED messages)
-    outport = mido.open_output('SAMSON Graphite MF8')
+    outport = mido.open_output(profile.port)
+
+def init_ui_backend(name: str) -> None:
+    """Initialize the UI backend used by the message handlers.
+
+    Args:
+        name (str): "pyautogui", "accessibility" or "fake". See ui_backend.py.
+    """
+    global ui
+    global gesture
+    ui = make_backend(name, channel_names, slider_ids)
+    ui.set_bank(current_bank, channel_names)
+    gesture = GestureEngine(ui)
 
 def init_leds() -> None:
     """Initialize LEDs on controller.
     """
     global outport
+    global leds
+
+    if leds is not None:
+        leds.close()
+    leds = LedFramebuffer(outport)
+    leds.start()
     
     # Initialize LEDs
-    for i in range(0, 32):
-        outport.send(mido.Message("note_on", note=i, velocity=0))
-        outport.send(mido.Message("note_on", note=i, velocity=127))
-    
-    for i in [0, 1, 91, 92]:
-        outport.send(mido.Message("note_on", note=i, velocity=0))
-        outport.send(mido.Message("note_on", note=i, velocity=127))
+    for note in profile.startup_leds:
+        leds.set(note, 127)
+
+def init_slider_layout() -> None:
+    """Initialize slider positions and constants, from the layout cache if it is still valid.
+    Falls back to full discovery in the Photos app otherwise.
+    """
+    global slider_info
+
+    ui.activate()
+    probe = ui.probe_layout(slider_ids[0])
+    layout = load_layout(LAYOUT_CACHE_PATH, probe)
+
+    if layout is not None:
+        print(f"Loaded slider layout from cache {LAYOUT_CACHE_PATH}")
+        for i in range(0, len(channel_names)):
+            slider_coords[i] = list(layout["slider_coords"][i])
+            slider_info[channel_names[i]] = {"position": tuple(layout["slider_coords"][i]), "size": tuple(layout["slider_size"])}
+        set_slider_constants()
+        return
+
+    get_init_slider_positions()
+    set_slider_constants()
+    if probe is None: # Edit pane was closed during probe
+        probe = ui.probe_layout(slider_ids[0])
+    save_layout(LAYOUT_CACHE_PATH, probe, slider_coords, slider_info[channel_names[0]]["size"])
 
 def get_init_slider_positions() -> None:
     """Get the initial slider positions from the Photos app.
@@ -291,76 +551,224 @@ def get_init_slider_positions() -> None:
     Raises:
         Exception: If applescript returns non-zero code.
     """
+    global slider_info
+
     # Focus on the Photos editing pane
-    result = applescript.tell.app("Photos", "activate") 
+    result = ui.activate()
     if result.code != 0:
         raise Exception("Could not find Photos app window.")
         exit(1)
 
-    # For every slider, get the initial slider position (x, y)
-    i = 0
-    while i < len(channel_names):
-        r_position = get_applescript_slider_attribute_by_description(attribute="position", description=channel_names[i])
+    # Get the initial slider position (x, y) of every slider in one pass
+    slider_info = query_sliders()
 
-        # Could not find a slider element: is the edit pane open?
-        if r_position.out == '':
-            print("Could not hook into Photos window. Assuming Edit pane is closed. Trying to open Edit pane.")
-            r_edit = click_applescript_item_by_attribute_and_by_description(attribute="button", description="Edit")
-            continue
-        
+    for i in range(0, len(channel_names)):
         if DIAGNOSTIC_MODE:
-            print(r_position.out)
+            print(slider_info[channel_names[i]])
 
-        print(f"Found slider {channel_names[i]} at position (x, y): {r_position.out}")
-        slider_coords[i] = [int(val) for val in r_position.out.split(", ")] # Leftmost x-coord remains unchanged for all sliders as they are left-aligned in the Photos UI
-        
-        i += 1
+        print(f"Found slider {channel_names[i]} at position (x, y): {slider_info[channel_names[i]]['position']}")
+        slider_coords[i] = list(slider_info[channel_names[i]]["position"]) # Leftmost x-coord remains unchanged for all sliders as they are left-aligned in the Photos UI
 
     print(f"Found all sliders: {slider_coords}")
 
 def set_slider_constants() -> None:
     """Set constants for slider UI automation.
     """
-    global CONST_SCALE
-    global X_OFFSET_SLIDER_MIDDLE
+    global slider_maps
+
+    # Size was already fetched with the slider positions in get_init_slider_positions()
+    SLIDER_WIDTH, SLIDER_HEIGHT = slider_info[channel_names[0]]["size"]
+    slider_state.width = SLIDER_WIDTH # Pixels per HW step and offsets are precomputed in the slider maps
+    slider_maps = update_slider_maps(slider_maps, slider_coords, SLIDER_WIDTH)
+    ui.set_geometry(slider_maps)
+
+    # Maps are set before sliders are marked resolved: faders may be handled on the UI thread meanwhile
+    for i in range(0, len(slider_resolved)):
+        slider_resolved[i] = slider_maps[i] is not None
+    if startup is not None and slider_resolved[0]:
+        startup.mark("first_slider")
+
+def init_banks() -> None:
+    """Index the sliders of every adjustment group with one walk of the Photos window.
+    Switching banks and querying sliders are then direct lookups by element path, instead of walks.
+    Groups with more sliders than faders are cut to the first sliders.
+    """
+    global banks
+
+    groups = ui.index_elements()
+    if current_bank not in groups: # Walk failed: sliders are still queried by walks, index again on the next bank switch
+        print("Could not index slider banks in the Photos window.")
+        return
+    banks = {group: names[:len(slider_resolved)] for group, names in groups.items() if group}
+    ui.set_bank(current_bank, channel_names) # Resolve the element paths of the current bank
+    print(f"Indexed slider banks: {', '.join(f'{group} ({len(names)})' for group, names in banks.items())}")
+
+def select_bank(name: str) -> None:
+    """Map the faders to the sliders of an adjustment group, and sync their values.
+
+    Args:
+        name (str): Adjustment group, e.g. "Color".
+    """
+    global current_bank
+    global slider_info
+
+    if banks is None:
+        init_banks()
+    if banks is None or name not in banks:
+        print(f"No sliders found for bank {name}.")
+        return
 
-    r_size = get_applescript_slider_attribute_by_description(attribute="size", description=channel_names[0])
-    SLIDER_WIDTH, SLIDER_HEIGHT = [int(val) for val in r_size.out.split(", ")]
-    X_OFFSET_SLIDER_MIDDLE = SLIDER_WIDTH / 2
-    CONST_SCALE = SLIDER_WIDTH / HW_SLIDER_RANGE # Each slider on the Graphite MF8 has a range -8192 to 8191
+    # Deliver what is pending on the sliders of the current bank
+    for channel, steps in jog.flush(float('inf')):
+        jog_handler_helper(channel, steps)
+    for channel, hw_value in sampler.flush(float('inf')):
+        move_slider(channel, hw_value)
+    gesture.release()
+    pending_faders.clear()
+
+    previous_bank, previous_names = current_bank, list(channel_names)
+    current_bank = name
+    channel_names[:] = banks[name]
+    ui.set_bank(name, channel_names)
+    try:
+        slider_info = query_sliders()
+    except Exception as e: # Stay on the current bank
+        print(f"Could not switch to bank {name}: {e}")
+        current_bank = previous_bank
+        channel_names[:] = previous_names
+        ui.set_bank(previous_bank, channel_names)
+        return
+    for i in range(0, len(slider_coords)):
+        slider_coords[i] = list(slider_info[channel_names[i]]["position"]) if i < len(channel_names) else (None, None)
+        forget_fader(i) # Faders now map to other sliders
+    set_slider_constants()
+    if slider_state.channel >= len(channel_names):
+        slider_state.channel = 0
+    apply_slider_values(slider_info)
+    if DIAGNOSTIC_MODE:
+        print(f"Bank {name}: {channel_names}")
 
 
 ### Helper Functions 
 
+def bank_snapshot() -> tuple:
+    """Get the current bank and a copy of its slider names, to tell later whether the bank changed.
+
+    Returns:
+        tuple: (bank, slider names).
+    """
+    return current_bank, list(channel_names)
+
+def cached_name(name: str) -> str:
+    """Name of a slider of the current bank in the photo cache (descriptions are only unique within a group).
+    """
+    return f"{current_bank}/{name}"
+
+def read_slider_values() -> dict:
+    """Read the slider values on a warm start, where the layout cache only has geometry: by path, like the
+    layout probe, instead of walking the Photos window. Falls back to `query_sliders` if the read fails.
+
+    Returns:
+        dict: Map of slider name -> {"value": float}. See apply_slider_values.
+    """
+    values = ui.read_slider_values(slider_ids[:len(channel_names)])
+    if values is None:
+        return query_sliders()
+    return {name: {"value": value} for name, value in zip(channel_names, values)}
+
+def query_sliders(names: list = None) -> dict:
+    """Query position, size and value of all sliders in `channel_names` with a single walk of the Photos window.
+
+    Args:
+        names (list, optional): Slider names to query instead, e.g. a snapshot of `channel_names` taken on another thread. Defaults to None.
+
+    Raises:
+        Exception: If some sliders are still missing after QUERY_SLIDERS_ATTEMPTS queries.
+
+    Returns:
+        dict: Map of slider name -> {"position": (x, y), "size": (w, h), "value": float}.
+    """
+    if names is None:
+        names = channel_names
+    for attempt in range(0, QUERY_SLIDERS_ATTEMPTS):
+        sliders = ui.query_sliders(names)
+
+        # Could not find every slider element: is the edit pane open?
+        if all(name in sliders for name in names):
+            return sliders
+        if attempt + 1 < QUERY_SLIDERS_ATTEMPTS:
+            print("Could not hook into Photos window. Assuming Edit pane is closed. Trying to open Edit pane.")
+            r_edit = ui.open_edit_pane()
+    missing = [name for name in names if name not in sliders]
+    raise Exception(f"Could not find sliders {missing} in the Photos window.")
+
 def set_init_slider_positions() -> None:
     """Set the initial slider positions from the Photos app.
     """
-    global CONST_SCALE
-    global X_OFFSET_SLIDER_MIDDLE
+    # NOTE: Assume edit pane still open
+    apply_slider_values(query_sliders())
+
+def wait_for_photo() -> str:
+    """Wait for the photo navigated to with a keystroke to open. See batch.wait_for_photo_id.
+
+    Returns:
+        str: Identity of the new photo, or None if no other photo opened within NAVIGATION_READY_TIMEOUT (e.g. last photo of the library).
+    """
+    try:
+        return wait_for_photo_id(ui, current_photo_id, NAVIGATION_READY_TIMEOUT)
+    except Exception as e:
+        print(e)
+        return None
+
+def land_on_photo(photo_id: str, direction: int) -> None:
+    """Update state after navigating to another photo: slider values are set right away
+    from the photo cache if the photo was visited before.
+
+    Args:
+        photo_id (str): Identity of the photo navigated to.
+        direction (int): -1 for previous photo, 1 for next photo.
+    """
+    global current_photo_id
+
+    photo_cache.navigated(current_photo_id, direction, photo_id)
+    current_photo_id = photo_id
+    values = photo_cache.get(photo_id)
+    if values is not None and all(cached_name(name) in values for name in channel_names): # Cached for this bank
+        apply_slider_values({name: {"value": values[cached_name(name)]} for name in channel_names})
+
+def apply_slider_values(sliders: dict) -> None:
+    """Set the HW slider buffers from slider values queried from the Photos app,
+    and cache them for the current photo.
+
+    Args:
+        sliders (dict): Map of slider name -> {"value": float, ...}. See query_sliders.
+    """
+    global sliders_synced
+
+    gesture.release() # Slider values changed in the UI: the next move starts a new gesture
 
     # Set init values of sliders
-    # NOTE: Assume edit pane still open
-    i = 0
-    while i < len(channel_names):
-        r_value = get_applescript_slider_attribute_by_description(attribute="value", description=channel_names[i])
-        # Could not find a slider element: is the edit pane open?
-        if r_value.out == '':
-            print("Could not hook into Photos window. Assuming Edit pane is closed. Trying to open Edit pane.")
-            r_edit = click_applescript_item_by_attribute_and_by_description(attribute="button", description="Edit")
-            continue
-        hw_slider_conv = (float(r_value.out) * (HW_SLIDER_RANGE + 1) / 2) # + slider_coords[i][0]
-        hw_slider_buffer[i].append(hw_slider_conv)
-        print(f"Found SW slider value for channel {channel_names[i]} with value: {r_value.out}")
+    for i in range(0, len(channel_names)):
+        sw_value = sliders[channel_names[i]]["value"]
+        hw_slider_conv = (sw_value * (HW_SLIDER_RANGE + 1) / 2) # + slider_coords[i][0]
+        slider_state.reset(i, hw_slider_conv) # Also restarts the undo history of the slider
+        forget_fader(i) # Slider moved in the UI: next move must not be skipped
+        print(f"Found SW slider value for channel {channel_names[i]} with value: {sw_value}")
         print(f"- Convert to HW slider value: {hw_slider_conv}")
         
-        # Optional: show loading status on F1-F5 leds
-        update_loading_led(int(((i / (len(channel_names) - 1)) * NUM_LOADING_LEDS)))
-        
-        i += 1
+        # Optional: show loading status on the loading LEDs of the profile (F1-F5 on the MF8)
+        update_loading_led(int(((i / max(len(channel_names) - 1, 1)) * len(profile.loading_leds))))
 
-    # Arbitrarily move to starting position of first slider
-    pyautogui.moveTo(slider_coords[0][0] + (CONST_SCALE * hw_slider_buffer[0][-1]) + X_OFFSET_SLIDER_MIDDLE, slider_coords[0][1] + Y_OFFSET_SLIDER)
-    update_track_led(0)
+    sliders_synced = True
+
+    if current_photo_id is not None:
+        photo_cache.put(current_photo_id, {cached_name(name): sliders[name]["value"] for name in channel_names})
+
+    # Point at the active slider (first slider on startup, or of a bank)
+    channel = slider_state.last_channel if slider_state.last_channel is not None and slider_state.last_channel < len(channel_names) else 0
+    ui.point_at_slider(channel, slider_state.last(channel))
+    update_track_led(channel)
+    update_bank_led()
 
 def update_track_led(slider_channel: int) -> None:
     """Update the track LED to indicate which slider is active.
@@ -368,32 +776,37 @@ def update_track_led(slider_channel: int) -> None:
     Args:
         slider_channel (int): The slider channel to update the LED for.
     """
-    global last_channel
-    global outport
+    last_channel = slider_state.last_channel
     # Turn the LED at `slider_channel` channel to GREEN.
-    if last_channel != slider_channel:
-        outport.send(mido.Message("note_on", note=slider_channel + 8, velocity=0)) # Turn off red (green state)
-        if last_channel != None: 
-            outport.send(mido.Message("note_on", note=last_channel + 8, velocity=127)) # Add red back (orange state)
-    last_channel = slider_channel
+    # Always set, since pressing an already-selected track echoes its red LED back on. Only diffs are sent.
+    leds.set(profile.track_leds[slider_channel], 0) # Turn off red (green state)
+    if last_channel != None and last_channel != slider_channel: 
+        leds.set(profile.track_leds[last_channel], 127) # Add red back (orange state)
+    slider_state.last_channel = slider_channel
+
+def update_bank_led() -> None:
+    """Light the button of the current bank (the loading LEDs are off once slider values are synced).
+    """
+    for note, groups in profile.banks.items():
+        leds.set(note, 127 if current_bank in groups else 0)
 
 def update_loading_led(load_state: int) -> None:
     """Update the loading LED to indicate the loading state.
-    Ranges from midi note 54-58 (F1-F5 buttons) to indicate loading status.
+    Lights the loading LEDs of the device profile in turn (F1-F5 buttons on the MF8) to indicate loading status.
 
     Args:
-        load_state (int): The loading state to update the LED for. EX: 0 = F1 led, 1 = F2 led, 2 = F3 led, 3 = F4 led, 4 = F5 led, 5 = all off
+        load_state (int): The loading state to update the LED for. EX on the MF8: 0 = F1 led, 1 = F2 led, 2 = F3 led, 3 = F4 led, 4 = F5 led, 5 = all off
     """
-    global outport
-    assert (load_state >= 0 and load_state <= NUM_LOADING_LEDS), \
-        f"load_state {load_state} is not in range(0, NUM_LOADING_LEDS = {NUM_LOADING_LEDS})"
-    if load_state == NUM_LOADING_LEDS:
+    num_loading_leds = len(profile.loading_leds)
+    assert (load_state >= 0 and load_state <= num_loading_leds), \
+        f"load_state {load_state} is not in range(0, {num_loading_leds} loading LEDs)"
+    if load_state == num_loading_leds:
         # Turn off all LEDs
-        for i in range(0, NUM_LOADING_LEDS):
-            outport.send(mido.Message("note_on", note=54+i, velocity=0)) # Turn off LED
+        for note in profile.loading_leds:
+            leds.set(note, 0) # Turn off LED
         return
     
-    outport.send(mido.Message("note_on", note=54+load_state, velocity=127)) # Turn on loading LED
+    leds.set(profile.loading_leds[load_state], 127) # Turn on loading LED
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,154 @@
+# metrics.py
+# Low-overhead per-event latency instrumentation, exportable to CSV or Prometheus text format.
+# Toggle at runtime with `kill -USR1 <pid>`, dump with `kill -USR2 <pid>` (see install_signal_handlers).
+
+import signal
+import threading
+import time
+from bisect import bisect_left
+
+from constants import *
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, float('inf'))
+
+# Whether instrumentation is on. Check before timing anything in the hot path.
+enabled = METRICS_ENABLED
+
+now = time.perf_counter
+
+class Histogram:
+    """Latency histogram with fixed buckets.
+    """
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def copy(self) -> "Histogram":
+        histogram = Histogram()
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        histogram.max = self.max
+        return histogram
+
+# (handler, stage) -> Histogram. Samples come from the UI, LED and executor threads: guarded by `lock`
+histograms = {}
+lock = threading.Lock()
+
+def observe(handler: str, stage: str, seconds: float) -> None:
+    """Add a latency sample.
+
+    Args:
+        handler (str): Handler, e.g. "pitch", "jog", "button", "led", "applescript".
+        stage (str): Stage of the event, e.g. "queue", "dispatch", "handler", "total".
+        seconds (float): Latency in seconds.
+    """
+    with lock:
+        histogram = histograms.get((handler, stage))
+        if histogram is None:
+            histogram = histograms[(handler, stage)] = Histogram()
+        histogram.observe(seconds)
+
+def observe_event(handler: str, received: float, dispatched: float, started: float, done: float) -> None:
+    """Add latency samples of all stages of a handled event.
+
+    Args:
+        handler (str): Handler of the event.
+        received (float): Time the event was received from the MIDI port.
+        dispatched (float): Time the event was taken off the event queue.
+        started (float): Time the handler started.
+        done (float): Time the handler (and its UI action) finished.
+    """
+    if received:
+        observe(handler, "queue", dispatched - received)
+        observe(handler, "total", done - received)
+    observe(handler, "dispatch", started - dispatched)
+    observe(handler, "handler", done - started)
+
+def set_enabled(on: bool) -> None:
+    """Turn instrumentation on or off at runtime.
+    """
+    global enabled
+    enabled = on
+    print(f"Metrics {'enabled' if on else 'disabled'}")
+
+def reset() -> None:
+    with lock:
+        histograms.clear()
+
+def snapshot() -> dict:
+    """Get a consistent copy of the histograms, to format while samples keep coming.
+
+    Returns:
+        dict: (handler, stage) -> Histogram.
+    """
+    with lock:
+        return {key: histogram.copy() for key, histogram in histograms.items()}
+
+def dump(path: str) -> None:
+    """Dump histograms to a file: CSV if `path` ends with ".csv", Prometheus text format otherwise.
+
+    Args:
+        path (str): Path of file to write.
+    """
+    with open(path, "w") as f:
+        f.write(to_csv() if path.endswith(".csv") else to_prometheus())
+    print(f"Metrics written to {path}")
+
+def dump_in_background(path: str) -> None:
+    """Dump histograms on another thread, reporting errors instead of raising: for signal handlers, which run
+    on the main thread between any two statements, possibly while it holds `lock`.
+
+    Args:
+        path (str): Path of file to write.
+    """
+    def run():
+        try:
+            dump(path)
+        except Exception as e:
+            print(f"Could not write metrics to {path}: {e}")
+    threading.Thread(target=run, name="metrics-dump", daemon=True).start()
+
+def to_csv() -> str:
+    """Format histograms as CSV, one row per handler and stage.
+    """
+    lines = ["handler,stage,count,sum,max," + ",".join(f"le_{le}" for le in BUCKETS)]
+    for (handler, stage), histogram in sorted(snapshot().items()):
+        lines.append(f"{handler},{stage},{histogram.count},{histogram.sum:.6f},{histogram.max:.6f}," + ",".join(str(count) for count in histogram.counts))
+    return "\n".join(lines) + "\n"
+
+def to_prometheus() -> str:
+    """Format histograms in Prometheus text exposition format (cumulative buckets).
+    """
+    name = "midi_photos_latency_seconds"
+    lines = [f"# HELP {name} Latency of MIDI event handling stages.", f"# TYPE {name} histogram"]
+    for (handler, stage), histogram in sorted(snapshot().items()):
+        labels = f'handler="{handler}",stage="{stage}"'
+        cumulative = 0
+        for le, count in zip(BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{"+Inf" if le == float("inf") else le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+def install_signal_handlers(dump_path: str = METRICS_DUMP_PATH) -> None:
+    """Toggle instrumentation on SIGUSR1 and dump histograms to `dump_path` on SIGUSR2.
+
+    Args:
+        dump_path (str, optional): Path of file to dump to. Defaults to METRICS_DUMP_PATH.
+    """
+    signal.signal(signal.SIGUSR1, lambda signum, frame: set_enabled(not enabled))
+    signal.signal(signal.SIGUSR2, lambda signum, frame: dump_in_background(dump_path))
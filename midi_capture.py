@@ -0,0 +1,244 @@
+# midi_capture.py
+# Optional MIDI capture in a dedicated process: the process owns the input port and writes timestamped records
+# into a shared-memory ring buffer, so capture is never delayed by GC pauses, pyautogui sleeps or AppleScript
+# waits of the main process. The main process reads the ring in batches.
+
+import multiprocessing
+import threading
+import time
+import zlib
+from multiprocessing import shared_memory
+
+import mido
+
+from constants import *
+from session import RECORD
+
+# Ring header: native uint64 counters of records written (by the capture process), records read (by the main process),
+# and records dropped because the ring was full. Slots follow the header: a native uint64 stamp (see `record_stamp`),
+# then the record, in the format of session recordings (see session.py).
+WRITTEN, READ, OVERFLOWS = 0, 1, 2
+HEADER_SIZE = 32 # 3 counters, padded
+STAMP_SIZE = 8
+SLOT_SIZE = 24 # Stamp and record, padded so that every stamp is an aligned native word
+
+def record_stamp(sequence: int, record: bytes) -> int:
+    """Stamp of a record: its sequence number in the high 32 bits, and a CRC-32 of the sequence number and record in the low 32 bits.
+
+    Args:
+        sequence (int): Number of the record since the ring was created.
+        record (bytes): Packed record.
+
+    Returns:
+        int: Stamp word.
+    """
+    sequence &= 0xFFFFFFFF
+    return (sequence << 32) | zlib.crc32(sequence.to_bytes(4, "little") + record)
+
+class CaptureRing:
+    """Single-producer, single-consumer ring of fixed-size MIDI records in shared memory.
+    The producer never blocks: when the ring is full, new records are dropped and counted as overflows.
+    Counters and stamps are aligned native words, each stored at once (not byte by byte, as struct "<Q" does), so they never tear.
+    Python issues no memory barriers, and weakly ordered CPUs (e.g. ARM64) may make the write counter visible to the other
+    process before the record: the consumer only accepts a record whose stamp matches its sequence number and contents,
+    and reads it on a later poll otherwise, so it never returns a partial or stale record.
+    """
+    def __init__(self, name: str = None, capacity: int = MIDI_CAPTURE_CAPACITY):
+        """Initialize CaptureRing class: create a ring, or attach to the ring of another process.
+
+        Args:
+            name (str, optional): Shared memory block of an existing ring. Defaults to None (create one).
+            capacity (int, optional): Records in the ring. Defaults to MIDI_CAPTURE_CAPACITY.
+        """
+        self.capacity = capacity
+        self._owner = name is None
+        size = HEADER_SIZE + capacity * SLOT_SIZE
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, track=False) # Python 3.13+: the owner unlinks it
+            except TypeError:
+                self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._buf = self._shm.buf
+        self._header = self._buf[:HEADER_SIZE].cast("Q")
+        self._stamps = self._buf[HEADER_SIZE:].cast("Q") # Stamp of slot i at i * SLOT_SIZE // STAMP_SIZE
+        if self._owner:
+            self._header[WRITTEN] = self._header[READ] = self._header[OVERFLOWS] = 0
+        self.unpublished = 0 # Reads stopped at a record not visible yet
+
+    def write(self, timestamp: float, data: bytes) -> bool:
+        """Write a record (producer side).
+
+        Args:
+            timestamp (float): Receive time, time.perf_counter() (system-wide clock on macOS and Linux).
+            data (bytes): MIDI message bytes, up to 3.
+
+        Returns:
+            bool: False if the ring was full and the record was dropped.
+        """
+        written = self._header[WRITTEN]
+        if written - self._header[READ] >= self.capacity:
+            self._header[OVERFLOWS] += 1 # Single writer: the producer
+            return False
+        slot = written % self.capacity
+        record = RECORD.pack(timestamp, len(data), data)
+        offset = HEADER_SIZE + slot * SLOT_SIZE + STAMP_SIZE
+        self._buf[offset:offset + RECORD.size] = record
+        self._stamps[slot * SLOT_SIZE // STAMP_SIZE] = record_stamp(written, record)
+        self._header[WRITTEN] = written + 1 # Publish the record
+        return True
+
+    def read_batch(self, max_records: int = MIDI_CAPTURE_BATCH) -> list:
+        """Read the records written since the last read, oldest first (consumer side).
+
+        Args:
+            max_records (int, optional): Max records to read. Defaults to MIDI_CAPTURE_BATCH.
+
+        Returns:
+            list: (timestamp, message bytes) per record.
+        """
+        read = self._header[READ]
+        count = min(self._header[WRITTEN] - read, max_records)
+        records = []
+        for i in range(read, read + count):
+            slot = i % self.capacity
+            offset = HEADER_SIZE + slot * SLOT_SIZE + STAMP_SIZE
+            record = bytes(self._buf[offset:offset + RECORD.size])
+            if self._stamps[slot * SLOT_SIZE // STAMP_SIZE] != record_stamp(i, record): # Not visible yet: read it on the next poll
+                self.unpublished += 1
+                break
+            timestamp, length, data = RECORD.unpack(record)
+            records.append((timestamp, data[:length]))
+        self._header[READ] = read + len(records) # Free the slots
+        return records
+
+    def stats(self) -> dict:
+        written, read, overflows = self._header[WRITTEN], self._header[READ], self._header[OVERFLOWS]
+        return {"written": written, "read": read, "pending": written - read, "overflows": overflows, "unpublished": self.unpublished}
+
+    def close(self) -> None:
+        """Detach from the ring; the creator also frees it.
+        """
+        self._header.release()
+        self._stamps.release()
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+def capture_main(port_name: str, ring_name: str, capacity: int) -> None:
+    """Entry point of the capture process: drain the input port into the ring, timestamping each message on receipt.
+
+    Args:
+        port_name (str): Name of MIDI input port to open.
+        ring_name (str): Shared memory block of the ring.
+        capacity (int): Records in the ring.
+    """
+    ring = CaptureRing(ring_name, capacity)
+    try:
+        with mido.open_input(port_name) as port:
+            for message in port:
+                timestamp = time.perf_counter()
+                data = bytes(message.bytes())
+                if len(data) <= 3: # sysex: not sent by the controller
+                    ring.write(timestamp, data)
+    finally:
+        ring.close()
+
+class MidiCapture:
+    """MIDI input captured by a dedicated process, read back in batches on a reader thread.
+    Messages keep the timestamp of their capture in `message.time`.
+
+    Use as a context manager: the capture process is started on enter, and stopped on exit.
+    """
+    def __init__(self, port_name: str, on_batch, on_close=None, capacity: int = MIDI_CAPTURE_CAPACITY, poll_period: float = MIDI_CAPTURE_POLL_PERIOD, target=capture_main):
+        """Initialize MidiCapture class.
+
+        Args:
+            port_name (str): Name of MIDI input port to open.
+            on_batch (function): Called with each batch of messages (list of mido.Message), on the reader thread.
+            on_close (function, optional): Called once the capture process has exited and the ring is drained. Defaults to None.
+            capacity (int, optional): Records in the ring. Defaults to MIDI_CAPTURE_CAPACITY.
+            poll_period (float, optional): Seconds the reader sleeps when the ring is empty. Defaults to MIDI_CAPTURE_POLL_PERIOD.
+            target (function, optional): Entry point of the capture process, called with (port name, ring name, capacity). Defaults to capture_main.
+        """
+        self._port_name = port_name
+        self._on_batch = on_batch
+        self._on_close = on_close
+        self._poll_period = poll_period
+        self._target = target
+        self._ring = CaptureRing(capacity=capacity)
+        self._process = None
+        self._reader = None
+        self._stopped = threading.Event()
+
+        # Counters
+        self.batches = 0
+        self.max_batch = 0
+        self._final_stats = {} # Ring counters when stopped
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self) -> None:
+        """Start the capture process and the reader thread.
+        """
+        self._process = multiprocessing.Process(target=self._target, args=(self._port_name, self._ring.name, self._ring.capacity), name="midi-capture", daemon=True)
+        self._process.start()
+        self._reader = threading.Thread(target=self._read, name="midi-capture-reader", daemon=True)
+        self._reader.start()
+
+    def _read(self) -> None:
+        while not self._stopped.is_set():
+            alive = self._process.is_alive() # Before reading: records of an exited process are all in the ring
+            records = self._ring.read_batch()
+            if not records:
+                if not alive: # Port closed, or capture failed
+                    if self._on_close is not None:
+                        self._on_close()
+                    break
+                time.sleep(self._poll_period)
+                continue
+            messages = []
+            for timestamp, data in records:
+                message = mido.Message.from_bytes(data)
+                message.time = timestamp # Capture timestamp, for latency metrics
+                messages.append(message)
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(messages))
+            self._on_batch(messages)
+
+    @property
+    def alive(self) -> bool:
+        """Whether messages may still arrive: the capture process runs, or records are left to read.
+        """
+        return self._reader is not None and self._reader.is_alive()
+
+    def stop(self) -> None:
+        """Stop the capture process and the reader thread, and free the ring.
+        """
+        if self._process is not None and self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._stopped.set()
+        if self._reader is not None:
+            self._reader.join()
+        if self._ring is not None:
+            self._final_stats = self._ring.stats()
+            self._ring.close()
+            self._ring = None
+
+    def stats(self) -> dict:
+        """Get a snapshot of the capture counters.
+
+        Returns:
+            dict: Records written and read, pending, overflows (dropped: ring full), unpublished (reads that waited for a record), batches and largest batch.
+        """
+        stats = self._ring.stats() if self._ring is not None else self._final_stats
+        return dict(stats, batches=self.batches, max_batch=self.max_batch)
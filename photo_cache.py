@@ -0,0 +1,89 @@
+# photo_cache.py
+# LRU cache of slider values per photo, so values are correct as soon as we land on a photo.
+
+from collections import OrderedDict
+
+from constants import *
+
+class PhotoCache:
+    """Slider values (slider name -> SW value) keyed by photo identity, with LRU eviction.
+
+    Photos only exposes the slider values of the photo open in the editor, so neighbors can't be read ahead
+    of time. Instead, the cache remembers which photo is left/right of which as we navigate, and keeps the
+    neighbors of the current photo warm (most recently used), so going back and forth never evicts them.
+    """
+    def __init__(self, capacity: int = PHOTO_CACHE_SIZE):
+        """Initialize PhotoCache class.
+
+        Args:
+            capacity (int, optional): Max number of photos cached. Defaults to PHOTO_CACHE_SIZE.
+        """
+        self._capacity = capacity
+        self._values = OrderedDict()
+        self._neighbors = {} # photo id -> {direction: photo id}, direction is -1 (left) or 1 (right)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, photo_id: str) -> dict:
+        """Get the cached slider values of a photo.
+
+        Args:
+            photo_id (str): Photo identity.
+
+        Returns:
+            dict: Map of slider name -> SW value, or None if not cached.
+        """
+        values = self._values.get(photo_id)
+        if values is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._values.move_to_end(photo_id)
+        return values
+
+    def put(self, photo_id: str, values: dict) -> None:
+        """Cache the slider values of a photo.
+
+        Args:
+            photo_id (str): Photo identity.
+            values (dict): Map of slider name -> SW value.
+        """
+        self._values[photo_id] = dict(values)
+        self._values.move_to_end(photo_id)
+        while len(self._values) > self._capacity:
+            evicted, _ = self._values.popitem(last=False)
+            self._neighbors.pop(evicted, None)
+
+    def update(self, photo_id: str, name: str, value: float) -> None:
+        """Update one cached slider value of a photo (after moving the slider).
+
+        Args:
+            photo_id (str): Photo identity.
+            name (str): Slider name.
+            value (float): New SW value.
+        """
+        values = self._values.get(photo_id)
+        if values is not None:
+            values[name] = value
+
+    def navigated(self, from_id: str, direction: int, to_id: str) -> None:
+        """Record a navigation between photos, and keep the neighbors of the new photo warm.
+
+        Args:
+            from_id (str): Photo navigated from, or None.
+            direction (int): -1 for previous photo, 1 for next photo.
+            to_id (str): Photo navigated to.
+        """
+        if from_id is not None and from_id != to_id:
+            self._neighbors.setdefault(from_id, {})[direction] = to_id
+            self._neighbors.setdefault(to_id, {})[-direction] = from_id
+        self.prefetch_neighbors(to_id)
+
+    def prefetch_neighbors(self, photo_id: str) -> None:
+        """Mark the known neighbors of a photo as recently used, so they are not evicted.
+        """
+        for neighbor in self._neighbors.get(photo_id, {}).values():
+            if neighbor in self._values:
+                self._values.move_to_end(neighbor)
+        if photo_id in self._values:
+            self._values.move_to_end(photo_id)
@@ -0,0 +1,182 @@
+# profiles.py
+# Device profiles of MIDI controllers (profiles/<name>.json), compiled at startup into O(1) message dispatch tables.
+
+import json
+import os
+
+from constants import *
+
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+# Message types routed by dispatch tables -> attribute holding the note/control number (None = keyed on channel only)
+NUMBER_ATTRIBUTES = {
+    "note_on": "note",
+    "note_off": "note",
+    "control_change": "control",
+    "pitchwheel": None,
+}
+
+# Route of ignored messages (unused controls): no handler, no LED echo
+IGNORED = ("ignored", None)
+
+class DeviceProfile:
+    """Controls of a MIDI controller, loaded from a profile file.
+
+    Profile file keys:
+        name: Display name of the controller.
+        port: MIDI port name of the controller (input and LED output).
+        faders: pitchwheel channel -> slider index in main.channel_names.
+        jog: {"control": jog wheel control number, "directions": control value -> direction (1 = right, -1 = left)}.
+        press_velocity: Velocity of a button press (other velocities are releases).
+        track_select: button note -> slider index to select.
+        buttons: button note -> Photos action, see action_to_script.
+        banks: button note -> adjustment groups of the Photos app mapped to the faders; pressing again cycles through them.
+        history: {"undo": button note, "redo": button note} for undo/redo of the active slider.
+        ignore: {"notes": unused notes, "channels": unused channels}.
+        track_leds: LED note of each slider's track (red; on = orange, off = green).
+        loading_leds: LED notes lit in turn while slider values are synced, all off once synced.
+        startup_leds: LED notes turned on at startup.
+    """
+    def __init__(self, data: dict):
+        """Initialize DeviceProfile class.
+
+        Args:
+            data (dict): Parsed profile file.
+
+        Raises:
+            Exception: If a button is mapped to an unknown action.
+        """
+        self.name = data["name"]
+        self.port = data["port"]
+        self.faders = {int(channel): slider for channel, slider in data.get("faders", {}).items()}
+        self.jog_control = data["jog"]["control"] if "jog" in data else None
+        self.jog_directions = {int(value): direction for value, direction in data["jog"]["directions"].items()} if "jog" in data else {}
+        self.press_velocity = data.get("press_velocity", 127)
+        self.track_select = {int(note): slider for note, slider in data.get("track_select", {}).items()}
+        self.buttons = {int(note): action for note, action in data.get("buttons", {}).items()}
+        self.banks = {int(note): list(groups) for note, groups in data.get("banks", {}).items()}
+        self.history = {int(note): {"undo": -1, "redo": 1}[name] for name, note in data.get("history", {}).items()} # note -> step
+        self.ignore_notes = list(data.get("ignore", {}).get("notes", []))
+        self.ignore_channels = list(data.get("ignore", {}).get("channels", []))
+        self.track_leds = list(data.get("track_leds", []))
+        self.loading_leds = list(data.get("loading_leds", []))
+        self.startup_leds = list(data.get("startup_leds", []))
+
+        for note, action in self.buttons.items():
+            if action not in action_to_script:
+                raise Exception(f"Profile {self.name}: unknown action {action} for note {note}.")
+
+        # Derived from the button actions
+        self.button_scripts = {note: action_to_script[action] for note, action in self.buttons.items()} # note -> (script template, arguments...)
+        self.resync_notes = [note for note, action in self.buttons.items() if action in RESYNC_ACTIONS]
+        self.navigation_notes = {note: NAVIGATION_ACTIONS[action] for note, action in self.buttons.items() if action in NAVIGATION_ACTIONS}
+
+def load_profile(name: str) -> DeviceProfile:
+    """Load a device profile.
+
+    Args:
+        name (str): Profile name (file profiles/<name>.json), or path of a profile file.
+
+    Returns:
+        DeviceProfile: Loaded profile.
+    """
+    path = name if name.endswith(".json") else os.path.join(PROFILES_DIR, f"{name}.json")
+    with open(path) as f:
+        return DeviceProfile(json.load(f))
+
+def on_press(handler, velocity: int):
+    """Wrap a button handler to only run on presses (not on releases).
+    """
+    def press_handler(message):
+        if message.velocity == velocity:
+            handler(message)
+    return press_handler
+
+def bind(handler, *args):
+    """Bind leading arguments of a handler: `bind(f, a)(message)` calls `f(a, message)`.
+    """
+    return lambda message: handler(*args, message)
+
+class DispatchTable:
+    """Routes of messages, keyed on (type, channel, note/control number) in a dict.
+    A channel of None matches any channel; exact channel routes take precedence.
+    A route is (name, handler): `name` labels latency metrics, `handler(message)` handles the message.
+    """
+    def __init__(self):
+        self._routes = {}
+
+    def add(self, message_type: str, channel: int, number: int, name: str, handler) -> None:
+        """Add a route.
+
+        Args:
+            message_type (str): mido message type, in NUMBER_ATTRIBUTES.
+            channel (int): MIDI channel, or None for any channel.
+            number (int): Note or control number, or None for pitchwheel.
+            name (str): Route name, for latency metrics.
+            handler (function): Called with the message.
+        """
+        self._routes[(message_type, channel, number)] = (name, handler)
+
+    def ignore(self, message_type: str, channel: int, number: int) -> None:
+        self._routes[(message_type, channel, number)] = IGNORED
+
+    def lookup(self, message) -> tuple:
+        """Get the route of a message.
+
+        Args:
+            message (mido.Message): Message from controller.
+
+        Returns:
+            tuple: (name, handler), IGNORED, or None if the message has no route.
+        """
+        message_type = message.type
+        if message_type not in NUMBER_ATTRIBUTES:
+            return None
+        attribute = NUMBER_ATTRIBUTES[message_type]
+        number = getattr(message, attribute) if attribute is not None else None
+        route = self._routes.get((message_type, message.channel, number))
+        if route is None:
+            route = self._routes.get((message_type, None, number))
+        return route
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+def compile_profile(profile: DeviceProfile, handlers: dict) -> DispatchTable:
+    """Compile a device profile into a dispatch table, with handlers bound to their control.
+
+    Args:
+        profile (DeviceProfile): Device profile.
+        handlers (dict): Handlers by control kind:
+            "fader": f(slider, message), "jog": f(directions, message), "track_select": f(slider, message), "button": f(message),
+            "bank": f(groups, message) and "history": f(step, message).
+
+    Returns:
+        DispatchTable: Compiled dispatch table.
+    """
+    table = DispatchTable()
+
+    for channel, slider in profile.faders.items():
+        table.add("pitchwheel", channel, None, "pitch", bind(handlers["fader"], slider))
+    if profile.jog_control is not None:
+        table.add("control_change", None, profile.jog_control, "jog", bind(handlers["jog"], profile.jog_directions))
+    for note, slider in profile.track_select.items():
+        table.add("note_on", None, note, "button", on_press(bind(handlers["track_select"], slider), profile.press_velocity))
+    for note in profile.buttons:
+        table.add("note_on", None, note, "button", on_press(handlers["button"], profile.press_velocity))
+    for note, groups in profile.banks.items():
+        table.add("note_on", None, note, "button", on_press(bind(handlers["bank"], groups), profile.press_velocity))
+    for note, step in profile.history.items():
+        table.add("note_on", None, note, "button", on_press(bind(handlers["history"], step), profile.press_velocity))
+
+    # Unused controls: exact channel routes take precedence over routes of any channel
+    for note in profile.ignore_notes:
+        table.ignore("note_on", None, note)
+        table.ignore("note_off", None, note)
+    for channel in profile.ignore_channels:
+        table.ignore("pitchwheel", channel, None)
+        for number in range(0, 128):
+            table.ignore("note_on", channel, number)
+            table.ignore("note_off", channel, number)
+            table.ignore("control_change", channel, number)
+    return table
@@ -0,0 +1,248 @@
+# runtime.py
+# Asyncio event runtime: MIDI input is bridged in with mido callbacks (or from a capture process), and slow
+# AppleScript work runs as cancellable tasks on executors, so it never stalls slider and jog handling.
+
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import mido
+
+import metrics
+from constants import *
+from event_queue import EventQueue
+from midi_capture import MidiCapture
+
+class AsyncRuntime:
+    """Event runtime of the controller.
+
+    - MIDI messages arrive on mido's callback thread and go into a coalescing EventQueue. With MIDI_CAPTURE_MODE
+      "process", they are captured by a dedicated process and arrive in batches instead (see midi_capture.py).
+      Without an input port, messages are fed with `put` instead, e.g. by a session replay (see session.py).
+    - Messages are handled in order on a single UI thread (handlers and UI backends are not thread-safe).
+    - Button scripts (keystrokes) run as asyncio tasks on a serial executor, in the order buttons were pressed.
+      Resyncs of slider values query the Photos app on a separate script executor.
+      After a photo navigation, slider values are resynced for the new photo (cached values first).
+      A newer photo navigation cancels an in-flight resync, since its values belong to the previous photo.
+      A resync started before a bank switch is dropped, since its values belong to the sliders of the previous bank.
+    """
+    def __init__(self, handle_message, handle_idle, handle_close, run_script, query_sliders, apply_sliders, wait_for_photo, land_on_photo, bank_snapshot, slider_rates, resync_notes: list, navigation_notes: dict, jog_control: int = None):
+        """Initialize AsyncRuntime class.
+
+        Args:
+            handle_message (function): Handles one message, on the UI thread.
+            handle_idle (function): Idle work (e.g. deliver settled fader values), on the UI thread.
+            handle_close (function): Delivers what is still pending once input ended (e.g. jog ticks, resting fader values), on the UI thread.
+            run_script (function): Runs the AppleScript of a button, given its note. Returns a result with `code`.
+            query_sliders (function): Queries slider values from the Photos app, given slider names.
+            apply_sliders (function): Applies queried slider values, on the UI thread.
+            wait_for_photo (function): Waits for the photo navigated to, and returns its identity (None if the photo did not change).
+            land_on_photo (function): Called with (photo id, direction) after navigating to a photo, on the UI thread.
+            bank_snapshot (function): Returns (bank, slider names) of the bank the faders are mapped to.
+            slider_rates (function): Returns UI updates per second of each slider since the last call, on the UI thread. For diagnostics.
+            resync_notes (list): Notes whose script is followed by a resync of slider values. See profiles.DeviceProfile.
+            navigation_notes (dict): Notes that navigate to another photo -> direction. See profiles.DeviceProfile.
+            jog_control (int, optional): Control number of the jog wheel, whose ticks the queue coalesces. Defaults to None.
+        """
+        self._handle_message = handle_message
+        self._handle_idle = handle_idle
+        self._handle_close = handle_close
+        self._run_script = run_script
+        self._query_sliders = query_sliders
+        self._apply_sliders = apply_sliders
+        self._wait_for_photo = wait_for_photo
+        self._land_on_photo = land_on_photo
+        self._bank_snapshot = bank_snapshot
+        self._slider_rates = slider_rates
+        self._resync_notes = resync_notes
+        self._navigation_notes = navigation_notes
+
+        self.queue = EventQueue(jog_control=jog_control)
+        self._ui_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ui")
+        self._keys_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="keys") # Keystrokes in press order
+        self._script_executor = ThreadPoolExecutor(max_workers=max(APPLESCRIPT_POOL_SIZE, 1), thread_name_prefix="applescript")
+        self._loop = None
+        self._wakeup = None
+        self._recorder = None
+        self.capture = None # MidiCapture with MIDI_CAPTURE_MODE "process"
+        self._tasks = set() # Script and resync tasks in flight
+        self._resync_task = None
+        self._resync_direction = None # Navigation direction of the in-flight resync
+        self._presses = 0 # Buttons pressed, numbering script tasks
+        self._last_navigation = 0 # Number of the last navigation pressed
+        self.cancelled_resyncs = 0
+        self.dropped_resyncs = 0
+
+    def _on_message(self, message: mido.Message) -> None:
+        """mido callback, on mido's input thread.
+        """
+        message.time = time.perf_counter() # Receive timestamp, for latency metrics
+        if self._recorder is not None:
+            self._recorder.record(message)
+        self.put(message)
+
+    def put(self, message: mido.Message) -> None:
+        """Feed a message into the runtime. Thread-safe: usable before the runtime runs.
+
+        Args:
+            message (mido.Message): Message from controller, with its receive timestamp in `message.time` (time.perf_counter()).
+        """
+        self.queue.put(message)
+        self._wake()
+
+    def _on_batch(self, messages: list) -> None:
+        """MidiCapture callback, on its reader thread. Messages are timestamped by the capture process.
+        """
+        if self._recorder is not None:
+            for message in messages:
+                self._recorder.record(message)
+        self.queue.put_many(messages)
+        self._wake()
+
+    def close(self) -> None:
+        """End the input: the runtime handles what is still queued, waits for its tasks, and stops. Thread-safe.
+        """
+        self.queue.close()
+        self._wake()
+
+    def _wake(self) -> None:
+        loop = self._loop
+        if loop is not None: # Not running yet: the first poll drains the queue
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def run_on_ui(self, func, *args) -> Future:
+        """Run a function on the UI thread. Thread-safe: usable before the runtime runs (e.g. by startup stages).
+
+        Returns:
+            concurrent.futures.Future: Result of the function.
+        """
+        return self._ui_executor.submit(func, *args)
+
+    def schedule_script(self, note: int) -> None:
+        """Schedule the AppleScript of a button as a task. Thread-safe: called from the UI thread.
+
+        Args:
+            note (int): Note of the button.
+        """
+        self._loop.call_soon_threadsafe(self._start_script, note)
+
+    def _start_script(self, note: int) -> None:
+        self._presses += 1
+        if note in self._navigation_notes:
+            self._last_navigation = self._presses
+            self._cancel_resync()
+        self._track(self._script_task(note, self._presses))
+
+    def _track(self, coroutine) -> asyncio.Task:
+        task = self._loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _cancel_resync(self) -> None:
+        if self._resync_task is not None and not self._resync_task.done():
+            self._resync_task.cancel()
+            self.cancelled_resyncs += 1
+            if DIAGNOSTIC_MODE:
+                print("Cancelled resync of slider values: superseded by photo navigation")
+
+    async def _script_task(self, note: int, press: int) -> None:
+        result = await self._loop.run_in_executor(self._keys_executor, self._run_script, note)
+        if result.code != 0:
+            print(f"Applescript returned {result.code}: {result.err}")
+            return
+        if press < self._last_navigation: # A newer navigation resyncs the photo it lands on
+            return
+        if note in self._resync_notes:
+            self._start_resync(None)
+        elif note in self._navigation_notes:
+            self._start_resync(self._navigation_notes[note])
+
+    def _start_resync(self, direction: int) -> None:
+        if direction is None and self._resync_task is not None and not self._resync_task.done():
+            direction = self._resync_direction # Still landing on a photo
+        self._cancel_resync()
+        self._resync_direction = direction
+        self._resync_task = self._track(self._resync_task_body(direction, self._bank_snapshot()))
+
+    def _apply_in_bank(self, bank: tuple, sliders: dict) -> None:
+        """Apply queried slider values, on the UI thread, unless the bank changed since the resync started.
+        """
+        if self._bank_snapshot() != bank:
+            self.dropped_resyncs += 1
+            if DIAGNOSTIC_MODE:
+                print(f"Dropped resync of slider values: bank changed from {bank[0]}")
+            return
+        self._apply_sliders(sliders)
+
+    async def _resync_task_body(self, direction: int, bank: tuple) -> None:
+        # Cancellation takes effect at each await: a cancelled query is discarded, never applied
+        if direction is not None:
+            photo_id = await self._loop.run_in_executor(self._script_executor, self._wait_for_photo)
+            if photo_id is not None: # Cached values of the new photo right away, then queried values
+                await self._loop.run_in_executor(self._ui_executor, self._land_on_photo, photo_id, direction)
+            self._resync_direction = None # Landed
+        try:
+            sliders = await self._loop.run_in_executor(self._script_executor, self._query_sliders, bank[1])
+        except Exception as e:
+            print(f"Resync of slider values failed: {e}")
+            return
+        await self._loop.run_in_executor(self._ui_executor, self._apply_in_bank, bank, sliders)
+
+    async def _consume(self) -> None:
+        last_stats_time = time.monotonic()
+        while not self.queue.closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), EVENT_QUEUE_POLL_PERIOD)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while True:
+                message = self.queue.get(timeout=0)
+                if message is None:
+                    break
+                await self._loop.run_in_executor(self._ui_executor, self._handle_message, message)
+            await self._loop.run_in_executor(self._ui_executor, self._handle_idle)
+
+            if DIAGNOSTIC_MODE and time.monotonic() - last_stats_time >= EVENT_STATS_PERIOD:
+                print(f"Event queue: {self.queue.stats()}, cancelled resyncs: {self.cancelled_resyncs}, dropped resyncs: {self.dropped_resyncs}")
+                print(f"Slider updates per second: {await self._loop.run_in_executor(self._ui_executor, self._slider_rates)}")
+                last_stats_time = time.monotonic()
+
+        # Input ended: let scripts and the resyncs they start finish, then deliver what is pending
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._loop.run_in_executor(self._ui_executor, self._handle_close)
+
+    async def run(self, port_name: str = None, recorder=None) -> None:
+        """Run the runtime until the input is closed (see `close`).
+
+        Args:
+            port_name (str, optional): Name of MIDI input port to open. Defaults to None: messages are fed with `put`.
+            recorder (session.SessionRecorder, optional): Recorder to log received messages to. Defaults to None.
+        """
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._recorder = recorder
+        try:
+            if port_name is None:
+                await self._consume()
+            elif MIDI_CAPTURE_MODE == "process":
+                self.capture = MidiCapture(port_name, self._on_batch, self.close)
+                with self.capture:
+                    await self._consume()
+            else:
+                with mido.open_input(port_name, callback=self._on_message):
+                    await self._consume()
+        finally:
+            print(f"Event queue: {self.queue.stats()}, cancelled resyncs: {self.cancelled_resyncs}, dropped resyncs: {self.dropped_resyncs}")
+            if self.capture is not None:
+                print(f"MIDI capture: {self.capture.stats()}")
+            if metrics.enabled:
+                metrics.dump(METRICS_DUMP_PATH)
+            if self._recorder is not None:
+                self._recorder.close()
+            self._ui_executor.shutdown(wait=False, cancel_futures=True)
+            self._keys_executor.shutdown(wait=False, cancel_futures=True)
+            self._script_executor.shutdown(wait=False, cancel_futures=True)
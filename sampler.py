@@ -0,0 +1,149 @@
+# sampler.py
+# Time-based, velocity-adaptive sampling of slider values before they are sent to the UI.
+
+from constants import *
+
+class AdaptiveSampler:
+    """Limits UI updates to `max_rate` per slider, with a resolution that scales with fader velocity:
+    full resolution when moving slowly, steps of up to `coarse_step` when sweeping.
+    The final resting value of a fader is always delivered by `flush` once the fader settles.
+    """
+    def __init__(self, channels: int, max_rate: float = SAMPLER_MAX_RATE, fine_step: float = SAMPLER_FINE_STEP, coarse_step: float = QUANTIZE_MOD, fast_velocity: float = SAMPLER_FAST_VELOCITY, settle_time: float = SAMPLER_SETTLE_TIME):
+        """Initialize AdaptiveSampler class.
+
+        Args:
+            channels (int): Number of slider channels.
+            max_rate (float, optional): Max UI updates per second per slider. Defaults to SAMPLER_MAX_RATE.
+            fine_step (float, optional): HW step when the fader moves slowly. Defaults to SAMPLER_FINE_STEP.
+            coarse_step (float, optional): HW step when the fader moves at `fast_velocity` or faster. Defaults to QUANTIZE_MOD.
+            fast_velocity (float, optional): Fader velocity (HW units per second) of a fast sweep. Defaults to SAMPLER_FAST_VELOCITY.
+            settle_time (float, optional): Seconds without input after which the fader is at rest. Defaults to SAMPLER_SETTLE_TIME.
+        """
+        self.min_interval = 1 / max_rate
+        self.fast_velocity = fast_velocity
+        self.settle_time = settle_time
+
+        # Ladder of HW steps, doubling from fine_step up to coarse_step
+        self.steps = []
+        step = fine_step
+        while step < coarse_step:
+            self.steps.append(step)
+            step *= 2
+        self.steps.append(coarse_step)
+
+        self._last_input_time = [None] * channels
+        self._last_input = [0] * channels
+        self._velocity = [0.0] * channels # HW units per second, smoothed
+        self._last_emit_time = [float('-inf')] * channels
+        self._last_emitted = [None] * channels
+        self._pending = [None] * channels # Latest value not delivered at full resolution yet
+        self.has_pending = False
+
+        # Effective update rate
+        self._emitted = [0] * channels
+        self._rate_start_time = None
+
+    def offer(self, channel: int, hw_value: int, now: float) -> float:
+        """Offer a new HW value of a slider.
+
+        Args:
+            channel (int): Slider channel.
+            hw_value (int): HW slider value.
+            now (float): Current time in seconds (time.monotonic()).
+
+        Returns:
+            float: HW value to send to the UI, or None if this update is skipped.
+        """
+        if self._rate_start_time is None:
+            self._rate_start_time = now
+
+        # Fader velocity
+        last_input_time = self._last_input_time[channel]
+        if last_input_time is not None and now > last_input_time:
+            velocity = abs(hw_value - self._last_input[channel]) / (now - last_input_time)
+            self._velocity[channel] = (self._velocity[channel] + velocity) / 2
+        self._last_input_time[channel] = now
+        self._last_input[channel] = hw_value
+
+        # Rate limit
+        if now - self._last_emit_time[channel] < self.min_interval:
+            self._set_pending(channel, hw_value)
+            return None
+
+        # Resolution scales with velocity
+        step = self.steps[min(len(self.steps) - 1, int(self._velocity[channel] / self.fast_velocity * len(self.steps)))]
+        if hw_value == HW_SLIDER_MAX or hw_value == HW_SLIDER_MIN:
+            value = hw_value
+        else:
+            value = max(HW_SLIDER_MIN, min(HW_SLIDER_MAX, round(hw_value / step) * step))
+
+        if value != hw_value:
+            self._set_pending(channel, hw_value)
+        else:
+            self._pending[channel] = None
+
+        if value == self._last_emitted[channel]:
+            return None
+        return self._emit(channel, value, now)
+
+    def flush(self, now: float) -> list:
+        """Deliver the final resting value of every fader that settled.
+
+        Args:
+            now (float): Current time in seconds (time.monotonic()).
+
+        Returns:
+            list: (channel, hw_value) to send to the UI.
+        """
+        due = []
+        for channel in range(0, len(self._pending)):
+            value = self._pending[channel]
+            if value is None:
+                continue
+            if now - self._last_input_time[channel] < self.settle_time or now - self._last_emit_time[channel] < self.min_interval:
+                continue
+            self._pending[channel] = None
+            self._velocity[channel] = 0.0
+            if value != self._last_emitted[channel]:
+                due.append((channel, self._emit(channel, value, now)))
+        self.has_pending = any(value is not None for value in self._pending)
+        return due
+
+    def reset(self, channel: int) -> None:
+        """Forget the fader of a slider whose value was changed by other means (jog wheel, undo, UI),
+        so the next fader value is delivered even if it equals the last one sent.
+
+        Args:
+            channel (int): Slider channel.
+        """
+        self._last_input_time[channel] = None
+        self._velocity[channel] = 0.0
+        self._last_emitted[channel] = None
+        self._pending[channel] = None
+        self.has_pending = any(value is not None for value in self._pending)
+
+    def _set_pending(self, channel: int, hw_value: int) -> None:
+        self._pending[channel] = hw_value
+        self.has_pending = True
+
+    def _emit(self, channel: int, value: float, now: float) -> float:
+        self._last_emit_time[channel] = now
+        self._last_emitted[channel] = value
+        self._emitted[channel] += 1
+        return value
+
+    def rates(self, now: float) -> list:
+        """Get the effective UI update rate of each slider since the last call.
+
+        Args:
+            now (float): Current time in seconds (time.monotonic()).
+
+        Returns:
+            list: Updates per second, per slider channel.
+        """
+        if self._rate_start_time is None or now <= self._rate_start_time:
+            return [0.0] * len(self._emitted)
+        rates = [round(emitted / (now - self._rate_start_time), 1) for emitted in self._emitted]
+        self._emitted = [0] * len(self._emitted)
+        self._rate_start_time = now
+        return rates
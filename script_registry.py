@@ -0,0 +1,409 @@
+# script_registry.py
+# Registry of parameterized AppleScript templates: each template is compiled once, then run with arguments
+# (the `argv` of its run handler) instead of splicing values into new source on every call.
+# Compiled handles are kept in an LRU, behind a compiler interface: NSAppleScript on macOS, osascript, or a fake.
+
+import subprocess
+from collections import OrderedDict
+
+from constants import *
+
+# Finds an element of the Photos window by path: 1-based child indices from window 1, joined with "." (e.g. "3.1.2")
+ELEMENT_AT = '''
+on element_at(pathText)
+    set AppleScript's text item delimiters to "."
+    set indices to text items of pathText
+    set AppleScript's text item delimiters to ""
+    tell application "System Events"
+        tell process "Photos"
+            set thisElement to window 1
+            repeat with i in indices
+                set thisElement to UI element (i as integer) of thisElement
+            end repeat
+        end tell
+    end tell
+    return thisElement
+end element_at
+'''
+
+# Template name -> AppleScript source. Arguments are the items of `argv`, in order.
+TEMPLATES = {
+    # app name
+    "activate": '''
+on run argv
+    tell application (item 1 of argv) to activate
+end run
+''',
+    # key code
+    "key_code": '''
+on run argv
+    tell application "System Events" to key code (item 1 of argv as integer)
+end run
+''',
+    # key, pressed with the command key
+    "command_keystroke": '''
+on run argv
+    tell application "System Events" to keystroke (item 1 of argv) using {command down}
+end run
+''',
+    # role (e.g. "button"), description. O(n) walk of the Photos window
+    "click_by_description": '''
+on run argv
+    set wantedRole to item 1 of argv
+    set wanted to item 2 of argv
+    tell application "Photos" to activate
+    tell application "System Events"
+        tell process "Photos"
+            set listItems to (entire contents of window 1 as list)
+            repeat with thisItem in listItems
+                if (class of thisItem as text) is wantedRole then
+                    if description of thisItem is wanted then
+                        click thisItem
+                        exit repeat
+                    end if
+                end if
+            end repeat
+        end tell
+    end tell
+end run
+''',
+    # slider descriptions... One O(n) walk of the Photos window, stopping once all are found
+    "slider_attributes": '''
+on run argv
+    tell application "Photos" to activate
+    tell application "System Events"
+        tell process "Photos"
+            set found to 0
+            set itemVals to ""
+            set listItems to (entire contents of window 1 as list)
+            repeat with thisItem in listItems
+                if (class of thisItem is slider) then
+                    set thisDescription to description of thisItem
+                    if argv contains thisDescription then
+                        set {x, y} to position of thisItem
+                        set {w, h} to size of thisItem
+                        set itemVals to itemVals & thisDescription & tab & x & tab & y & tab & w & tab & h & tab & (value of thisItem) & linefeed
+                        set found to found + 1
+                        if found is (count of argv) then exit repeat
+                    end if
+                end if
+            end repeat
+            return itemVals
+        end tell
+    end tell
+end run
+''',
+    # slider name, value, adjustment group (e.g. "Light"). O(1): addressed by path
+    "set_slider_value": f'''
+on run argv
+    tell application "System Events"
+        tell process "Photos"
+            set value of slider (item 1 of argv) of group 1 of group (item 3 of argv) of {ADJUSTMENTS_PATH} to ((item 2 of argv) as real)
+        end tell
+    end tell
+end run
+''',
+    # slider name, adjustment group. O(1): addressed by path
+    "layout_probe": f'''
+on run argv
+    set photosVersion to version of application "Photos"
+    tell application "Finder" to set screenBounds to bounds of window of desktop
+    tell application "System Events"
+        tell process "Photos"
+            set {{wx, wy}} to position of window 1
+            set {{ww, wh}} to size of window 1
+            set {{sx, sy}} to position of slider (item 1 of argv) of group 1 of group (item 2 of argv) of {ADJUSTMENTS_PATH}
+        end tell
+    end tell
+    return photosVersion & tab & (item 1 of screenBounds) & tab & (item 2 of screenBounds) & tab & (item 3 of screenBounds) & tab & (item 4 of screenBounds) & tab & wx & tab & wy & tab & ww & tab & wh & tab & sx & tab & sy
+end run
+''',
+    # adjustment group, slider names... O(1) per slider: addressed by path, like "layout_probe"
+    "slider_values": f'''
+on run argv
+    set itemVals to ""
+    tell application "System Events"
+        tell process "Photos"
+            set sliderGroup to group 1 of group (item 1 of argv) of {ADJUSTMENTS_PATH}
+            repeat with i from 2 to (count of argv)
+                set itemVals to itemVals & (value of slider (item i of argv) of sliderGroup) & linefeed
+            end repeat
+        end tell
+    end tell
+    return itemVals
+end run
+''',
+    "photo_id": '''
+on run argv
+    tell application "Photos"
+        set selectedItems to selection
+        if selectedItems is {} then return ""
+        return id of item 1 of selectedItems
+    end tell
+end run
+''',
+    # Every element of the Photos window: path, class, name and description per line. See ax_tree.py
+    "walk_window": '''
+on walk(parentElement, parentPath)
+    set out to ""
+    tell application "System Events"
+        set children to UI elements of parentElement
+        repeat with i from 1 to count of children
+            set thisElement to item i of children
+            set thisPath to parentPath & i & "."
+            set thisName to name of thisElement
+            if thisName is missing value then set thisName to ""
+            set thisDescription to description of thisElement
+            if thisDescription is missing value then set thisDescription to ""
+            set out to out & thisPath & tab & (class of thisElement as text) & tab & thisName & tab & thisDescription & linefeed
+            set out to out & my walk(thisElement, thisPath)
+        end repeat
+    end tell
+    return out
+end walk
+
+on run argv
+    tell application "System Events"
+        tell process "Photos"
+            return my walk(window 1, "")
+        end tell
+    end tell
+end run
+''',
+    # element paths... One line per element: x, y, width, height, value (empty if not found)
+    "read_elements": ELEMENT_AT + '''
+on run argv
+    set out to ""
+    repeat with pathText in argv
+        try
+            set thisElement to my element_at(pathText as text)
+            tell application "System Events"
+                set {x, y} to position of thisElement
+                set {w, h} to size of thisElement
+                set out to out & x & tab & y & tab & w & tab & h & tab & (value of thisElement) & linefeed
+            end tell
+        on error
+            set out to out & linefeed
+        end try
+    end repeat
+    return out
+end run
+''',
+    # element path
+    "click_element": ELEMENT_AT + '''
+on run argv
+    set thisElement to my element_at(item 1 of argv)
+    tell application "System Events" to click thisElement
+end run
+''',
+    # element path, value
+    "set_element_value": ELEMENT_AT + '''
+on run argv
+    set thisElement to my element_at(item 1 of argv)
+    tell application "System Events" to set value of thisElement to ((item 2 of argv) as real)
+end run
+''',
+}
+
+class ScriptCompiler:
+    """Compiles AppleScript source into a handle, and runs compiled handles with arguments.
+    """
+    def compile(self, source: str):
+        """Compile a script.
+
+        Args:
+            source (str): AppleScript source, with a run handler taking `argv`.
+
+        Raises:
+            Exception: If the script does not compile.
+
+        Returns:
+            object: Compiled handle, passed to `execute`.
+        """
+        raise NotImplementedError
+
+    def execute(self, handle, args: list) -> tuple:
+        """Run the run handler of a compiled script.
+
+        Args:
+            handle (object): Compiled handle, see `compile`.
+            args (list): Arguments (str, int or float), the `argv` of the run handler.
+
+        Returns:
+            tuple: (code, out, err)
+        """
+        raise NotImplementedError
+
+def four_char_code(code: str) -> int:
+    return int.from_bytes(code.encode("ascii"), "big")
+
+def descriptor_to_text(descriptor) -> str:
+    """Convert an NSAppleEventDescriptor to text the same way osascript prints it.
+
+    Args:
+        descriptor (NSAppleEventDescriptor): Result of an executed script.
+
+    Returns:
+        str: Text form of the result. Lists are joined with ", ".
+    """
+    if descriptor is None:
+        return ''
+    text = descriptor.stringValue()
+    if text is not None:
+        return text
+    if descriptor.numberOfItems() > 0:
+        return ", ".join(descriptor_to_text(descriptor.descriptorAtIndex_(i)) for i in range(1, descriptor.numberOfItems() + 1))
+    return ''
+
+class NSAppleScriptCompiler(ScriptCompiler):
+    """Compile scripts in-process with NSAppleScript (needs PyObjC), and run them with an "open application"
+    event carrying the arguments, like osascript does. Arguments keep their type (no text round trip).
+    """
+    def __init__(self):
+        from Foundation import NSAppleEventDescriptor, NSAppleScript # Needs PyObjC: only import when this compiler is used
+        self._descriptor = NSAppleEventDescriptor
+        self._script = NSAppleScript
+
+    def compile(self, source: str):
+        handle = self._script.alloc().initWithSource_(source)
+        compiled, error = handle.compileAndReturnError_(None)
+        if not compiled:
+            raise Exception(f"AppleScript does not compile: {error.get('NSAppleScriptErrorMessage', error)}")
+        return handle
+
+    def _to_descriptor(self, arg):
+        if isinstance(arg, bool):
+            return self._descriptor.descriptorWithBoolean_(arg)
+        if isinstance(arg, int):
+            return self._descriptor.descriptorWithInt32_(arg)
+        if isinstance(arg, float):
+            return self._descriptor.descriptorWithDouble_(arg)
+        return self._descriptor.descriptorWithString_(str(arg))
+
+    def execute(self, handle, args: list) -> tuple:
+        argv = self._descriptor.listDescriptor()
+        for i, arg in enumerate(args):
+            argv.insertDescriptor_atIndex_(self._to_descriptor(arg), i + 1)
+        event = self._descriptor.appleEventWithEventClass_eventID_targetDescriptor_returnID_transactionID_(
+            four_char_code("aevt"), four_char_code("oapp"), self._descriptor.nullDescriptor(), -1, 0) # kAutoGenerateReturnID, kAnyTransactionID
+        event.setParamDescriptor_forKeyword_(argv, four_char_code("----")) # keyDirectObject
+        descriptor, error = handle.executeAppleEvent_error_(event, None)
+        if descriptor is None:
+            return int(error.get("NSAppleScriptErrorNumber", 1)) or 1, '', str(error.get("NSAppleScriptErrorMessage", error))
+        return 0, descriptor_to_text(descriptor), ''
+
+class OsascriptCompiler(ScriptCompiler):
+    """Run scripts with a new osascript process, arguments on its command line (fallback when PyObjC is not installed).
+    osascript compiles on every run: only the quoting of arguments is saved.
+    """
+    def compile(self, source: str):
+        return source
+
+    def execute(self, handle, args: list) -> tuple:
+        proc = subprocess.run(["osascript", "-"] + [str(arg) for arg in args], input=handle.encode("utf-8"), capture_output=True)
+        return proc.returncode, proc.stdout.decode("utf-8").rstrip(), proc.stderr.decode("utf-8").rstrip()
+
+class FakeCompiler(ScriptCompiler):
+    """Stand-in compiler for testing off macOS: counts compiles and runs, and echoes the arguments tab-separated.
+    """
+    def __init__(self):
+        self.compiles = 0
+        self.executions = 0
+
+    def compile(self, source: str):
+        self.compiles += 1
+        return source
+
+    def execute(self, handle, args: list) -> tuple:
+        self.executions += 1
+        return 0, "\t".join(str(arg) for arg in args), ''
+
+def make_compiler(executor: str) -> ScriptCompiler:
+    """Make the compiler of an executor.
+
+    Args:
+        executor (str): "nsapplescript" (falls back to osascript without PyObjC), "osascript" or "echo" (fake).
+
+    Returns:
+        ScriptCompiler: The compiler.
+    """
+    if executor == "echo":
+        return FakeCompiler()
+    if executor == "nsapplescript":
+        try:
+            return NSAppleScriptCompiler()
+        except ImportError:
+            pass
+    return OsascriptCompiler()
+
+class ScriptRegistry:
+    """Templates by name, compiled on first use and kept in an LRU of `capacity` compiled handles.
+    """
+    def __init__(self, compiler: ScriptCompiler, templates: dict = TEMPLATES, capacity: int = SCRIPT_CACHE_SIZE):
+        """Initialize ScriptRegistry class.
+
+        Args:
+            compiler (ScriptCompiler): Compiles and runs templates.
+            templates (dict, optional): Template name -> AppleScript source. Defaults to TEMPLATES.
+            capacity (int, optional): Max compiled templates kept. Defaults to SCRIPT_CACHE_SIZE.
+        """
+        self.compiler = compiler
+        self.templates = dict(templates)
+        self._capacity = capacity
+        self._compiled = OrderedDict() # name -> compiled handle, least recently used first
+        self.calls = 0
+        self.hits = 0
+        self.compiles = 0
+        self.evictions = 0
+
+    def register(self, name: str, source: str) -> None:
+        """Add or replace a template. A replaced template is compiled again on its next run.
+        """
+        self.templates[name] = source
+        self._compiled.pop(name, None)
+
+    def compiled(self, name: str):
+        """Get the compiled handle of a template, compiling it on a miss.
+
+        Raises:
+            Exception: If the template is unknown, or does not compile.
+        """
+        handle = self._compiled.get(name)
+        if handle is not None:
+            self.hits += 1
+            self._compiled.move_to_end(name)
+            return handle
+        if name not in self.templates:
+            raise Exception(f"Unknown script template {name}.")
+        handle = self.compiler.compile(self.templates[name])
+        self.compiles += 1
+        self._compiled[name] = handle
+        while len(self._compiled) > self._capacity:
+            self._compiled.popitem(last=False)
+            self.evictions += 1
+        return handle
+
+    def run(self, name: str, args: list) -> tuple:
+        """Run a template with arguments.
+
+        Args:
+            name (str): Template name.
+            args (list): Arguments, the `argv` of the template.
+
+        Returns:
+            tuple: (code, out, err). `code` is 1 if the template is unknown or does not compile.
+        """
+        self.calls += 1
+        try:
+            handle = self.compiled(name)
+        except Exception as e:
+            return 1, '', str(e)
+        return self.compiler.execute(handle, list(args))
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "compiles": self.compiles,
+            "hit_rate": round(self.hits / self.calls, 3) if self.calls else 0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,184 @@
+# session.py
+# Record MIDI sessions from the controller, and replay them through the handlers against a fake UI backend.
+# Usage: python3 session.py <recording> [--speed N | --fast]
+
+import argparse
+import asyncio
+import contextlib
+import io
+import struct
+import threading
+import time
+
+import mido
+
+from constants import *
+
+# File format: MAGIC, then one fixed-size record per message:
+# time since start of recording in seconds (float64), message length (uint8), message bytes (padded to 3).
+MAGIC = b"MIDIREC1"
+RECORD = struct.Struct("<dB3s")
+
+class SessionRecorder:
+    """Log timestamped MIDI messages to a compact session file.
+    """
+    def __init__(self, path: str):
+        """Initialize SessionRecorder class.
+
+        Args:
+            path (str): Path of session file to write.
+        """
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._start_time = time.perf_counter() # Clock of receive timestamps
+        self.count = 0
+
+    def record(self, message: mido.Message) -> None:
+        """Record a message, timestamped with the time it was received.
+
+        Args:
+            message (mido.Message): Message from controller, with its receive timestamp in `message.time` (time.perf_counter()).
+        """
+        data = bytes(message.bytes())
+        if len(data) > 3: # sysex: not sent by the controller
+            return
+        self._file.write(RECORD.pack(message.time - self._start_time, len(data), data))
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+def read_session(path: str) -> list:
+    """Read a session file.
+
+    Args:
+        path (str): Path of session file.
+
+    Raises:
+        Exception: If not a session file.
+
+    Returns:
+        list: (time, mido.Message) for every recorded message.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise Exception(f"{path} is not a MIDI session recording.")
+    return [(t, mido.Message.from_bytes(message_bytes[:length])) for t, length, message_bytes in RECORD.iter_unpack(data[len(MAGIC):])]
+
+class FakeOutput:
+    """Stand-in for the controller MIDI output port. Keeps the LED messages sent.
+    """
+    def __init__(self):
+        self.sent = 0
+        self.messages = []
+
+    def send(self, message: mido.Message) -> None:
+        self.sent += 1
+        self.messages.append(message)
+
+class ReplayProducer(threading.Thread):
+    """Thread that feeds recorded messages into the event runtime with their recorded timing.
+    """
+    def __init__(self, events: list, put, close, speed: float):
+        """Initialize ReplayProducer class.
+
+        Args:
+            events (list): (time, mido.Message) to replay.
+            put (function): Feeds a message, e.g. runtime.AsyncRuntime.put.
+            close (function): Ends the input once every message was fed, e.g. runtime.AsyncRuntime.close.
+            speed (float): Replay speed: 1 for real time, N for N times faster, 0 for as fast as possible.
+        """
+        super().__init__(name="replay-producer", daemon=True)
+        self._events = events
+        self._put = put
+        self._close = close
+        self._speed = speed
+
+    def run(self) -> None:
+        start_time = time.monotonic()
+        try:
+            for t, message in self._events:
+                if self._speed:
+                    delay = start_time + t / self._speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                message = message.copy(time=time.perf_counter()) # Receive timestamp, for latency metrics
+                self._put(message)
+        finally:
+            self._close()
+
+def setup_fake_session(action_delay: float = 0) -> None:
+    """Set up main.py to run against a fake UI backend and fake MIDI output, as after startup.
+
+    Args:
+        action_delay (float, optional): Seconds each fake UI action takes. Defaults to 0.
+    """
+    import main
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.init_profile(DEVICE_PROFILE)
+    main.init_ui_backend("fake")
+    main.ui.action_delay = action_delay
+    main.outport = FakeOutput()
+    main.init_leds()
+    main.current_photo_id = main.ui.photo_id()
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.get_init_slider_positions()
+        main.set_slider_constants()
+        main.set_init_slider_positions()
+    main.ui.actions.clear()
+
+def replay(events: list, speed: float = 1, action_delay: float = 0) -> dict:
+    """Replay recorded messages through the same event runtime and handlers as a live session.
+
+    Args:
+        events (list): (time, mido.Message) to replay. See `read_session`.
+        speed (float, optional): Replay speed: 1 for real time, N for N times faster, 0 for as fast as possible. Defaults to 1.
+        action_delay (float, optional): Seconds each fake UI action takes. Defaults to 0.
+
+    Returns:
+        dict: Replay report: messages, seconds, messages per second, UI actions, UI actions per message and LED messages.
+    """
+    import main
+
+    setup_fake_session(action_delay)
+
+    main.init_runtime()
+    runtime = main.runtime
+    producer = ReplayProducer(events, runtime.put, runtime.close, speed)
+    start_time = time.perf_counter()
+    producer.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(runtime.run())
+    finally:
+        main.runtime = None
+    elapsed = time.perf_counter() - start_time
+    main.leds.flush()
+
+    return {
+        "messages": len(events),
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(len(events) / elapsed, 1) if elapsed > 0 else 0,
+        "ui_actions": len(main.ui.actions),
+        "ui_actions_per_message": round(len(main.ui.actions) / len(events), 3) if events else 0,
+        "led_messages": main.leds.sent,
+        "queue": runtime.queue.stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded MIDI session against a fake UI backend.")
+    parser.add_argument("recording", help="Session file recorded with RECORD_SESSION_PATH")
+    parser.add_argument("--speed", type=float, default=1, help="Replay speed multiplier (default: real time)")
+    parser.add_argument("--fast", action="store_true", help="Replay as fast as possible")
+    parser.add_argument("--action-delay", type=float, default=0, help="Seconds each fake UI action takes")
+    args = parser.parse_args()
+
+    events = read_session(args.recording)
+    report = replay(events, speed=0 if args.fast else args.speed, action_delay=args.action_delay)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# slider_map.py
+# Precomputed HW slider value -> UI target lookup tables, one per slider.
+
+from array import array
+
+from constants import *
+
+class SliderMap:
+    """Lookup tables over the whole HW slider range (HW_SLIDER_MIN..HW_SLIDER_MAX) of one slider.
+    Index a table with `hw_value - HW_SLIDER_MIN`.
+
+    Tables:
+        x: Target x-coordinate of each HW value on screen (int32).
+        sw: Target slider value of each HW value, in SW_NUM_STEPS_SLIDER steps around 0 (int8).
+    """
+    __slots__ = ("geometry", "y", "x", "sw")
+
+    def __init__(self, x: int, y: int, width: int):
+        """Initialize SliderMap class.
+
+        Args:
+            x (int): Leftmost x-coordinate of the slider.
+            y (int): y-coordinate of the slider.
+            width (int): Width of the slider.
+        """
+        self.geometry = (x, y, width)
+        self.y = y + Y_OFFSET_SLIDER
+
+        const_scale = width / HW_SLIDER_RANGE
+        x_offset_slider_middle = width / 2
+        sw_scale = SW_NUM_STEPS_SLIDER / (HW_SLIDER_RANGE + 1)
+
+        self.x = array('i', (round(x + (const_scale * hw_value) + x_offset_slider_middle) for hw_value in range(HW_SLIDER_MIN, HW_SLIDER_MAX + 1)))
+        self.sw = array('b', (round(hw_value * sw_scale) for hw_value in range(HW_SLIDER_MIN, HW_SLIDER_MAX + 1)))
+
+    def index(self, hw_value: float) -> int:
+        """Get the table index of a HW value, clamped to the HW slider range.
+        """
+        return min(max(round(hw_value), HW_SLIDER_MIN), HW_SLIDER_MAX) - HW_SLIDER_MIN
+
+    def point(self, hw_value: float) -> tuple:
+        """Get the (x, y) UI coordinates of a HW value.
+        """
+        return (self.x[self.index(hw_value)], self.y)
+
+    def sw_value(self, hw_value: float) -> float:
+        """Get the slider value of a HW value, in the -1..1 range used by Photos.
+        """
+        return self.sw[self.index(hw_value)] / (SW_NUM_STEPS_SLIDER / 2)
+
+def update_slider_maps(slider_maps: list, slider_coords: list, slider_width: int) -> list:
+    """Update the slider maps of all sliders, rebuilding only the ones whose geometry changed.
+
+    Args:
+        slider_maps (list): Current SliderMap (or None) per slider.
+        slider_coords (list): Leftmost (x, y) UI coordinates of each slider, or (None, None) if not resolved yet.
+        slider_width (int): Width of the sliders.
+
+    Returns:
+        list: Updated SliderMap per slider, or None for sliders not resolved yet.
+    """
+    updated = []
+    for i in range(0, len(slider_coords)):
+        if slider_coords[i][0] is None: # Not resolved yet
+            updated.append(None)
+            continue
+        geometry = (slider_coords[i][0], slider_coords[i][1], slider_width)
+        if i < len(slider_maps) and slider_maps[i] is not None and slider_maps[i].geometry == geometry:
+            updated.append(slider_maps[i])
+        else:
+            updated.append(SliderMap(*geometry))
+    return updated
@@ -0,0 +1,150 @@
+# slider_state.py
+# Compact model of the controller's slider state: recent HW values per slider in fixed-size ring buffers,
+# and per-slider undo/redo history of committed values. Preallocated: nothing grows in the hot path.
+
+from array import array
+
+from constants import *
+
+class SliderState:
+    """State of the sliders of the controller.
+
+    Attributes:
+        channel: Slider the controller adjusts (last fader moved, or track selected).
+        last_channel: Slider shown as active on the track LEDs, or None.
+        width: Width of the sliders in the Photos UI, or None until resolved.
+
+    Values: the last `capacity` HW values of each slider, in a ring buffer.
+    History: the last `depth` committed HW values of each slider (the value at the end of an edit),
+    with a cursor for undo/redo. Edits are committed once the slider settles (see `commit_settled`).
+    """
+    __slots__ = ("channels", "channel", "last_channel", "width",
+                 "_capacity", "_values", "_heads",
+                 "_depth", "_history", "_history_start", "_history_length", "_history_cursor",
+                 "_dirty", "_changed_time")
+
+    def __init__(self, channels: int, capacity: int = SLIDER_BUFFER_SIZE, depth: int = SLIDER_UNDO_DEPTH):
+        """Initialize SliderState class.
+
+        Args:
+            channels (int): Number of sliders.
+            capacity (int, optional): Recent HW values kept per slider. Defaults to SLIDER_BUFFER_SIZE.
+            depth (int, optional): Committed values kept per slider for undo/redo. Defaults to SLIDER_UNDO_DEPTH.
+        """
+        self.channels = channels
+        self.channel = 0
+        self.last_channel = None
+        self.width = None
+
+        self._capacity = capacity
+        self._values = array('d', [0.0] * (channels * capacity))
+        self._heads = array('i', [0] * channels) # Index of the last value of each slider, in its ring
+
+        self._depth = depth
+        self._history = array('d', [0.0] * (channels * depth))
+        self._history_start = array('i', [0] * channels) # Ring index of the oldest committed value
+        self._history_length = array('i', [1] * channels) # Committed values (the initial value counts)
+        self._history_cursor = array('i', [0] * channels) # Offset from start of the current value (< length)
+
+        self._dirty = array('b', [0] * channels) # Changed since last commit
+        self._changed_time = array('d', [0.0] * channels)
+
+    ### Recent values
+
+    def last(self, channel: int) -> float:
+        """Get the last HW value of a slider.
+        """
+        return self._values[channel * self._capacity + self._heads[channel]]
+
+    def push(self, channel: int, hw_value: float, now: float) -> None:
+        """Record a new HW value of a slider, overwriting the oldest one.
+
+        Args:
+            channel (int): Slider channel.
+            hw_value (float): HW slider value.
+            now (float): Current time in seconds (time.monotonic()).
+        """
+        head = (self._heads[channel] + 1) % self._capacity
+        self._heads[channel] = head
+        self._values[channel * self._capacity + head] = hw_value
+        self._dirty[channel] = 1
+        self._changed_time[channel] = now
+
+    def set_last(self, channel: int, hw_value: float, now: float) -> None:
+        """Change the last HW value of a slider in place (e.g. fine grain jog adjustments).
+        """
+        self._values[channel * self._capacity + self._heads[channel]] = hw_value
+        self._dirty[channel] = 1
+        self._changed_time[channel] = now
+
+    def reset(self, channel: int, hw_value: float) -> None:
+        """Set the value of a slider read from the Photos app (startup, resync, another photo): it becomes
+        the last value and the only entry of the history.
+        """
+        head = (self._heads[channel] + 1) % self._capacity
+        self._heads[channel] = head
+        self._values[channel * self._capacity + head] = hw_value
+        self._history[channel * self._depth] = hw_value
+        self._history_start[channel] = 0
+        self._history_length[channel] = 1
+        self._history_cursor[channel] = 0
+        self._dirty[channel] = 0
+
+    ### Undo history
+
+    def commit(self, channel: int) -> None:
+        """Commit the last value of a slider to its history, if changed. Values that were undone can't be redone after.
+        """
+        if not self._dirty[channel]:
+            return
+        self._dirty[channel] = 0
+        hw_value = self.last(channel)
+        if hw_value == self._history_value(channel, self._history_cursor[channel]):
+            return
+
+        length = self._history_cursor[channel] + 1 # Drop redo entries
+        if length == self._depth: # Full: forget the oldest value
+            self._history_start[channel] = (self._history_start[channel] + 1) % self._depth
+            length -= 1
+        self._history[channel * self._depth + (self._history_start[channel] + length) % self._depth] = hw_value
+        self._history_length[channel] = length + 1
+        self._history_cursor[channel] = length
+
+    def commit_settled(self, now: float, settle_time: float) -> None:
+        """Commit the values of sliders not changed for `settle_time` seconds.
+        """
+        for channel in range(0, self.channels):
+            if self._dirty[channel] and now - self._changed_time[channel] >= settle_time:
+                self.commit(channel)
+
+    def undo(self, channel: int) -> float:
+        """Step back in the history of a slider. Uncommitted changes are committed first, so they can be undone.
+
+        Returns:
+            float: HW value to move the slider to, or None if there is nothing to undo.
+        """
+        self.commit(channel)
+        if self._history_cursor[channel] == 0:
+            return None
+        self._history_cursor[channel] -= 1
+        return self._history_value(channel, self._history_cursor[channel])
+
+    def redo(self, channel: int) -> float:
+        """Step forward in the history of a slider.
+
+        Returns:
+            float: HW value to move the slider to, or None if there is nothing to redo.
+        """
+        self.commit(channel)
+        if self._history_cursor[channel] + 1 >= self._history_length[channel]:
+            return None
+        self._history_cursor[channel] += 1
+        return self._history_value(channel, self._history_cursor[channel])
+
+    def mark_clean(self, channel: int) -> None:
+        """Mark the last value of a slider as matching its history cursor (after moving it to an undo/redo value).
+        """
+        self._dirty[channel] = 0
+
+    def _history_value(self, channel: int, offset: int) -> float:
+        return self._history[channel * self._depth + (self._history_start[channel] + offset) % self._depth]
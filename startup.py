@@ -0,0 +1,70 @@
+# startup.py
+# Timing of startup stages, some of which run in parallel threads, to track cold-start time.
+
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+class StartupTimer:
+    """Records the duration of startup stages, and the time of milestones since startup began.
+    Thread-safe: stages may run in parallel threads.
+    """
+    def __init__(self):
+        self._start_time = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {} # stage name -> seconds
+        self.milestones = {} # milestone name -> seconds since start
+        self.error = None # First exception raised by a stage thread
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage: `with startup.stage("midi_io"): ...`
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stages[name] = elapsed
+            if metrics.enabled:
+                metrics.observe("startup", name, elapsed)
+
+    def start_stage(self, name: str, func) -> threading.Thread:
+        """Run a timed stage in a new thread. Its exception, if any, is kept in `error`.
+
+        Args:
+            name (str): Stage name.
+            func (function): Stage function, called without arguments.
+
+        Returns:
+            threading.Thread: The started thread.
+        """
+        def run():
+            try:
+                with self.stage(name):
+                    func()
+            except Exception as e:
+                with self._lock:
+                    if self.error is None:
+                        self.error = e
+                raise
+        thread = threading.Thread(target=run, name=f"startup-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def mark(self, name: str) -> None:
+        """Record a milestone, the first time it is reached.
+        """
+        with self._lock:
+            self.milestones.setdefault(name, time.perf_counter() - self._start_time)
+
+    def report(self) -> str:
+        """Get a one-line report of stage durations and milestones, in ms.
+        """
+        with self._lock:
+            stages = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.stages.items())
+            milestones = ", ".join(f"{name} at {seconds * 1000:.0f} ms" for name, seconds in self.milestones.items())
+        return f"Startup stages: {stages}. Milestones: {milestones}."
@@ -0,0 +1,31 @@
+# conftest.py
+# Shared fixtures: the modules of the controller are flat top-level modules of the repository.
+
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def main(monkeypatch, tmp_path):
+    """Fresh main.py globals, set up for a headless run: fake UI backend, no worker pool, no layout cache on disk.
+    """
+    import main as main_module
+    main_module = importlib.reload(main_module)
+    monkeypatch.setattr(main_module, "UI_BACKEND", "fake")
+    monkeypatch.setattr(main_module, "APPLESCRIPT_POOL_SIZE", 0)
+    monkeypatch.setattr(main_module, "LAYOUT_CACHE_PATH", str(tmp_path / "layout.json"))
+    yield main_module
+    if main_module.leds is not None:
+        main_module.leds.close()
+
+@pytest.fixture
+def fake_session(main):
+    """main.py set up against a fake UI backend and fake MIDI output, as after startup. See session.setup_fake_session.
+    """
+    import session
+    session.setup_fake_session()
+    return main
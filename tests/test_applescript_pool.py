@@ -0,0 +1,53 @@
+# test_applescript_pool.py
+# Pool of warm AppleScript workers, with the "echo" executor (see applescript_worker.py).
+
+import threading
+import time
+
+import pytest
+
+from applescript_pool import ScriptPool
+
+@pytest.fixture
+def pool():
+    pool = ScriptPool(size=2, executor="echo")
+    yield pool
+    pool.close()
+
+def test_templates_run_with_arguments(pool):
+    result = pool.run_template("command_keystroke", ['"; do shell script "rm -rf ~']) # Passed as a value, never spliced
+    assert (result.code, result.out, result.err) == (0, '"; do shell script "rm -rf ~', '')
+    assert pool.run_template("no_such_template", []).code == 1
+
+def test_requests_run_in_parallel(pool):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.run_template("sleep", [0.3]))) for i in range(0, 2)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.perf_counter() - started < 0.55
+    assert [result.code for result in results] == [0, 0]
+
+def test_crashed_worker_is_restarted(pool):
+    result = pool.run_template("crash", [])
+    assert result.code == -1 and "crashed" in result.err
+    for i in range(0, 4): # Both workers, including the restarted one
+        assert pool.run_template("key_code", [i]).out == str(i)
+    assert pool.restarts == 1
+
+def test_timed_out_worker_is_restarted(pool):
+    result = pool.run_template("sleep", [2], timeout=0.1)
+    assert result.code == -1 and "timed out" in result.err
+    for i in range(0, 4):
+        assert pool.run_template("key_code", [i]).out == str(i)
+    assert pool.restarts == 1
+
+def test_templates_compiled_once_per_worker(pool):
+    for i in range(0, 100):
+        pool.run_template("key_code", [i])
+    stats = pool.template_stats()
+    assert stats["calls"] == 100
+    assert stats["compiles"] == 2
+    assert stats["hit_rate"] == 0.98
@@ -0,0 +1,66 @@
+# test_ax_tree.py
+# Accessibility query layer over a simulated Photos window, and its use by the UI backends.
+
+import pytest
+
+from ax_tree import PHOTOS_ADJUSTMENTS, AccessibilityQuery, SimulatedPhotosSource
+
+def test_indexed_lookup_by_group():
+    source = SimulatedPhotosSource(size=5000)
+    query = AccessibilityQuery(source)
+    assert query.build_index("Light")
+    source.visited = 0
+    sliders = query.find_sliders(["Intensity", "Edges"], "Sharpen")
+    assert set(sliders) == {"Intensity", "Edges"}
+    assert source.visited < 50 # Read by path, no walk
+
+def test_failed_walk_installs_no_index():
+    query = AccessibilityQuery(SimulatedPhotosSource(groups={})) # Edit pane closed: no sliders
+    assert not query.build_index()
+    assert query.index is None
+
+    query = AccessibilityQuery(SimulatedPhotosSource(groups={"Color": PHOTOS_ADJUSTMENTS["Color"]}))
+    assert not query.build_index("Light")
+    assert query.index is None
+
+def test_empty_walk_keeps_previous_index():
+    source = SimulatedPhotosSource()
+    query = AccessibilityQuery(source)
+    assert query.build_index("Light")
+    index = query.index
+    source.root.children = [] # Edit pane closed
+    assert not query.build_index("Light")
+    assert query.index is index
+
+def test_query_sliders_retries_are_capped(fake_session):
+    main = fake_session
+    main.ui.load_delay = 60
+    main.ui.send_keys("key_code", 124) # Next photo, never loads: sliders can't be queried
+    main.ui.actions.clear()
+    with pytest.raises(Exception, match="Could not find sliders"):
+        main.query_sliders()
+    assert [action for _, action, _, _ in main.ui.actions] == ["open_edit_pane"] * (main.QUERY_SLIDERS_ATTEMPTS - 1)
+
+def test_failed_index_keeps_walking(fake_session, monkeypatch):
+    main = fake_session
+    monkeypatch.setattr(main.ui, "element_source", lambda: SimulatedPhotosSource(groups={}))
+    main.banks = None
+    main.init_banks()
+    assert main.banks is None
+    assert main.ui.element_query.index is None
+    main.select_bank("Color") # Indexing fails again: stays on the current bank
+    assert main.current_bank == "Light"
+
+def test_query_sliders_falls_back_to_walk(monkeypatch):
+    import ui_backend
+    walked = []
+    monkeypatch.setattr(ui_backend, "get_applescript_slider_attributes_by_descriptions", lambda names: walked.append(names) or {})
+    monkeypatch.setattr(ui_backend.UIBackend, "element_source", lambda self: SimulatedPhotosSource())
+    backend = ui_backend.UIBackend()
+    backend.set_bank("Light", ["Brilliance"])
+    assert backend.index_elements()
+    assert "Brilliance" in backend.query_sliders(["Brilliance"])
+    assert walked == []
+    backend.set_bank("Sharpen", ["Brilliance"]) # Not in the group: missing from the index
+    backend.query_sliders(["Brilliance"])
+    assert walked == [["Brilliance"]]
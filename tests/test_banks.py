@@ -0,0 +1,52 @@
+# test_banks.py
+# Bank buttons: the faders are mapped to the sliders of another adjustment group of the Photos app.
+
+import mido
+
+from ax_tree import PHOTOS_ADJUSTMENTS
+
+LIGHT, COLOR, DETAIL = 54, 55, 57
+
+def press(main, note: int) -> None:
+    main.handle_message(mido.Message("note_on", note=note, velocity=127))
+
+def test_bank_button_maps_faders_to_group(fake_session):
+    main = fake_session
+    press(main, COLOR)
+    assert main.current_bank == "Color"
+    assert main.channel_names == PHOTOS_ADJUSTMENTS["Color"]
+    assert main.leds.get(COLOR) == 127 and main.leds.get(LIGHT) == 0
+
+    main.handle_message(mido.Message("pitchwheel", channel=0, pitch=4096))
+    main.handle_message(mido.Message("pitchwheel", channel=5, pitch=4096)) # No slider in this bank
+    assert main.ui.photo_values[(0, "Color")]["Saturation"] == 4096 * 2 / (main.HW_SLIDER_RANGE + 1)
+    assert main.ui.photo_values[(0, "Light")]["Exposure"] == 0.0
+
+def test_bank_button_cycles_through_its_groups(fake_session):
+    main = fake_session
+    banks = []
+    for i in range(0, 4):
+        press(main, DETAIL)
+        banks.append(main.current_bank)
+    assert banks == ["Noise Reduction", "Sharpen", "Definition", "Noise Reduction"]
+    main.handle_message(mido.Message("note_on", note=DETAIL, velocity=0)) # Release
+    assert main.current_bank == "Noise Reduction"
+
+def test_values_synced_when_switching_back(fake_session):
+    main = fake_session
+    main.handle_message(mido.Message("pitchwheel", channel=1, pitch=4096))
+    press(main, COLOR)
+    assert main.slider_state.last(1) == 0 # Vibrance
+    press(main, LIGHT)
+    assert main.current_bank == "Light"
+    assert main.slider_state.last(1) == 4096 # Exposure, as left in the Photos app
+
+def test_failed_switch_stays_on_bank(fake_session, monkeypatch):
+    main = fake_session
+    names = list(main.channel_names)
+    def query_sliders(names=None):
+        raise Exception("Edit pane closed")
+    monkeypatch.setattr(main, "query_sliders", query_sliders)
+    press(main, COLOR)
+    assert main.current_bank == "Light"
+    assert main.channel_names == names
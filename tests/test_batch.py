@@ -0,0 +1,48 @@
+# test_batch.py
+# Batch edits against the fake UI backend: an adjustment set applied to the next photos, once each has loaded.
+
+import contextlib
+import io
+import time
+
+import pytest
+
+import batch
+
+def test_adjustments_applied_to_next_photos(main):
+    batch.setup_dry_run(action_delay=0, load_delay=0.05)
+    adjustments = batch.capture_adjustments()
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = batch.run_batch(3, poll_period=0.005)
+
+    assert report["photos"] == 3
+    assert report["sliders_moved"] == 3 * 6 # One slider of the set is at 0, like the sliders of the new photos
+    assert report["mean_wait_seconds"] >= 0.05 # Each photo loaded before its sliders were set
+    assert main.current_photo_id == "fake-photo-3"
+    for photo in range(1, 4):
+        values = main.ui.photo_values[(photo, main.ui.group)]
+        assert values == {name: pytest.approx(value, abs=0.005) for name, value in adjustments.items()}
+    assert not main.gesture.active # Mouse released
+
+def test_sliders_already_set_are_skipped(fake_session):
+    main = fake_session
+    sliders = main.query_sliders()
+    adjustments = {name: 0.0 for name in main.channel_names}
+    adjustments[main.channel_names[1]] = 0.5
+    assert batch.apply_adjustments(adjustments, sliders) == 1
+    assert main.ui.sw_values[main.channel_names[1]] == 0.5
+
+def test_wait_for_photo_while_it_loads(fake_session):
+    main = fake_session
+    main.ui.load_delay = 0.1
+    main.ui.send_keys("key_code", 124)
+    started = time.monotonic()
+    photo_id, sliders = batch.wait_until_ready("fake-photo-0", timeout=1, poll_period=0.005)
+    assert time.monotonic() - started >= 0.09
+    assert photo_id == "fake-photo-1"
+    assert set(sliders) == set(main.channel_names)
+
+def test_no_next_photo(fake_session):
+    main = fake_session
+    with pytest.raises(Exception, match="not ready"):
+        batch.wait_for_photo_id(main.ui, main.current_photo_id, timeout=0.05, poll_period=0.005)
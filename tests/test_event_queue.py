@@ -0,0 +1,87 @@
+# test_event_queue.py
+# Coalescing event queue between MIDI input and the handlers.
+
+import asyncio
+
+import mido
+
+from event_queue import EventQueue, JogDelta
+
+JOG = 60
+
+def drain(queue: EventQueue) -> list:
+    queue.close()
+    messages = []
+    while not queue.closed:
+        messages.append(queue.get(timeout=0))
+    return messages
+
+def describe(message) -> tuple:
+    if isinstance(message, JogDelta):
+        return ("jog", message.ticks)
+    if message.type == "pitchwheel":
+        return ("pitch", message.pitch)
+    return ("note", message.note)
+
+def test_pitch_coalesced_per_channel():
+    queue = EventQueue()
+    for pitch in range(0, 100):
+        queue.put(mido.Message("pitchwheel", channel=pitch % 2, pitch=pitch))
+    messages = drain(queue)
+    assert [(message.channel, message.pitch) for message in messages] == [(0, 98), (1, 99)]
+    assert queue.stats()["coalesced"] == 98
+
+def test_notes_never_dropped():
+    queue = EventQueue(max_pending=4)
+    queue.put_many([mido.Message("note_on", note=47, velocity=127 * (i % 2)) for i in range(0, 100)])
+    queue.put(mido.Message("aftertouch", value=1)) # Other messages are dropped once the queue is full
+    messages = drain(queue)
+    assert len(messages) == 100
+    assert queue.stats()["dropped"] == 1
+
+def test_jog_ticks_coalesced_per_control():
+    queue = EventQueue(max_pending=4, jog_control=JOG)
+    queue.put(mido.Message("note_on", note=47, velocity=127))
+    for i in range(0, 300):
+        queue.put(mido.Message("control_change", control=JOG, value=1 if i < 200 else 65, time=i))
+    queue.put(mido.Message("note_on", note=47, velocity=0))
+    messages = drain(queue)
+
+    assert [message.type for message in messages] == ["note_on", "control_change", "note_on"]
+    jog = messages[1]
+    assert isinstance(jog, JogDelta)
+    assert jog.ticks == {1: 200, 65: 100}
+    assert jog.time == 299 # Latest tick
+    assert queue.stats()["dropped"] == 0
+
+def test_jog_handler_applies_counted_ticks(fake_session):
+    main = fake_session
+    main.init_runtime()
+    runtime = main.runtime
+    for i in range(0, 5):
+        runtime.put(mido.Message("control_change", control=JOG, value=1, time=i * 0.1))
+    runtime.put(mido.Message("control_change", control=JOG, value=65, time=0.5))
+    runtime.close()
+    before = main.slider_state.last(0)
+    asyncio.run(runtime.run())
+
+    # One delta of 6 ticks (net 4 right) received over 0.5 s: accelerated at their receive rate,
+    # however late they are handled
+    steps = 4 * main.jog.multiplier(6 / 0.5)
+    assert main.slider_state.last(0) == before + steps * main.FINE_GRAIN_DELTA
+    assert not main.jog.pending
+
+def test_notes_are_barriers():
+    queue = EventQueue(jog_control=JOG)
+    queue.put(mido.Message("control_change", control=JOG, value=1))
+    queue.put(mido.Message("note_on", note=9, velocity=127)) # Track select
+    queue.put(mido.Message("control_change", control=JOG, value=1))
+    queue.put(mido.Message("pitchwheel", channel=0, pitch=1000))
+    queue.put(mido.Message("note_on", note=55, velocity=127)) # Color bank
+    queue.put(mido.Message("pitchwheel", channel=0, pitch=-3000))
+    queue.put(mido.Message("pitchwheel", channel=0, pitch=-2000))
+    messages = drain(queue)
+
+    assert [describe(message) for message in messages] == [
+        ("jog", {1: 1}), ("note", 9), ("jog", {1: 1}), ("pitch", 1000), ("note", 55), ("pitch", -2000),
+    ]
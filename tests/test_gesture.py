@@ -0,0 +1,51 @@
+# test_gesture.py
+# Fader gestures: one mouse press, moves while held, one release.
+
+import mido
+
+from gesture import GestureEngine
+from ui_backend import FakeBackend
+
+def actions(ui: FakeBackend) -> list:
+    return [(action, channel, hw_value) for _, action, channel, hw_value in ui.actions]
+
+def test_press_move_release_on_idle():
+    ui = FakeBackend(["Exposure", "Contrast"])
+    gesture = GestureEngine(ui, idle_timeout=0.25)
+    gesture.move(0, 100, 0.0)
+    gesture.move(0, 200, 0.1)
+    gesture.idle(0.3) # 0.2 s since the last move
+    assert gesture.active
+    gesture.move(0, 300, 0.3)
+    gesture.idle(0.55)
+    assert not gesture.active
+    assert actions(ui) == [
+        ("press_slider", 0, 100),
+        ("move_pressed_slider", 0, 200),
+        ("move_pressed_slider", 0, 300),
+        ("release_slider", 0, None),
+    ]
+    assert gesture.gestures == 1
+
+def test_other_slider_starts_a_new_gesture():
+    ui = FakeBackend(["Exposure", "Contrast"])
+    gesture = GestureEngine(ui)
+    gesture.move(0, 100, 0.0)
+    gesture.move(1, 200, 0.01)
+    gesture.release()
+    gesture.release() # Nothing held
+    assert actions(ui) == [
+        ("press_slider", 0, 100),
+        ("release_slider", 0, None),
+        ("press_slider", 1, 200),
+        ("release_slider", 1, None),
+    ]
+    assert gesture.gestures == 2
+
+def test_button_releases_the_mouse(fake_session):
+    main = fake_session
+    main.handle_message(mido.Message("pitchwheel", channel=0, pitch=4096))
+    assert main.gesture.active
+    main.handle_message(mido.Message("note_on", note=9, velocity=127)) # Track select: points the mouse at another slider
+    assert not main.gesture.active
+    assert [action for _, action, _, _ in main.ui.actions] == ["press_slider", "release_slider", "point_at_slider"]
@@ -0,0 +1,62 @@
+# test_jog.py
+# Accumulation of jog wheel ticks into accelerated slider moves.
+
+from jog import JogAccumulator
+
+def test_single_tick_is_one_step():
+    jog = JogAccumulator(window=0.03)
+    assert jog.tick(0, 1, 0.0) == []
+    assert jog.flush(0.01) == [] # Window not over
+    assert jog.flush(0.03) == [(0, 1)]
+    assert not jog.pending
+
+def test_ticks_accumulated_over_window():
+    jog = JogAccumulator(window=0.03, curve=[(0, 1), (150, 4)])
+    for i in range(0, 3):
+        jog.tick(0, -1, i * 0.01) # Slow: 3 ticks over 30 ms
+    assert jog.flush(float('inf')) == [(0, -3)]
+    for i in range(0, 6):
+        jog.tick(0, 1, i * 0.001) # Fast: 200 ticks per second
+    assert jog.flush(float('inf')) == [(0, 24)]
+
+def test_opposite_ticks_cancel():
+    jog = JogAccumulator()
+    jog.tick(0, 1, 0.0)
+    jog.tick(0, -1, 0.001)
+    assert jog.flush(float('inf')) == []
+
+def test_slider_change_delivers_previous_ticks():
+    jog = JogAccumulator(window=1)
+    jog.tick(0, 1, 0.0)
+    assert jog.tick(1, -1, 0.1) == [(0, 1)]
+    assert jog.flush(float('inf')) == [(1, -1)]
+
+def test_counted_ticks():
+    jog = JogAccumulator(window=0.03, curve=[(0, 1), (100, 4)])
+    jog.tick(0, 1, 0.0, count=5)
+    jog.tick(0, -1, 0.0, count=1)
+    assert jog.flush(float('inf')) == [(0, 16)] # Net 4 ticks, at 6 ticks per window
+
+def test_counted_ticks_rate_from_span():
+    jog = JogAccumulator(window=0.03, curve=[(0, 1), (100, 4)])
+    assert jog.tick(0, 1, 1.0, count=3, span=0.2) == [(0, 3)] # Slow ticks handled late: 15 ticks/s, not accelerated
+    assert jog.tick(0, 1, 2.0, count=3, span=0.02) == []
+    assert jog.flush(2.03) == [(0, 12)] # Burst: 100 ticks/s
+
+def test_fader_after_jog_is_not_skipped(fake_session):
+    import mido
+    main = fake_session
+    name = main.channel_names[0]
+    main.handle_message(mido.Message("pitchwheel", channel=0, pitch=4096))
+    assert main.ui.sw_values[name] == 4096 * 2 / (main.HW_SLIDER_RANGE + 1)
+    for i in range(0, 3):
+        main.handle_message(mido.Message("control_change", channel=0, control=main.profile.jog_control, value=1))
+    for channel, steps in main.jog.flush(float('inf')):
+        main.jog_handler_helper(channel, steps)
+    assert main.ui.sw_values[name] > 4096 * 2 / (main.HW_SLIDER_RANGE + 1)
+
+    # Fader back to where it was before the jog: the slider moves back
+    main.handle_message(mido.Message("pitchwheel", channel=0, pitch=4096))
+    for channel, hw_value in main.sampler.flush(float('inf')):
+        main.move_slider(channel, hw_value)
+    assert main.ui.sw_values[name] == 4096 * 2 / (main.HW_SLIDER_RANGE + 1)
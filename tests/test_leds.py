@@ -0,0 +1,41 @@
+# test_leds.py
+# LED framebuffer: only the LEDs whose state differs from what the controller shows are sent.
+
+import mido
+
+from leds import LedFramebuffer
+from session import FakeOutput
+
+def sent(output: FakeOutput) -> list:
+    return [(message.note, message.velocity) for message in output.messages]
+
+def test_only_diffs_are_sent():
+    output = FakeOutput()
+    leds = LedFramebuffer(output)
+    leds.set(8, 127)
+    leds.set(8, 0) # Changed again before it was sent: only the last state is sent
+    leds.set(9, 127)
+    leds.start()
+    leds.flush()
+    assert sent(output) == [(8, 0), (9, 127)]
+
+    leds.set(9, 127) # Already shown
+    leds.set(10, 0)
+    leds.flush()
+    leds.close()
+    assert sent(output) == [(8, 0), (9, 127), (10, 0)]
+
+def test_selected_track_stays_green(fake_session):
+    main = fake_session
+    select = {channel: note for note, channel in main.profile.track_select.items()} # Track buttons light their own LED
+    track_led = main.profile.track_leds[0]
+    main.handle_message(mido.Message("note_on", note=select[1], velocity=127))
+    main.handle_message(mido.Message("note_on", note=select[0], velocity=127))
+    assert main.leds.get(track_led) == 0 # Green: red off
+    assert main.leds.get(main.profile.track_leds[1]) == 127 # Orange: red back on
+
+    # Pressing the selected track again echoes its red LED on: it must not turn orange
+    main.handle_message(mido.Message("note_on", note=select[0], velocity=127))
+    main.leds.flush()
+    assert main.leds.get(track_led) == 0
+    assert [velocity for note, velocity in sent(main.outport) if note == track_led][-1] == 0
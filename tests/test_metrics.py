@@ -0,0 +1,29 @@
+# test_metrics.py
+# Latency histograms, sampled from several threads and dumped on a signal.
+
+import threading
+
+import metrics
+
+def test_observe_from_threads_while_dumping():
+    metrics.reset()
+    def observe(handler):
+        for i in range(0, 2000):
+            metrics.observe(handler, f"stage{i % 50}", 0.001)
+    threads = [threading.Thread(target=observe, args=(handler,)) for handler in ("ui", "led", "applescript")]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        metrics.to_prometheus() # New histograms are added meanwhile
+    for thread in threads:
+        thread.join()
+
+    assert sum(histogram.count for histogram in metrics.snapshot().values()) == 6000
+    metrics.reset()
+
+def test_signal_dump_reports_errors(tmp_path, capsys):
+    metrics.dump_in_background(str(tmp_path)) # A directory: cannot be written
+    for thread in threading.enumerate():
+        if thread.name == "metrics-dump":
+            thread.join()
+    assert "Could not write metrics" in capsys.readouterr().out
@@ -0,0 +1,68 @@
+# test_midi_capture.py
+# Shared-memory ring of the MIDI capture process, and the capture itself with a stand-in capture process.
+
+import threading
+
+from midi_capture import READ, WRITTEN, CaptureRing, MidiCapture
+
+NOTES = 500
+
+def test_ring_reads_records_in_order_across_wraparound():
+    ring = CaptureRing(capacity=4)
+    try:
+        received = []
+        for i in range(0, 10):
+            assert ring.write(i * 0.5, bytes([0x90, i, 127]))
+            received += ring.read_batch()
+        assert received == [(i * 0.5, bytes([0x90, i, 127])) for i in range(0, 10)]
+    finally:
+        ring.close()
+
+def test_ring_drops_records_when_full():
+    ring = CaptureRing(capacity=4)
+    try:
+        results = [ring.write(0.0, bytes([0x90, i, 127])) for i in range(0, 6)]
+        assert results == [True] * 4 + [False] * 2
+        assert [data[1] for _, data in ring.read_batch()] == [0, 1, 2, 3]
+        assert ring.stats()["overflows"] == 2
+    finally:
+        ring.close()
+
+def test_ring_waits_for_unpublished_record():
+    ring = CaptureRing(capacity=4)
+    reader = CaptureRing(ring.name, capacity=4)
+    try:
+        ring.write(0.0, bytes([0x90, 1, 127]))
+        ring._header[WRITTEN] += 1 # Counter visible before the record (reordered stores)
+        assert [data[1] for _, data in reader.read_batch()] == [1]
+        assert reader.read_batch() == []
+        assert reader._header[READ] == 1
+        assert reader.stats()["unpublished"] == 2
+
+        ring._header[WRITTEN] -= 1
+        ring.write(0.0, bytes([0x90, 2, 127])) # Record now written
+        assert [data[1] for _, data in reader.read_batch()] == [2]
+    finally:
+        reader.close()
+        ring.close()
+
+def write_notes(port_name: str, ring_name: str, capacity: int) -> None:
+    """Stand-in capture process: writes NOTES note_on records, then exits like a closed port.
+    """
+    ring = CaptureRing(ring_name, capacity)
+    try:
+        for i in range(0, NOTES):
+            ring.write(float(i), bytes([0x90, i % 128, 127]))
+    finally:
+        ring.close()
+
+def test_capture_delivers_every_record_then_closes():
+    messages = []
+    closed = threading.Event()
+    with MidiCapture("stand-in", messages.extend, closed.set, capacity=NOTES, target=write_notes) as capture:
+        assert closed.wait(10)
+    assert [message.time for message in messages] == [float(i) for i in range(0, NOTES)]
+    assert [message.note for message in messages] == [i % 128 for i in range(0, NOTES)]
+    stats = capture.stats()
+    assert stats["written"] == stats["read"] == NOTES
+    assert stats["pending"] == 0 and stats["overflows"] == 0
@@ -0,0 +1,88 @@
+# test_navigation.py
+# Photo navigation buttons: slider values are synced for the photo navigated to, once it has loaded.
+
+import asyncio
+import time
+
+import mido
+
+NEXT_PHOTO = 47
+
+def set_photo_values(ui, photo: int, value: float) -> None:
+    ui.photo_values[(photo, ui.group)] = {name: value for name in ui.names}
+
+def press(main, notes: list) -> None:
+    """Press buttons, through the event runtime, until their scripts and resyncs are done.
+    """
+    main.init_runtime()
+    for note in notes:
+        main.runtime.put(mido.Message("note_on", note=note, velocity=127))
+    main.runtime.close()
+    asyncio.run(main.runtime.run())
+
+def test_button_waits_for_next_photo(fake_session):
+    main = fake_session
+    main.ui.load_delay = 0.2
+    set_photo_values(main.ui, 1, 0.5)
+    press(main, [NEXT_PHOTO])
+
+    assert main.current_photo_id == "fake-photo-1"
+    assert main.photo_cache.get("fake-photo-1") == {main.cached_name(name): 0.5 for name in main.channel_names}
+    assert main.photo_cache.get("fake-photo-0") == {main.cached_name(name): 0.0 for name in main.channel_names}
+    assert main.slider_state.last(0) == 0.5 * (main.HW_SLIDER_RANGE + 1) / 2
+
+def test_button_without_next_photo(fake_session, monkeypatch):
+    main = fake_session
+    monkeypatch.setattr(main, "NAVIGATION_READY_TIMEOUT", 0.1)
+    monkeypatch.setattr(main.ui, "send_keys", lambda *keys: main.ScriptResult(0, '', '')) # Last photo of the library: no navigation
+    press(main, [NEXT_PHOTO])
+    assert main.current_photo_id == "fake-photo-0"
+
+def run_scripts(runtime, notes: list) -> None:
+    """Run button scripts on the runtime, without MIDI input, until their resync is done.
+    """
+    async def run():
+        runtime._loop = asyncio.get_running_loop()
+        for note in notes:
+            runtime._start_script(note)
+        deadline = time.monotonic() + 5
+        while (runtime._resync_task is None or not runtime._resync_task.done()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await runtime._resync_task
+    asyncio.run(run())
+
+def test_runtime_resync_waits_for_next_photo(fake_session):
+    main = fake_session
+    main.ui.load_delay = 0.2
+    set_photo_values(main.ui, 1, 0.5)
+    main.init_runtime()
+    run_scripts(main.runtime, [NEXT_PHOTO])
+
+    assert main.current_photo_id == "fake-photo-1"
+    assert main.photo_cache.get("fake-photo-1") == {main.cached_name(name): 0.5 for name in main.channel_names}
+    assert main.photo_cache.get("fake-photo-0") == {main.cached_name(name): 0.0 for name in main.channel_names}
+
+def test_runtime_newest_navigation_wins(fake_session):
+    main = fake_session
+    main.ui.load_delay = 0.1
+    main.ui.action_delay = 0.02
+    set_photo_values(main.ui, 2, 0.25)
+    main.init_runtime()
+    run_scripts(main.runtime, [NEXT_PHOTO, NEXT_PHOTO])
+
+    keys = [action for _, action, _, _ in main.ui.actions if action.startswith("key_code")]
+    assert keys == ["key_code 124", "key_code 124"] # Serial, in press order
+    assert main.current_photo_id == "fake-photo-2"
+    assert main.slider_state.last(0) == 0.25 * (main.HW_SLIDER_RANGE + 1) / 2
+
+def test_runtime_drops_resync_of_previous_bank(fake_session):
+    main = fake_session
+    main.init_runtime()
+    bank = main.bank_snapshot()
+    sliders = main.query_sliders(bank[1])
+    main.select_bank("Color")
+    values = [main.slider_state.last(channel) for channel in range(0, len(main.channel_names))]
+
+    main.runtime._apply_in_bank(bank, sliders) # Resync started before the bank switch
+    assert main.runtime.dropped_resyncs == 1
+    assert [main.slider_state.last(channel) for channel in range(0, len(main.channel_names))] == values
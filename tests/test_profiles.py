@@ -0,0 +1,79 @@
+# test_profiles.py
+# Device profiles, compiled into dispatch tables of bound handlers.
+
+import mido
+import pytest
+
+from profiles import IGNORED, DeviceProfile, compile_profile, load_profile
+
+def compile_recording(profile: DeviceProfile) -> tuple:
+    """Compile a profile with handlers that record their calls as (kind, bound argument).
+    """
+    calls = []
+    handlers = {
+        "fader": lambda slider, message: calls.append(("fader", slider)),
+        "jog": lambda directions, message: calls.append(("jog", directions)),
+        "track_select": lambda slider, message: calls.append(("track_select", slider)),
+        "button": lambda message: calls.append(("button", message.note)),
+        "bank": lambda groups, message: calls.append(("bank", groups)),
+        "history": lambda step, message: calls.append(("history", step)),
+    }
+    return compile_profile(profile, handlers), calls
+
+def dispatch(table, message: mido.Message):
+    route = table.lookup(message)
+    if route is None or route is IGNORED:
+        return route
+    name, handler = route
+    handler(message)
+    return name
+
+def test_mf8_routes():
+    profile = load_profile("mf8")
+    table, calls = compile_recording(profile)
+    assert dispatch(table, mido.Message("pitchwheel", channel=3, pitch=100)) == "pitch"
+    assert dispatch(table, mido.Message("control_change", channel=2, control=60, value=65)) == "jog" # Any channel
+    assert dispatch(table, mido.Message("note_on", note=10, velocity=127)) == "button"
+    assert dispatch(table, mido.Message("note_on", note=47, velocity=127)) == "button"
+    assert dispatch(table, mido.Message("note_on", note=57, velocity=127)) == "button"
+    assert dispatch(table, mido.Message("note_on", note=94, velocity=127)) == "button"
+    assert calls == [
+        ("fader", 3),
+        ("jog", {1: 1, 65: -1}),
+        ("track_select", 2),
+        ("button", 47),
+        ("bank", ["Noise Reduction", "Sharpen", "Definition"]),
+        ("history", 1),
+    ]
+
+def test_releases_do_not_run_button_handlers():
+    table, calls = compile_recording(load_profile("mf8"))
+    assert dispatch(table, mido.Message("note_on", note=47, velocity=0)) == "button"
+    assert calls == []
+
+def test_ignored_and_unrouted_messages():
+    table, calls = compile_recording(load_profile("mf8"))
+    assert table.lookup(mido.Message("note_on", note=7, velocity=127)) is IGNORED
+    assert table.lookup(mido.Message("pitchwheel", channel=7)) is IGNORED
+    assert table.lookup(mido.Message("note_on", channel=7, note=47, velocity=127)) is IGNORED # Exact channel route first
+    assert table.lookup(mido.Message("note_on", note=100, velocity=127)) is None
+    assert table.lookup(mido.Message("sysex", data=[1, 2])) is None
+    assert calls == []
+
+def test_profile_fields():
+    profile = DeviceProfile({
+        "name": "Test",
+        "port": "Test port",
+        "buttons": {"5": "next_photo", "6": "apply_preset_and_resync"},
+        "track_leds": [1, 2],
+        "loading_leds": [3, 4],
+    })
+    assert profile.jog_control is None and profile.jog_directions == {}
+    assert profile.navigation_notes == {5: 1}
+    assert profile.resync_notes == [6]
+    assert (profile.track_leds, profile.loading_leds, profile.startup_leds) == ([1, 2], [3, 4], [])
+    assert len(compile_recording(profile)[0]) == 2
+
+def test_unknown_action_is_rejected():
+    with pytest.raises(Exception, match="unknown action"):
+        DeviceProfile({"name": "Test", "port": "Test port", "buttons": {"5": "launch_rockets"}})
@@ -0,0 +1,28 @@
+# test_replay.py
+# Replays of synthetic workloads through the handlers against the fake UI backend (see session.replay).
+
+import mido
+
+import benchmark
+import session
+
+def test_fader_sweep_lands_on_final_value(main):
+    events = benchmark.fader_sweep(channels=[1, 2], sweeps=3)
+    report = session.replay(events, speed=0)
+    assert report["queue"]["dropped"] == 0
+    final = events[-1][1].pitch # Third sweep ends at HW_SLIDER_MAX
+    assert main.slider_state.last(1) == final and main.slider_state.last(2) == final
+    assert report["ui_actions"] < len(events) / 10 # Coalesced and sampled
+
+def test_button_storm_delivers_every_press(main, monkeypatch):
+    monkeypatch.setattr(main, "NAVIGATION_READY_TIMEOUT", 0.1) # Presses cancel out: the last navigation lands on the same photo
+    events = benchmark.button_storm(presses=44)
+    report = session.replay(events, speed=0)
+    assert report["queue"]["dropped"] == 0
+    assert report["queue"]["delivered"] == len(events)
+    assert main.current_photo_id == main.ui.photo_id() # Navigation presses cancel out: 46/91 prev, 47/92 next
+
+def test_undo_after_fader_move(main):
+    events = [(0, mido.Message("pitchwheel", channel=0, pitch=4000)), (0.2, mido.Message("note_on", note=93, velocity=127))]
+    session.replay(events, speed=1)
+    assert main.slider_state.last(0) == 0 # Back to the value synced from Photos
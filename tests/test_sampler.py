@@ -0,0 +1,45 @@
+# test_sampler.py
+# Rate-limited, velocity-adaptive sampling of fader values.
+
+from constants import *
+from sampler import AdaptiveSampler
+
+def test_rate_limited_and_resting_value_delivered():
+    sampler = AdaptiveSampler(2, max_rate=50, settle_time=0.05)
+    assert sampler.offer(0, 0, 0.0) == 0
+    assert sampler.offer(0, 500, 0.005) is None # Within 1/50 s of the last update
+    assert sampler.offer(0, 700, 0.010) is None
+    assert sampler.flush(0.03) == [] # Not settled yet
+    assert sampler.flush(0.07) == [(0, 700)] # Resting value, at full resolution
+    assert not sampler.has_pending
+
+def test_resolution_scales_with_velocity():
+    sampler = AdaptiveSampler(1, max_rate=1000)
+    emitted = []
+    for i, hw_value in enumerate(range(-8000, 6000, 500)): # Most of the travel in 28 ms
+        emitted.append(sampler.offer(0, hw_value, i * 0.001))
+    emitted = [value for value in emitted if value is not None]
+    assert emitted[-1] % QUANTIZE_MOD == 0 # Coarsest step
+    assert len(emitted) < 14
+    slow = AdaptiveSampler(1, max_rate=1000)
+    slow.offer(0, 0, 0.0)
+    assert slow.offer(0, FINE_GRAIN_DELTA, 1.0) == FINE_GRAIN_DELTA # Finest step
+
+def test_slider_ends_are_exact():
+    sampler = AdaptiveSampler(1)
+    sampler.offer(0, 0, 0.0)
+    assert sampler.offer(0, HW_SLIDER_MAX, 0.001 + sampler.min_interval) == HW_SLIDER_MAX
+
+def test_rates():
+    sampler = AdaptiveSampler(2, max_rate=100)
+    for i in range(0, 10):
+        sampler.offer(0, i * 1000, i * 0.1)
+    assert sampler.rates(1.0) == [10.0, 0.0]
+    assert sampler.rates(2.0) == [0.0, 0.0] # Reset on each call
+
+def test_reset_delivers_same_value_again():
+    sampler = AdaptiveSampler(1, max_rate=50)
+    assert sampler.offer(0, 4096, 0.0) == 4096
+    assert sampler.offer(0, 4096, 1.0) is None # Unchanged
+    sampler.reset(0) # Slider moved by other means
+    assert sampler.offer(0, 4096, 2.0) == 4096
@@ -0,0 +1,67 @@
+# test_script_registry.py
+# Compiled AppleScript templates, with the fake compiler of the "echo" executor.
+
+import threading
+
+import utils
+from script_registry import FakeCompiler, ScriptRegistry
+
+def test_run_template_without_pool_uses_a_registry_per_thread(monkeypatch):
+    monkeypatch.setattr(utils, "script_pool", None)
+    monkeypatch.setattr(utils, "APPLESCRIPT_EXECUTOR", "echo")
+    registries = []
+    errors = []
+    def run():
+        for i in range(0, 200):
+            result = utils.run_template("key_code", i)
+            if result.out != str(i):
+                errors.append(result)
+        registries.append(utils.script_registries.registry)
+    threads = [threading.Thread(target=run) for i in range(0, 4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(map(id, registries))) == 4
+    assert all(registry.stats()["compiles"] == 1 for registry in registries)
+
+def test_run_template_without_pool_never_uses_nsapplescript(monkeypatch):
+    monkeypatch.setattr(utils, "script_pool", None)
+    monkeypatch.setattr(utils, "APPLESCRIPT_EXECUTOR", "nsapplescript")
+    executors = []
+    def make_compiler(executor):
+        executors.append(executor)
+        return FakeCompiler()
+    monkeypatch.setattr(utils, "make_compiler", make_compiler)
+    thread = threading.Thread(target=utils.run_template, args=("key_code", 1)) # Runtime executor thread
+    thread.start()
+    thread.join()
+    assert executors == ["osascript"] # NSAppleScript is main-thread only
+
+def test_templates_compiled_once():
+    compiler = FakeCompiler()
+    registry = ScriptRegistry(compiler)
+    for i in range(0, 100):
+        assert registry.run("key_code", [i]) == (0, str(i), '')
+    registry.run("activate", ["Photos"])
+    assert registry.stats() == {"calls": 101, "compiles": 2, "hit_rate": 0.98, "evictions": 0}
+    assert compiler.executions == 101
+
+def test_least_recently_used_template_evicted():
+    registry = ScriptRegistry(FakeCompiler(), capacity=2)
+    for name in ["key_code", "activate", "key_code", "command_keystroke", "key_code", "activate"]:
+        registry.run(name, ["x"])
+    # activate was evicted by command_keystroke, key_code stayed recently used
+    assert registry.stats()["compiles"] == 4
+    assert registry.stats()["evictions"] == 2
+
+def test_unknown_template():
+    code, out, err = ScriptRegistry(FakeCompiler()).run("no_such_template", [])
+    assert code == 1 and "no_such_template" in err
+
+def test_arguments_are_values():
+    registry = ScriptRegistry(FakeCompiler())
+    assert registry.run("set_element_value", ["3.1", 0.25]) == (0, "3.1\t0.25", '')
+    assert registry.run("command_keystroke", ['" & (do shell script "id") & "']) == (0, '" & (do shell script "id") & "', '')
@@ -0,0 +1,23 @@
+# test_session.py
+# Session recordings: messages are recorded with their receive timestamps.
+
+import time
+
+import mido
+
+from session import SessionRecorder, read_session
+
+def test_recorder_keeps_receive_timestamps(tmp_path):
+    path = str(tmp_path / "session.midirec")
+    recorder = SessionRecorder(path)
+    received = time.perf_counter()
+    messages = [mido.Message("note_on", note=47, velocity=127, time=received + 0.5), mido.Message("pitchwheel", pitch=100, time=received + 1.25)]
+    time.sleep(0.05) # Recorded in a batch, after they were received (e.g. read from the capture ring)
+    for message in messages:
+        recorder.record(message)
+    recorder.close()
+
+    events = read_session(path)
+    assert [message for t, message in events] == [message.copy(time=0) for message in messages]
+    assert abs((events[1][0] - events[0][0]) - 0.75) < 1e-6
+    assert abs(events[0][0] - 0.5) < 0.01
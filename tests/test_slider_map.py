@@ -0,0 +1,36 @@
+# test_slider_map.py
+# Precomputed HW slider value -> UI target lookup tables.
+
+from constants import *
+from slider_map import SliderMap, update_slider_maps
+
+def test_points_match_slider_geometry():
+    slider_map = SliderMap(1000, 200, 180)
+    y = 200 + Y_OFFSET_SLIDER
+    assert slider_map.point(HW_SLIDER_MIN) == (1000, y) # Left end
+    assert slider_map.point(0) == (1090, y) # Middle
+    assert slider_map.point(HW_SLIDER_MAX) == (1180, y) # Right end
+    for hw_value in [-5000, -1, 1, 2047, 7777]: # Same as computing the pixel for every event
+        assert slider_map.point(hw_value)[0] == round(1000 + 180 / HW_SLIDER_RANGE * hw_value + 90)
+
+def test_out_of_range_values_are_clamped():
+    slider_map = SliderMap(1000, 200, 180)
+    assert slider_map.point(HW_SLIDER_MAX + 100) == slider_map.point(HW_SLIDER_MAX)
+    assert slider_map.point(HW_SLIDER_MIN - 100) == slider_map.point(HW_SLIDER_MIN)
+    assert slider_map.point(40.4) == slider_map.point(40) # Fractional values (e.g. jog steps) are rounded
+
+def test_slider_values():
+    slider_map = SliderMap(1000, 200, 180)
+    assert slider_map.sw_value(HW_SLIDER_MIN) == -1
+    assert slider_map.sw_value(0) == 0
+    assert slider_map.sw_value(HW_SLIDER_MAX) == 1
+    assert slider_map.sw_value(HW_SLIDER_MAX // 2) == 0.5
+
+def test_only_changed_maps_are_rebuilt():
+    maps = update_slider_maps([], [(1000, 200), (1000, 240), (None, None)], 180)
+    assert maps[2] is None # Not resolved yet
+    updated = update_slider_maps(maps, [(1000, 200), (1000, 260), (1000, 280)], 180)
+    assert updated[0] is maps[0]
+    assert updated[1] is not maps[1] and updated[1].y == 260 + Y_OFFSET_SLIDER
+    assert updated[2].geometry == (1000, 280, 180)
+    assert update_slider_maps(updated, [(1000, 200), (1000, 260), (1000, 280)], 200)[0] is not updated[0] # Width changed
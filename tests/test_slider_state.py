@@ -0,0 +1,61 @@
+# test_slider_state.py
+# Recent values and undo/redo history of the sliders.
+
+from slider_state import SliderState
+
+def test_recent_values_ring():
+    state = SliderState(2, capacity=2)
+    for value in [1, 2, 3]:
+        state.push(1, value, 0)
+    assert state.last(1) == 3
+    assert state.last(0) == 0
+    state.set_last(1, 4, 0)
+    assert state.last(1) == 4
+
+def test_undo_redo():
+    state = SliderState(1)
+    state.reset(0, 100)
+    for value in [200, 300]:
+        state.push(0, value, 0)
+        state.commit(0)
+    assert state.undo(0) == 200
+    assert state.undo(0) == 100
+    assert state.undo(0) is None
+    assert state.redo(0) == 200
+    state.push(0, 250, 0) # New edit: the redo entry is dropped
+    assert state.redo(0) is None
+    assert state.undo(0) == 200
+
+def test_uncommitted_edit_can_be_undone():
+    state = SliderState(1)
+    state.reset(0, 100)
+    state.push(0, 150, 0)
+    assert state.undo(0) == 100
+    assert state.redo(0) == 150
+
+def test_commit_when_settled():
+    state = SliderState(1)
+    state.reset(0, 0)
+    state.push(0, 10, 1.0)
+    state.push(0, 20, 1.1)
+    state.commit_settled(1.3, 0.5)
+    state.commit_settled(1.6, 0.5)
+    state.push(0, 30, 2.0)
+    state.commit_settled(2.6, 0.5)
+    assert [state.undo(0), state.undo(0), state.undo(0)] == [20, 0, None] # One entry per settled edit
+
+def test_history_depth():
+    state = SliderState(1, depth=3)
+    state.reset(0, 0)
+    for value in [1, 2, 3, 4]:
+        state.push(0, value, 0)
+        state.commit(0)
+    assert [state.undo(0), state.undo(0), state.undo(0)] == [3, 2, None]
+
+def test_reset_restarts_history():
+    state = SliderState(1)
+    state.push(0, 10, 0)
+    state.commit(0)
+    state.reset(0, 50) # Another photo
+    assert state.last(0) == 50
+    assert state.undo(0) is None
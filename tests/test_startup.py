@@ -0,0 +1,66 @@
+# test_startup.py
+# Overlapping startup: MIDI events are handled while the Photos app is still being discovered.
+
+import asyncio
+import json
+import threading
+import time
+
+import mido
+
+from session import FakeOutput
+from startup import StartupTimer
+
+def test_faders_handled_before_ui_backend_exists(main):
+    main.startup = StartupTimer()
+    main.init_profile(main.DEVICE_PROFILE)
+    main.outport = FakeOutput()
+    main.init_leds()
+    assert main.ui is None and main.gesture is None
+
+    # The event loop runs while the "photos" stage has not created the UI backend yet
+    main.init_runtime()
+    runtime = main.runtime
+    errors = []
+    def consume():
+        try:
+            asyncio.run(runtime.run())
+        except Exception as e:
+            errors.append(e)
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    runtime.put(mido.Message("pitchwheel", channel=0, pitch=4096))
+    runtime.put(mido.Message("note_on", note=47, velocity=127)) # Navigation: dropped until slider values are synced
+    time.sleep(0.2) # Idle work runs meanwhile
+    assert main.pending_faders == {0: 4096}
+
+    main.discover_photos()
+    deadline = time.monotonic() + 2
+    while main.pending_faders and time.monotonic() < deadline:
+        time.sleep(0.01)
+    runtime.close()
+    consumer.join()
+
+    assert errors == []
+    assert main.pending_faders == {}
+    assert main.ui.photo == 0
+    assert any(action == "press_slider" and channel == 0 for _, action, channel, _ in main.ui.actions)
+
+def test_warm_start_reads_slider_values_by_path(main, monkeypatch):
+    main.init_profile(main.DEVICE_PROFILE)
+    main.outport = FakeOutput()
+    main.init_leds()
+    main.startup = StartupTimer()
+    main.discover_photos() # Cold start: full discovery saves the layout cache
+    with open(main.LAYOUT_CACHE_PATH) as f:
+        assert sorted(json.load(f)) == ["key", "slider_coords", "slider_size"]
+
+    main.slider_info = {}
+    walks = []
+    monkeypatch.setattr(main, "get_init_slider_positions", lambda: walks.append("positions"))
+    monkeypatch.setattr(main, "query_sliders", lambda names=None: walks.append("values"))
+    main.startup = StartupTimer()
+    main.discover_photos()
+    assert walks == []
+    assert main.sliders_synced
+    assert main.slider_state.last(0) == 0 # Value of the fake photo
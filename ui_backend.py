@@ -0,0 +1,377 @@
+# ui_backend.py
+# UI backends that turn slider moves and button presses into actions in the Photos app.
+
+import time
+
+from applescript_pool import ScriptResult
+from ax_tree import PHOTOS_ADJUSTMENTS, AccessibilityQuery, AppleScriptSource, SimulatedPhotosSource
+from constants import *
+from utils import *
+
+class UIBackend:
+    """Interface between the message handlers in main.py and the Photos UI.
+    Sliders are addressed by channel and HW slider value (HW_SLIDER_MIN..HW_SLIDER_MAX).
+
+    Querying sliders and sending keystrokes go through AppleScript for all real backends;
+    subclasses implement how a slider is moved.
+
+    Sliders belong to the bank (adjustment group) selected with `set_bank`. Once `index_elements` has indexed
+    the Photos window, sliders are looked up by path in the index instead of walking the window.
+    """
+    uses_pixels = True # Whether slider targets are pixels on screen (or slider values)
+
+    def __init__(self):
+        self.slider_maps = []
+        self.element_query = None # Index of the Photos window, see ax_tree.py
+        self.group = None # Adjustment group of the sliders, or None before banks are indexed
+        self.slider_paths = [] # Element path of each slider in the index, per channel
+
+    def element_source(self):
+        """Accessibility tree indexed by `index_elements`.
+
+        Returns:
+            ax_tree.AccessibilitySource: The Photos window, through AppleScript.
+        """
+        return AppleScriptSource()
+
+    def index_elements(self) -> dict:
+        """Index the Photos window with one walk: slider description -> element path, by adjustment group.
+        The index is only used if the walk found the sliders of the current group.
+
+        Returns:
+            dict: Map of group name -> slider descriptions, in UI order. Empty if the walk failed.
+        """
+        if self.element_query is None:
+            self.element_query = AccessibilityQuery(self.element_source())
+        if not self.element_query.build_index(self.group):
+            return {}
+        return {group: list(paths) for group, paths in self.element_query.groups.items()}
+
+    def set_bank(self, group: str, names: list) -> None:
+        """Select the adjustment group of the sliders.
+
+        Args:
+            group (str): Adjustment group, e.g. "Light".
+            names (list): Slider descriptions, per channel.
+        """
+        self.group = group
+        if self.element_query is not None and self.element_query.index is not None:
+            paths = self.element_query.lookup("slider", names, group)
+            self.slider_paths = [paths.get(name) for name in names]
+
+    def set_geometry(self, slider_maps: list) -> None:
+        """Set slider geometry found in the Photos app.
+
+        Args:
+            slider_maps (list): SliderMap lookup tables of each slider. See slider_map.py.
+        """
+        self.slider_maps = slider_maps
+
+    def slider_point(self, channel: int, hw_value: float) -> tuple:
+        """Get the UI coordinates of a HW slider value.
+
+        Args:
+            channel (int): Slider channel.
+            hw_value (float): HW slider value.
+
+        Returns:
+            tuple: (x, y) UI coordinates.
+        """
+        return self.slider_maps[channel].point(hw_value)
+
+    def activate(self) -> ScriptResult:
+        """Focus on the Photos app.
+        """
+        return run_template("activate", "Photos")
+
+    def query_sliders(self, names: list) -> dict:
+        """Query position, size and value of sliders.
+
+        Args:
+            names (list): Slider descriptions.
+
+        Returns:
+            dict: Map of description -> {"position": (x, y), "size": (w, h), "value": float}.
+        """
+        if self.element_query is not None and self.element_query.index is not None:
+            sliders = self.element_query.find_sliders(names, self.group) # Read by path: no walk
+            if len(sliders) == len(names):
+                return sliders
+        return get_applescript_slider_attributes_by_descriptions(names) # Not indexed, or missing from the index: walk
+
+    def probe_layout(self, slider_id: str) -> dict:
+        """Cheap probe of the Photos layout, to validate the layout cache.
+
+        Args:
+            slider_id (str): Accessibility name of the slider to probe.
+
+        Returns:
+            dict: Layout probe, or None if the probe failed. See utils.get_applescript_layout_probe.
+        """
+        return get_applescript_layout_probe(slider_id)
+
+    def read_slider_values(self, slider_ids: list) -> list:
+        """Read the values of the Light sliders by path, without walking the Photos window (warm start).
+
+        Args:
+            slider_ids (list): Accessibility names of the sliders, per channel.
+
+        Returns:
+            list: Value of each slider, or None if the read failed. See utils.get_applescript_slider_values_by_path.
+        """
+        return get_applescript_slider_values_by_path(slider_ids)
+
+    def photo_id(self) -> str:
+        """Get the identity of the photo open in the Photos app.
+
+        Returns:
+            str: Photo identity, or None if no photo is selected.
+        """
+        return get_applescript_photo_id()
+
+    def open_edit_pane(self) -> ScriptResult:
+        """Click the Edit button of the Photos app.
+        """
+        return click_applescript_item_by_attribute_and_by_description(attribute="button", description="Edit")
+
+    def send_keys(self, template: str, *args) -> ScriptResult:
+        """Send a keystroke to System Events.
+
+        Args:
+            template (str): Keystroke script template, e.g. "key_code". See script_registry.py.
+            *args: Arguments of the template, e.g. the key code.
+
+        Returns:
+            ScriptResult: Result of the script.
+        """
+        return run_template(template, *args)
+
+    def grab_slider(self, channel: int, hw_value: float) -> None:
+        """First touch of a slider (first event, or another slider was touched before).
+        """
+        raise NotImplementedError
+
+    def drag_slider(self, channel: int, hw_value: float) -> None:
+        """Move the slider that is already grabbed.
+        """
+        raise NotImplementedError
+
+    def nudge_slider(self, channel: int, hw_delta: float, hw_value: float) -> None:
+        """Fine grain adjust of the grabbed slider by `hw_delta`, to `hw_value` (accumulated jog wheel ticks).
+        """
+        raise NotImplementedError
+
+    def point_at_slider(self, channel: int, hw_value: float) -> None:
+        """Point at a slider without changing its value (track select).
+        """
+        raise NotImplementedError
+
+    def press_slider(self, channel: int, hw_value: float) -> None:
+        """Start of a fader gesture: press the mouse on a slider at a HW value, and hold it. See gesture.py.
+        Backends that don't use the mouse set the value.
+        """
+        self.grab_slider(channel, hw_value)
+
+    def move_pressed_slider(self, channel: int, hw_value: float) -> None:
+        """Move the slider held since `press_slider`, without releasing the mouse.
+        """
+        self.drag_slider(channel, hw_value)
+
+    def release_slider(self, channel: int) -> None:
+        """End of a fader gesture: release the mouse.
+        """
+        return
+
+class PyAutoGUIBackend(UIBackend):
+    """Move sliders with simulated mouse clicks and drags.
+    """
+    def __init__(self):
+        super().__init__()
+        import pyautogui # Needs a display: only import when this backend is used
+        self._pyautogui = pyautogui
+
+    def grab_slider(self, channel: int, hw_value: float) -> None:
+        self._pyautogui.leftClick(*self.slider_point(channel, hw_value)) # was moveTo
+
+    def drag_slider(self, channel: int, hw_value: float) -> None:
+        self._pyautogui.dragTo(*self.slider_point(channel, hw_value), button='left')
+
+    def nudge_slider(self, channel: int, hw_delta: float, hw_value: float) -> None:
+        # One relative drag over the pixels between the previous and new value; at least 1 pixel, so a single tick always moves
+        dx = self.slider_point(channel, hw_value)[0] - self.slider_point(channel, hw_value - hw_delta)[0]
+        if dx == 0:
+            dx = 1 if hw_delta > 0 else -1
+        self._pyautogui.dragRel(dx, 0, button='left')
+
+    def point_at_slider(self, channel: int, hw_value: float) -> None:
+        self._pyautogui.moveTo(*self.slider_point(channel, hw_value))
+
+    def press_slider(self, channel: int, hw_value: float) -> None:
+        self._pyautogui.mouseDown(*self.slider_point(channel, hw_value), button='left')
+
+    def move_pressed_slider(self, channel: int, hw_value: float) -> None:
+        # Drag events only (no press/release), and no pyautogui.PAUSE between samples
+        self._pyautogui.dragTo(*self.slider_point(channel, hw_value), button='left', mouseDownUp=False, _pause=False)
+
+    def release_slider(self, channel: int) -> None:
+        self._pyautogui.mouseUp(button='left')
+
+class AccessibilityBackend(UIBackend):
+    """Set the accessibility `value` of sliders directly: no cursor animation or pyautogui pauses.
+    """
+    uses_pixels = False
+
+    def __init__(self, slider_ids: list):
+        """Initialize AccessibilityBackend class.
+
+        Args:
+            slider_ids (list): Accessibility names of sliders referenced with AppleScript, per channel.
+        """
+        super().__init__()
+        self.slider_ids = slider_ids
+
+    def set_slider_value(self, channel: int, hw_value: float) -> None:
+        """Set a slider to a HW slider value. Sliders of the indexed bank are set by element path.
+        """
+        sw_value = self.slider_maps[channel].sw_value(hw_value)
+        if channel < len(self.slider_paths) and self.slider_paths[channel] is not None:
+            self.element_query.source.set_value(self.slider_paths[channel], sw_value)
+            return
+        set_applescript_slider_value_by_path(self.slider_ids[channel], sw_value)
+
+    def grab_slider(self, channel: int, hw_value: float) -> None:
+        self.set_slider_value(channel, hw_value)
+
+    def drag_slider(self, channel: int, hw_value: float) -> None:
+        self.set_slider_value(channel, hw_value)
+
+    def nudge_slider(self, channel: int, hw_delta: float, hw_value: float) -> None:
+        self.set_slider_value(channel, hw_value)
+
+    def point_at_slider(self, channel: int, hw_value: float) -> None:
+        return # Nothing to point at: the mouse is not used
+
+class FakeBackend(UIBackend):
+    """In-memory backend for driving and timing the handlers on a headless machine.
+    Every action is recorded in `actions` as (time, action, channel, hw_value).
+    Simulates a library of photos, each with its own slider values per adjustment group, navigated with the left/right arrow keys.
+    After a navigation, the previous photo is shown for `load_delay` seconds while the next one loads.
+    """
+    def __init__(self, names: list, action_delay: float = 0, load_delay: float = 0):
+        """Initialize FakeBackend class.
+
+        Args:
+            names (list): Slider descriptions, per channel.
+            action_delay (float, optional): Seconds each slider action takes, to simulate a real UI. Defaults to 0.
+            load_delay (float, optional): Seconds a photo takes to load after navigating to it. Defaults to 0.
+        """
+        super().__init__()
+        self.names = names
+        self.action_delay = action_delay
+        self.load_delay = load_delay
+        self.actions = []
+        self.photo = 0
+        self.photo_values = {}
+        self._loading_photo = None # Photo shown while the current photo loads
+        self._loaded_time = 0
+
+    @property
+    def loading(self) -> bool:
+        """Whether the current photo is still loading after a navigation.
+        """
+        return self._loading_photo is not None and time.perf_counter() < self._loaded_time
+
+    @property
+    def sw_values(self) -> dict:
+        """Slider values of the current photo, in the current adjustment group.
+        """
+        key = (self.photo, self.group)
+        if key not in self.photo_values:
+            self.photo_values[key] = {name: 0.0 for name in self.names}
+        return self.photo_values[key]
+
+    def element_source(self):
+        return SimulatedPhotosSource(groups=PHOTOS_ADJUSTMENTS)
+
+    def _record(self, action: str, channel: int = None, hw_value: float = None) -> None:
+        self.actions.append((time.perf_counter(), action, channel, hw_value))
+        if channel is not None and hw_value is not None:
+            self.sw_values[self.names[channel]] = hw_value * 2 / (HW_SLIDER_RANGE + 1)
+        if self.action_delay:
+            time.sleep(self.action_delay)
+
+    def activate(self) -> ScriptResult:
+        return ScriptResult(0, '', '')
+
+    def query_sliders(self, names: list) -> dict:
+        if self.loading: # Edit pane is not ready
+            return {}
+        # Sliders are stacked vertically, 180 px wide, like the Light sliders in Photos
+        return {name: {"position": (1000, 200 + 40 * self.names.index(name)), "size": (180, 20), "value": self.sw_values[name]} for name in names if name in self.sw_values}
+
+    def read_slider_values(self, slider_ids: list) -> list:
+        if self.loading: # Edit pane is not ready
+            return None
+        return [self.sw_values[name] for name in self.names[:len(slider_ids)]]
+
+    def probe_layout(self, slider_id: str) -> dict:
+        return {"photos_version": "fake", "screen": [0, 0, 1920, 1080], "window": [0, 0, 1920, 1080], "slider_position": [1000, 200]}
+
+    def open_edit_pane(self) -> ScriptResult:
+        self._record("open_edit_pane")
+        return ScriptResult(0, '', '')
+
+    def photo_id(self) -> str:
+        return f"fake-photo-{self._loading_photo if self.loading else self.photo}"
+
+    def send_keys(self, template: str, *args) -> ScriptResult:
+        self._record(" ".join([template] + [str(arg) for arg in args]))
+        if template == "key_code" and args[0] in (123, 124): # left/right arrow
+            if not self.loading:
+                self._loading_photo = self.photo
+            self._loaded_time = time.perf_counter() + self.load_delay
+            self.photo += -1 if args[0] == 123 else 1
+        return ScriptResult(0, '', '')
+
+    def grab_slider(self, channel: int, hw_value: float) -> None:
+        self._record("grab_slider", channel, hw_value)
+
+    def drag_slider(self, channel: int, hw_value: float) -> None:
+        self._record("drag_slider", channel, hw_value)
+
+    def nudge_slider(self, channel: int, hw_delta: float, hw_value: float) -> None:
+        self._record("nudge_slider", channel, hw_value)
+
+    def point_at_slider(self, channel: int, hw_value: float) -> None:
+        self._record("point_at_slider", channel, hw_value)
+
+    def press_slider(self, channel: int, hw_value: float) -> None:
+        self._record("press_slider", channel, hw_value)
+
+    def move_pressed_slider(self, channel: int, hw_value: float) -> None:
+        self._record("move_pressed_slider", channel, hw_value)
+
+    def release_slider(self, channel: int) -> None:
+        self._record("release_slider", channel)
+
+def make_backend(name: str, names: list, slider_ids: list) -> UIBackend:
+    """Make a UI backend by name.
+
+    Args:
+        name (str): "pyautogui", "accessibility" or "fake".
+        names (list): Slider descriptions, per channel.
+        slider_ids (list): Accessibility names of sliders, per channel.
+
+    Raises:
+        Exception: If unknown backend name.
+
+    Returns:
+        UIBackend: The UI backend.
+    """
+    if name == "pyautogui":
+        return PyAutoGUIBackend()
+    elif name == "accessibility":
+        return AccessibilityBackend(slider_ids)
+    elif name == "fake":
+        return FakeBackend(names)
+    raise Exception(f"Unknown UI backend {name}.")
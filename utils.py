@@ -3,63 +3,195 @@
 # Ian Webster
 # Dec 2022
 
-import applescript
+import threading
 
-def get_applescript_slider_attribute_by_description(attribute: str, description: str) -> applescript._result.Result:
+import metrics
+from applescript_pool import ScriptPool, ScriptResult
+from constants import *
+from script_registry import ScriptRegistry, make_compiler
+
+# Pool of warm AppleScript workers, or None to start a new osascript process per call.
+script_pool = None
+
+# Compiled script templates, used without the pool: one registry per thread (created on first use),
+# since runtime executors run templates in parallel and compiled scripts are not shared across threads.
+# NSAppleScript is only safe on the main thread, so the "nsapplescript" executor runs in pool workers
+# only: without the pool, templates run with osascript.
+script_registries = threading.local()
+
+def start_script_pool(size: int, executor: str) -> None:
+    """Start the AppleScript worker pool used by `run_template`.
+
+    Args:
+        size (int): Number of worker processes. 0 disables the pool.
+        executor (str): Executor used by the workers. See applescript_worker.py.
+    """
+    global script_pool
+    if size > 0:
+        script_pool = ScriptPool(size=size, executor=executor)
+
+def run_template(name: str, *args) -> ScriptResult:
+    """Run a script template of script_registry.py with arguments, on the worker pool if started.
+    Templates are compiled once (per worker), and arguments are passed as values: never spliced into source.
+
+    Args:
+        name (str): Template name.
+        *args: Arguments of the template (str, int or float).
+
+    Returns:
+        ScriptResult: Result with `code`, `out` and `err`.
+    """
+    started = metrics.now() if metrics.enabled else 0
+    if script_pool is not None:
+        result = script_pool.run_template(name, args)
+    else:
+        registry = getattr(script_registries, "registry", None)
+        if registry is None:
+            executor = "osascript" if APPLESCRIPT_EXECUTOR == "nsapplescript" else APPLESCRIPT_EXECUTOR
+            registry = script_registries.registry = ScriptRegistry(make_compiler(executor))
+        result = ScriptResult(*registry.run(name, args))
+    if metrics.enabled and started:
+        metrics.observe("applescript", "call", metrics.now() - started)
+    return result
+
+def click_applescript_item_by_attribute_and_by_description(attribute: str, description: str) -> ScriptResult:
     # NOTE: O(n) where `n` is size of all contents/items in photos app window
-    result = applescript.run(f'''
-    tell application "Photos" to activate
-        tell application "System Events"
-            tell process "Photos"
-                set i to 0
-                set itemVals to {{}}
-                set listItems to (entire contents of window 1 as list)
-                repeat with thisItem in listItems
-                    set i to i + 1
-                    if (class of item i of listItems is slider) then
-                        if description of item i of listItems is "{description}" then
-                            copy {attribute} of thisItem to end of itemVals
-                            exit repeat
-                        end if
-                    end if
-                end repeat
-                return itemVals
-            end tell
-        end tell
-    ''')
+    result = run_template("click_by_description", attribute, description)
 
+    # Error logging
     err = result.err
     if err != '':
         print(f"Error: attribute={attribute}, description={description}: {err}")
         
     return result
 
-def click_applescript_item_by_attribute_and_by_description(attribute: str, description: str) -> applescript._result.Result:
-    # NOTE: O(n) where `n` is size of all contents/items in photos app window
-    result = applescript.run(f'''
-    tell application "Photos" to activate
-        tell application "System Events"
-            tell process "Photos"
-                set i to 0
-                set itemVals to {{}}
-                set listItems to (entire contents of window 1 as list)
-                repeat with thisItem in listItems
-                    set i to i + 1
-                    if (class of item i of listItems is {attribute}) then
-                        if description of item i of listItems is "{description}" then
-                            click item i of listItems
-                            exit repeat
-                        end if
-                    end if
-                end repeat
-                return itemVals
-            end tell
-        end tell
-    ''')
+def get_applescript_slider_attributes_by_descriptions(descriptions: list) -> dict:
+    """Get position, size and value of every requested slider with a single walk of the Photos window.
+
+    Args:
+        descriptions (list): Accessibility descriptions of sliders to query.
+
+    Returns:
+        dict: Map of description -> {"position": (x, y), "size": (w, h), "value": float} for every slider found.
+              Sliders that could not be found are missing from the result.
+    """
+    # NOTE: O(n) where `n` is size of all contents/items in photos app window, regardless of len(descriptions)
+    result = run_template("slider_attributes", *descriptions)
 
-    # Error logging
     err = result.err
     if err != '':
-        print(f"Error: attribute={attribute}, description={description}: {err}")
-        
+        print(f"Error: descriptions={descriptions}: {err}")
+
+    return parse_slider_attributes(result.out)
+
+def parse_slider_attributes(out: str) -> dict:
+    """Parse the output of `get_applescript_slider_attributes_by_descriptions`.
+
+    Args:
+        out (str): One tab-separated line per slider: description, x, y, width, height, value.
+
+    Returns:
+        dict: Map of description -> {"position": (x, y), "size": (w, h), "value": float}.
+    """
+    sliders = {}
+    for line in out.splitlines():
+        fields = line.split("\t")
+        if len(fields) != 6:
+            continue
+        description, x, y, w, h, value = fields
+        sliders[description] = {
+            "position": (int(float(x)), int(float(y))),
+            "size": (int(float(w)), int(float(h))),
+            "value": float(value),
+        }
+    return sliders
+
+def set_applescript_slider_value_by_path(slider_id: str, value: float, group: str = "Light") -> ScriptResult:
+    """Set the accessibility value of a slider directly, without moving the mouse.
+
+    Args:
+        slider_id (str): Accessibility name of the slider, e.g. "Adjust the overall lightness of the image".
+        value (float): New value of the slider.
+        group (str, optional): Adjustment group holding the slider (under ADJUSTMENTS_PATH). Defaults to "Light".
+
+    Returns:
+        ScriptResult: Result of the script.
+    """
+    # NOTE: O(1): addresses the slider by path instead of walking the photos app window
+    result = run_template("set_slider_value", slider_id, float(value), group)
+
+    err = result.err
+    if err != '':
+        print(f"Error: slider_id={slider_id}, value={value}: {err}")
+
     return result
+
+def get_applescript_layout_probe(slider_id: str, group: str = "Light") -> dict:
+    """Cheap probe of the Photos layout: app version, screen and window geometry, and the position of one slider.
+
+    Args:
+        slider_id (str): Accessibility name of the slider to probe.
+        group (str, optional): Adjustment group holding the slider (under ADJUSTMENTS_PATH). Defaults to "Light".
+
+    Returns:
+        dict: {"photos_version": str, "screen": [...], "window": [...], "slider_position": [x, y]}, or None if the probe failed (e.g. edit pane closed).
+    """
+    # NOTE: O(1): addresses the slider by path instead of walking the photos app window
+    result = run_template("layout_probe", slider_id, group)
+
+    return parse_layout_probe(result.out)
+
+def parse_layout_probe(out: str) -> dict:
+    """Parse the output of `get_applescript_layout_probe`.
+
+    Args:
+        out (str): Tab-separated Photos version, screen bounds, window position and size, and slider position.
+
+    Returns:
+        dict: Parsed probe, or None if the probe failed.
+    """
+    fields = out.split("\t")
+    if len(fields) != 11:
+        return None
+    numbers = [int(float(field)) for field in fields[1:]]
+    return {
+        "photos_version": fields[0],
+        "screen": numbers[0:4],
+        "window": numbers[4:8],
+        "slider_position": numbers[8:10],
+    }
+
+def get_applescript_slider_values_by_path(slider_ids: list, group: str = "Light") -> list:
+    """Get the values of sliders, addressed by path like the layout probe.
+
+    Args:
+        slider_ids (list): Accessibility names of the sliders.
+        group (str, optional): Adjustment group holding the sliders (under ADJUSTMENTS_PATH). Defaults to "Light".
+
+    Returns:
+        list: Value of each slider, or None if the read failed (e.g. edit pane closed).
+    """
+    # NOTE: O(1) per slider: addresses the sliders by path instead of walking the photos app window
+    result = run_template("slider_values", group, *slider_ids)
+    if result.code != 0:
+        print(f"Error: could not read slider values: {result.err}")
+        return None
+
+    values = result.out.strip().splitlines()
+    if len(values) != len(slider_ids):
+        return None
+    return [float(value) for value in values]
+
+def get_applescript_photo_id() -> str:
+    """Get the identity of the photo open in (or selected in) the Photos app.
+
+    Returns:
+        str: Photo identity, or None if no photo is selected.
+    """
+    result = run_template("photo_id")
+
+    err = result.err
+    if err != '':
+        print(f"Error: photo id: {err}")
+
+    return result.out if result.out != '' else None